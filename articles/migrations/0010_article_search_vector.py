@@ -0,0 +1,70 @@
+# Generated by Django 5.0.6 on 2024-11-05 10:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, Func, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Concat
+
+# Frozen copy of the search document of the articles (see `articles.models.article_search_vector`),
+# so that this migration does not depend on the current models.
+SEARCH_CONFIGS = ("french", "english")
+
+
+def strip_html(field):
+    return Func(F(field), Value("<[^>]+>"), Value(" "), Value("g"), function="regexp_replace",
+                output_field=TextField())
+
+
+def search_vector(*fields):
+    vector = None
+    for field, weight in fields:
+        for config in SEARCH_CONFIGS:
+            part = SearchVector(field, config=config, weight=weight)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+def related_text(through, owner, text):
+    return Subquery(
+        through.filter(**{owner: OuterRef("pk")})
+        .values(owner)
+        .annotate(text=StringAgg(text, delimiter=" ", output_field=TextField()))
+        .values("text")[:1],
+        output_field=TextField()
+    )
+
+
+def person_search_text(prefix):
+    return Concat(f"{prefix}firstname", Value(" "), f"{prefix}lastname", Value(" "), f"{prefix}pseudonym")
+
+
+def populate_search_vectors(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    Article.objects.update(search_vector=search_vector(
+        ("title", "A"),
+        (related_text(Article.authors.through.objects.all(), "article", person_search_text("person__")), "A"),
+        (strip_html("body"), "C"),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0009_article_attachments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='The document of the article for the full-text search, maintained on save.', null=True, verbose_name='Search vector'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
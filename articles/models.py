@@ -2,13 +2,20 @@
 """
 Models for the `article` application.
 """
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from tinymce import models as tinymce_models
 
 from common.choices import PublicationStatus
+from common.utils.listings import ARTICLES, invalidate_listings
+from common.utils.search import changed_objects, related_text, search_vector, strip_html
+from core.models import person_search_text
 
 # ======================================================================================================================
 # Article
@@ -21,6 +28,19 @@ def get_cover_image_upload_path(instance, filename):
     return f"articles/{instance.slug}/cover.{extension}"
 # End def get_splash_image_upload_path
 
+def article_search_vector(model) -> SearchVector:
+    """Build the search document of the articles: their title and authors, and body.
+
+    Args:
+        model: The `Article` model.
+    """
+    return search_vector(
+        ("title", "A"),
+        (related_text(model.authors.through.objects.all(), "article", person_search_text("person__")), "A"),
+        (strip_html("body"), "C"),
+    )
+# End def article_search_vector
+
 class Article(models.Model):
     """Represent an article about a specific topic.
 
@@ -115,6 +135,17 @@ class Article(models.Model):
         blank=True,
     )
 
+    # ------------------------------------------------------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------------------------------------------------------
+
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name=_("Search vector"),
+        help_text=_("The document of the article for the full-text search, maintained on save.")
+    )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Meta
     # ------------------------------------------------------------------------------------------------------------------
@@ -122,6 +153,7 @@ class Article(models.Model):
     class Meta:
         verbose_name = _("Article")
         verbose_name_plural = _("Articles")
+        indexes = [GinIndex(fields=["search_vector"], name="article_search_vector_idx")]
     # End class Meta
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -132,6 +164,13 @@ class Article(models.Model):
         return self.title
     # End def __str__
 
+    @classmethod
+    def update_search_vectors(cls, queryset: models.QuerySet | None = None) -> int:
+        """Update the search documents of articles, all by default (see `common.utils.search`)."""
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(search_vector=article_search_vector(cls))
+    # End def update_search_vectors
+
     def clean(self):
         self.slug = slugify(self.title)
     # End def clean
@@ -144,3 +183,22 @@ class Article(models.Model):
         return reverse('article', args=[self.slug])
     # End def get_absolute_url
 # End class Article
+
+
+@receiver([post_save, post_delete], sender=Article)
+@receiver(m2m_changed, sender=Article.authors.through)
+@receiver(m2m_changed, sender=Article.themes.through)
+def invalidate_article_listings(sender, **kwargs):
+    """Invalidate the cached listings of the articles once an article, its authors or its themes change."""
+    invalidate_listings(ARTICLES)
+# End def invalidate_article_listings
+
+
+@receiver(post_save, sender=Article)
+@receiver(m2m_changed, sender=Article.authors.through)
+def update_article_search_vector(sender, instance, raw=False, **kwargs):
+    """Update the search document of an article once saved, or once its authors change."""
+    articles = None if raw else changed_objects(Article, "authors", instance, **kwargs)
+    if articles is not None:
+        Article.update_search_vectors(articles)
+# End def update_article_search_vector
@@ -3,11 +3,12 @@
 Views for the `article` application.
 """
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Q
 from django.utils.decorators import method_decorator
 from django.views.generic import DetailView, ListView
 
 from common.choices import PublicationStatus
+from common.utils.listings import ARTICLES, THEMES, CachedListingMixin
+from common.utils.search import search_queryset
 from thematic.models import Theme
 from .models import Article
 from files.models import FileType
@@ -17,10 +18,13 @@ from files.models import FileType
 # Index view
 # ======================================================================================================================
 
-class ArticleIndexView(ListView):
+class ArticleIndexView(CachedListingMixin, ListView):
     """View for the index of the `article` application."""
     model = Article
     template_name = "articles/article_index.html"
+    listing_template_name = "articles/article_index_listing.html"
+    listing_sections = (ARTICLES, THEMES)
+    listing_params = ("theme", "search", "page")
     context_object_name = "articles"
     paginate_by = 10
 
@@ -36,11 +40,7 @@ class ArticleIndexView(ListView):
         # 2. Filter by search query
         search = self.request.GET.get('search')
         if search:
-            articles = articles.filter(
-                Q(title__icontains=search) |
-                Q(authors__firstname__icontains=search) |
-                Q(authors__lastname__icontains=search)
-            ).distinct()
+            articles = search_queryset(articles, search)
         return articles
     # End def get_queryset
 
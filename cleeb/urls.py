@@ -43,6 +43,7 @@ urlpatterns = [
     path('', include('core.urls')),
     path('', include('datasets.urls')),
     path('', include('interactive_maps.urls')),
+    path('', include('map_templates.urls')),
     path('', include('thematic.urls')),
 ]
 
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Utility module for caching large byte strings, such as rendered documents.
+
+The values are cached in two tiers:
+- a bounded in-process LRU cache, which serves the hottest values without any round trip;
+- a Django cache shared by the processes, which fills the in-process caches on their misses.
+Both tiers count their hits and misses, see `TieredCache.stats`.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+
+# ======================================================================================================================
+# In-process cache
+# ======================================================================================================================
+
+class LRUCache:
+    """Thread-safe LRU cache of byte strings, bounded by the total size of its values.
+
+    The least recently used values are evicted once the size of the values exceeds `max_bytes`.
+    Values larger than `max_item_bytes` are not cached.
+    """
+
+    def __init__(self, max_bytes: int, max_item_bytes: int | None = None) -> None:
+        self.max_bytes      : int = max_bytes
+        self.max_item_bytes : int = max_item_bytes if max_item_bytes is not None else max_bytes
+        self.size           : int = 0
+        self.hits           : int = 0
+        self.misses         : int = 0
+        self.__values       : OrderedDict[str, bytes] = OrderedDict()
+        self.__lock         : threading.Lock = threading.Lock()
+    # End def __init__
+
+    def __len__(self) -> int:
+        return len(self.__values)
+    # End def __len__
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__values
+    # End def __contains__
+
+    def get(self, key: str) -> bytes | None:
+        """Get a value, marking it as the most recently used, None if it is not cached."""
+        with self.__lock:
+            value = self.__values.get(key, None)
+            if value is None:
+                self.misses += 1
+                return None
+            self.__values.move_to_end(key)
+            self.hits += 1
+            return value
+    # End def get
+
+    def set(self, key: str, value: bytes) -> bool:
+        """Cache a value, evicting the least recently used values as needed.
+
+        Returns:
+            bool: Whether the value was cached, i.e. it is not larger than `max_item_bytes`.
+        """
+        if len(value) > self.max_item_bytes or len(value) > self.max_bytes:
+            return False
+        with self.__lock:
+            self.__discard(key)
+            self.__values[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                self.__discard(next(iter(self.__values)))
+        return True
+    # End def set
+
+    def delete(self, key: str) -> None:
+        with self.__lock:
+            self.__discard(key)
+    # End def delete
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete the values whose key starts with a prefix.
+
+        Returns:
+            int: The number of values deleted.
+        """
+        with self.__lock:
+            keys = [key for key in self.__values if key.startswith(prefix)]
+            for key in keys:
+                self.__discard(key)
+        return len(keys)
+    # End def delete_prefix
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__values.clear()
+            self.size = 0
+    # End def clear
+
+    def __discard(self, key: str) -> None:
+        value = self.__values.pop(key, None)
+        if value is not None:
+            self.size -= len(value)
+    # End def __discard
+# End class LRUCache
+
+# ======================================================================================================================
+# Tiered cache
+# ======================================================================================================================
+
+class TieredCache:
+    """Cache of byte strings, in an in-process LRU cache backed by a Django cache shared by the processes.
+
+    The keys are prefixed by `namespace` in the shared cache. Values larger than `max_item_bytes` are cached
+    in neither tier.
+    """
+
+    def __init__(self,
+                 namespace: str,
+                 *,
+                 max_bytes: int,
+                 max_item_bytes: int | None = None,
+                 alias: str | None = "default",
+                 timeout: int | None = None) -> None:
+        """Create the cache.
+
+        Args:
+            namespace (str): The prefix of the keys in the shared cache.
+            max_bytes (int): The maximum size of the values of the in-process cache.
+            max_item_bytes (int | None): The maximum size of a value. Defaults to `max_bytes`.
+            alias (str | None): The alias of the shared cache in the `CACHES` setting, None to only cache in process.
+            timeout (int | None): The duration in seconds the values are kept in the shared cache,
+                None for the default timeout of the cache.
+        """
+        self.namespace   : str = namespace
+        self.local       : LRUCache = LRUCache(max_bytes, max_item_bytes)
+        self.alias       : str | None = alias
+        self.timeout     : int | None = timeout
+        self.shared_hits : int = 0
+    # End def __init__
+
+    @property
+    def max_item_bytes(self) -> int:
+        return self.local.max_item_bytes
+    # End def max_item_bytes
+
+    @property
+    def shared(self):
+        """The shared Django cache, None if the values are only cached in process."""
+        return caches[self.alias] if self.alias is not None else None
+    # End def shared
+
+    def get(self, key: str) -> bytes | None:
+        """Get a value from the in-process cache, or from the shared cache, None if it is cached in neither."""
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+        value = self.shared.get(self.__shared_key(key))
+        if value is not None:
+            self.shared_hits += 1
+            self.local.set(key, value)
+        return value
+    # End def get
+
+    def set(self, key: str, value: bytes) -> None:
+        """Cache a value in both tiers, unless it is larger than `max_item_bytes`."""
+        if not self.local.set(key, value):
+            return
+        if self.shared is not None:
+            timeout = self.timeout if self.timeout is not None else DEFAULT_TIMEOUT
+            self.shared.set(self.__shared_key(key), value, timeout=timeout)
+    # End def set
+
+    def delete_many(self, keys: Iterable[str], *, local_prefix: str | None = None) -> None:
+        """Delete values from both tiers.
+
+        Args:
+            keys (Iterable[str]): The keys of the values.
+            local_prefix (str | None): A prefix of the keys of further values to delete from the in-process cache,
+                the keys of the shared cache cannot be listed.
+        """
+        keys = list(keys)
+        for key in keys:
+            self.local.delete(key)
+        if local_prefix is not None:
+            self.local.delete_prefix(local_prefix)
+        if self.shared is not None and keys:
+            self.shared.delete_many([self.__shared_key(key) for key in keys])
+    # End def delete_many
+
+    def stats(self) -> dict[str, int]:
+        """Get the counters of the cache, for this process.
+
+        The misses of the shared cache are the misses of the in-process cache not hitting the shared cache.
+        """
+        return {
+            "local_hits"   : self.local.hits,
+            "shared_hits"  : self.shared_hits,
+            "misses"       : self.local.misses - self.shared_hits,
+            "local_values" : len(self.local),
+            "local_bytes"  : self.local.size,
+        }
+    # End def stats
+
+    def __shared_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+    # End def __shared_key
+# End class TieredCache
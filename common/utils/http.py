@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Utility module for HTTP related operations.
+"""
+from typing import Iterable
+
+from django.utils.http import parse_etags
+
+
+# ======================================================================================================================
+# Content negotiation
+# ======================================================================================================================
+
+def parse_accept_encoding(header: str | None) -> dict[str, float]:
+    """Parse an `Accept-Encoding` header into the quality value of each content coding.
+
+    Example:
+        >>> parse_accept_encoding("br;q=1.0, gzip;q=0.5, *;q=0")
+        {'br': 1.0, 'gzip': 0.5, '*': 0.0}
+    """
+    codings = {}
+    for item in (header or "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding.lower()] = quality
+    return codings
+# End def parse_accept_encoding
+
+
+def negotiate_encoding(header: str | None, available: Iterable[str]) -> str | None:
+    """Choose the content coding to send a response with.
+
+    Args:
+        header (str | None): The `Accept-Encoding` header of the request.
+        available (Iterable[str]): The codings the response is available in, by order of preference.
+
+    Returns:
+        str | None: The preferred coding among those accepted with the highest quality,
+            or None if the response should be sent as it is.
+    """
+    accepted = parse_accept_encoding(header)
+    default = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = accepted.get(coding, default)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+# End def negotiate_encoding
+
+# ======================================================================================================================
+# Conditional requests
+# ======================================================================================================================
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """Check whether an `If-None-Match` header matches an entity tag, using the weak comparison (RFC 9110)."""
+    if not header:
+        return False
+    tags = parse_etags(header)
+    if tags == ["*"]:
+        return True
+    return etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+# End def etag_matches
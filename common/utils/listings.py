@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Utility module for caching the listing pages of the public site (maps, articles, datasets, themes).
+
+The listing of a page, i.e. its search form and its results, is rendered from its own template and cached,
+while the rest of the page (top bar, footer and its CSRF protected forms) is rendered on each request.
+The cached listings are keyed by view, language and query parameters, and by the generation of the sections
+they display. Each section has a generation in the cache, renewed by the signals of its models once their
+changes are committed (see `invalidate_listings`), so that the listings of the previous generation are
+never read again, and expire.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+# Alias of the cache of the listings in the `CACHES` setting
+LISTING_CACHE_ALIAS = getattr(settings, "LISTING_CACHE_ALIAS", "default")
+# Duration in seconds the listings are cached for, bounding the number of cached searches
+LISTING_CACHE_TIMEOUT = getattr(settings, "LISTING_CACHE_TIMEOUT", 60 * 60)
+
+# The sections of the site whose listings are cached
+MAPS = "maps"
+ARTICLES = "articles"
+DATASETS = "datasets"
+THEMES = "themes"
+ORGANIZATIONS = "organizations"
+
+# ======================================================================================================================
+# Generations
+# ======================================================================================================================
+
+def listing_generations(sections: Iterable[str]) -> str:
+    """Get the current generations of sections, as a single string.
+
+    A section without generation, e.g. evicted from the cache, is given a new one.
+    """
+    cache = caches[LISTING_CACHE_ALIAS]
+    sections = sorted(sections)
+    keys = [f"listing:generation:{section}" for section in sections]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            generations[key] = cache.get_or_set(key, time.time_ns(), timeout=None)
+    return "-".join(str(generations[key]) for key in keys)
+# End def listing_generations
+
+
+def invalidate_listings(*sections: str) -> None:
+    """Renew the generations of sections once the current transaction is committed, so that their cached
+    listings are no longer read."""
+    def renew():
+        caches[LISTING_CACHE_ALIAS].set_many(
+            {f"listing:generation:{section}": time.time_ns() for section in sections}, timeout=None
+        )
+    transaction.on_commit(renew)
+# End def invalidate_listings
+
+# ======================================================================================================================
+# Views
+# ======================================================================================================================
+
+def listing_cache_key(view: str, sections: Iterable[str], request: HttpRequest, params: Iterable[str]) -> str:
+    """Get the key of the listing of a view for a request.
+
+    Args:
+        view (str): The name of the view.
+        sections (Iterable[str]): The sections displayed by the view.
+        request (HttpRequest): The request.
+        params (Iterable[str]): The query parameters the listing depends on, the others being ignored.
+    """
+    query = "&".join(f"{param}={value}" for param in sorted(params) for value in request.GET.getlist(param))
+    digest = hashlib.sha256(query.encode("utf-8")).hexdigest()
+    return f"listing:{view}:{listing_generations(sections)}:{get_language()}:{digest}"
+# End def listing_cache_key
+
+
+class CachedListingMixin:
+    """Mixin of the list views caching their listing, see the module documentation.
+
+    The listing is rendered from `listing_template_name` with the context of the view, and given to the template
+    of the view as `listing`. Once cached, the view neither queries its objects nor builds its context.
+    """
+    # Template of the listing, i.e. the search form and the results of the page
+    listing_template_name : str = None
+    # Sections displayed by the listing, invalidating it when they change
+    listing_sections : tuple[str, ...] = ()
+    # Query parameters the listing depends on
+    listing_params : tuple[str, ...] = ("search", "page")
+
+    def get(self, request, *args, **kwargs):
+        cache = caches[LISTING_CACHE_ALIAS]
+        self.listing_key = listing_cache_key(type(self).__name__, self.listing_sections, request, self.listing_params)
+        listing = cache.get(self.listing_key)
+        if listing is not None:
+            self.object_list = []
+            return self.render_to_response({"view": self, "listing": mark_safe(listing)})
+        return super().get(request, *args, **kwargs)
+    # End def get
+
+    def render_to_response(self, context, **response_kwargs):
+        # Render and cache the listing, unless it was read from the cache
+        if "listing" not in context:
+            listing = render_to_string(self.listing_template_name, context, self.request)
+            caches[LISTING_CACHE_ALIAS].set(self.listing_key, listing, timeout=LISTING_CACHE_TIMEOUT)
+            context["listing"] = mark_safe(listing)
+        return super().render_to_response(context, **response_kwargs)
+    # End def render_to_response
+# End class CachedListingMixin
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Utility module for the PostgreSQL full-text search.
+
+The searchable models maintain a `search_vector` column, indexed with a GIN index, holding their document
+in each of the text search configurations of `SEARCH_CONFIGS`, one per language of the site, so that a
+search matches the stems of the language it is made in. The documents are built by `search_vector` and
+updated by the signals of the models once saved, see their `update_search_vectors` class methods.
+The searches are made by `search_queryset`, which ranks the matching objects.
+"""
+from __future__ import annotations
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import Expression, F, Func, Model, OuterRef, QuerySet, Subquery, Value
+from django.db.models import TextField
+from django.utils.translation import get_language
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+# Text search configurations of the languages of the site (see the `LANGUAGES` setting)
+SEARCH_CONFIGS = getattr(settings, "SEARCH_CONFIGS", {"fr": "french", "en": "english"})
+
+# ======================================================================================================================
+# Documents
+# ======================================================================================================================
+
+def search_config(language: str | None = None) -> str:
+    """Get the text search configuration of a language, the active one by default."""
+    language = (language or get_language() or settings.LANGUAGE_CODE).split("-")[0]
+    default = SEARCH_CONFIGS.get(settings.LANGUAGE_CODE.split("-")[0], "simple")
+    return SEARCH_CONFIGS.get(language, default)
+# End def search_config
+
+
+def search_vector(*fields: tuple[str | Expression, str]) -> SearchVector:
+    """Build the document of the objects of a model, in each configuration of `SEARCH_CONFIGS`.
+
+    Args:
+        *fields (tuple[str | Expression, str]): The fields (or expressions) of the document, with their weight
+            ('A' being the heaviest, 'D' the lightest).
+    """
+    vector = None
+    for field, weight in fields:
+        for config in SEARCH_CONFIGS.values():
+            part = SearchVector(field, config=config, weight=weight)
+            vector = part if vector is None else vector + part
+    return vector
+# End def search_vector
+
+
+def strip_html(field: str) -> Func:
+    """Get an expression of the text of an HTML field, without its tags."""
+    return Func(F(field), Value("<[^>]+>"), Value(" "), Value("g"), function="regexp_replace",
+                output_field=TextField())
+# End def strip_html
+
+
+def related_text(through: QuerySet, owner: str, text: str | Expression) -> Subquery:
+    """Get an expression of the text of the objects related to an object, e.g. the names of its authors.
+
+    Args:
+        through (QuerySet): The relations, e.g. the objects of the intermediate model of a many-to-many field.
+        owner (str): The name of the field of the relations referencing the object.
+        text (str | Expression): The text of a related object.
+    """
+    return Subquery(
+        through.filter(**{owner: OuterRef("pk")})
+        .values(owner)
+        .annotate(text=StringAgg(text, delimiter=" ", output_field=TextField()))
+        .values("text")[:1],
+        output_field=TextField()
+    )
+# End def related_text
+
+
+def changed_objects(searched_model: type[Model],
+                    field: str,
+                    instance: Model,
+                    action: str = "post_save",
+                    reverse: bool = False,
+                    pk_set: set | None = None,
+                    **kwargs) -> QuerySet | None:
+    """Get the objects whose search documents must be updated once an object is saved, or once a many-to-many
+    relation of their documents changes (see the `post_save` and `m2m_changed` signals).
+
+    The objects removed by clearing the relation from its reverse side are not part of `post_clear`,
+    they are recorded on the instance on `pre_clear`.
+
+    Args:
+        searched_model (type[Model]): The model of the objects, holding the relation.
+        field (str): The name of the many-to-many field of the relation.
+        instance (Model): The object sending the signal.
+        action (str): The action of the `m2m_changed` signal, `post_save` for the `post_save` signal.
+        reverse (bool): Whether the relation was changed from its reverse side.
+        pk_set (set | None): The primary keys of the objects added or removed.
+
+    Returns:
+        QuerySet | None: The objects, or None if there is nothing to update yet.
+    """
+    cleared = f"_{searched_model._meta.model_name}_{field}_cleared"
+    if not reverse:
+        return searched_model.objects.filter(pk=instance.pk) if action.startswith("post") else None
+    if action == "pre_clear":
+        pks = searched_model.objects.filter(**{field: instance}).values_list("pk", flat=True)
+        setattr(instance, cleared, list(pks))
+        return None
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop(cleared, None)
+    elif not action.startswith("post"):
+        return None
+    return searched_model.objects.filter(pk__in=pk_set or ())
+# End def changed_objects
+
+# ======================================================================================================================
+# Searches
+# ======================================================================================================================
+
+def search_query(search: str, language: str | None = None) -> SearchQuery:
+    """Get the full-text query of a search, in the configuration of a language (the active one by default).
+
+    The search is parsed as by web search engines: quoted phrases, `or` and `-` to exclude words.
+    """
+    return SearchQuery(search, config=search_config(language), search_type="websearch")
+# End def search_query
+
+
+def search_queryset(queryset: QuerySet, search: str, *, language: str | None = None) -> QuerySet:
+    """Filter the objects matching a search, annotated with their `rank` and ordered by it, then by their
+    previous ordering.
+
+    The objects must have a `search_vector` field, see `search_vector`.
+    """
+    query = search_query(search, language)
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return (queryset
+            .filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", *ordering))
+# End def search_queryset
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `common/utils/cache.py` file.
+"""
+from unittest import TestCase
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from common.utils.cache import LRUCache, TieredCache
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-common-cache"},
+}
+
+
+class TestLRUCache(TestCase):
+    def test_set_shouldEvictLeastRecentlyUsed_givenFullCache(self):
+        cache = LRUCache(max_bytes=6)
+        cache.set("a", b"aa")
+        cache.set("b", b"bb")
+        cache.get("a")
+        cache.set("c", b"ccc")
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.size, 5)
+    # End def test_set_shouldEvictLeastRecentlyUsed_givenFullCache
+
+    def test_set_shouldNotCache_givenLargeValue(self):
+        cache = LRUCache(max_bytes=10, max_item_bytes=2)
+        self.assertFalse(cache.set("a", b"aaa"))
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.size, 0)
+    # End def test_set_shouldNotCache_givenLargeValue
+
+    def test_get_shouldCountHitsAndMisses(self):
+        cache = LRUCache(max_bytes=10)
+        cache.set("a", b"a")
+        cache.get("a")
+        cache.get("b")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+    # End def test_get_shouldCountHitsAndMisses
+
+    def test_deletePrefix_shouldDeleteMatchingKeys(self):
+        cache = LRUCache(max_bytes=10)
+        cache.set("1:a", b"a")
+        cache.set("1:b", b"b")
+        cache.set("10:a", b"a")
+        self.assertEqual(cache.delete_prefix("1:"), 2)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, 1)
+    # End def test_deletePrefix_shouldDeleteMatchingKeys
+# End class TestLRUCache
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestTieredCache(SimpleTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.cache = TieredCache("test", max_bytes=10)
+
+    def test_get_shouldFillLocalCache_givenSharedHit(self):
+        self.cache.set("a", b"a")
+        other = TieredCache("test", max_bytes=10)
+        self.assertEqual(other.get("a"), b"a")
+        self.assertEqual(other.get("a"), b"a")
+        self.assertEqual(other.stats()["shared_hits"], 1)
+        self.assertEqual(other.stats()["local_hits"], 1)
+        self.assertIsNone(other.get("b"))
+        self.assertEqual(other.stats()["misses"], 1)
+    # End def test_get_shouldFillLocalCache_givenSharedHit
+
+    def test_deleteMany_shouldDeleteFromBothTiers(self):
+        self.cache.set("1:a", b"a")
+        self.cache.set("1:b", b"b")
+        self.cache.delete_many(["1:a"], local_prefix="1:")
+        self.assertEqual(len(self.cache.local), 0)
+        self.assertIsNone(caches["default"].get("test:1:a"))
+        self.assertEqual(caches["default"].get("test:1:b"), b"b")
+    # End def test_deleteMany_shouldDeleteFromBothTiers
+# End class TestTieredCache
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `common/utils/http.py` file.
+"""
+from unittest import TestCase
+
+from common.utils import http
+
+
+class TestNegotiateEncoding(TestCase):
+    def test_parseAcceptEncoding_shouldReadQualities(self):
+        self.assertEqual(http.parse_accept_encoding("gzip, deflate, br;q=0.9, *;q=0"),
+                         {"gzip": 1.0, "deflate": 1.0, "br": 0.9, "*": 0.0})
+        self.assertEqual(http.parse_accept_encoding(None), {})
+    # End def test_parseAcceptEncoding_shouldReadQualities
+
+    def test_negotiateEncoding_shouldPreferFirstAvailable_givenEqualQualities(self):
+        self.assertEqual(http.negotiate_encoding("gzip, deflate, br", ("br", "gzip")), "br")
+        self.assertEqual(http.negotiate_encoding("gzip, deflate", ("br", "gzip")), "gzip")
+    # End def test_negotiateEncoding_shouldPreferFirstAvailable_givenEqualQualities
+
+    def test_negotiateEncoding_shouldPreferHighestQuality(self):
+        self.assertEqual(http.negotiate_encoding("br;q=0.5, gzip", ("br", "gzip")), "gzip")
+    # End def test_negotiateEncoding_shouldPreferHighestQuality
+
+    def test_negotiateEncoding_shouldReturnNone_givenNoAcceptedCoding(self):
+        self.assertIsNone(http.negotiate_encoding("", ("br", "gzip")))
+        self.assertIsNone(http.negotiate_encoding("br;q=0, gzip;q=0", ("br", "gzip")))
+        self.assertIsNone(http.negotiate_encoding("gzip", ()))
+        self.assertEqual(http.negotiate_encoding("*", ("br", "gzip")), "br")
+    # End def test_negotiateEncoding_shouldReturnNone_givenNoAcceptedCoding
+# End class TestNegotiateEncoding
+
+
+class TestEtagMatches(TestCase):
+    def test_etagMatches_shouldCompareWeakly(self):
+        self.assertTrue(http.etag_matches('"abc", W/"def"', '"def"'))
+        self.assertTrue(http.etag_matches('W/"abc"', '"abc"'))
+        self.assertTrue(http.etag_matches('*', '"abc"'))
+    # End def test_etagMatches_shouldCompareWeakly
+
+    def test_etagMatches_shouldReturnFalse_givenOtherEtags(self):
+        self.assertFalse(http.etag_matches('"abc-br"', '"abc"'))
+        self.assertFalse(http.etag_matches(None, '"abc"'))
+        self.assertFalse(http.etag_matches('', '"abc"'))
+    # End def test_etagMatches_shouldReturnFalse_givenOtherEtags
+# End class TestEtagMatches
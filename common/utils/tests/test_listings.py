@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `common/utils/listings.py` file.
+"""
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+from django.views.generic import ListView
+
+from common.utils import listings
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-common-listings"},
+}
+LOCMEM_TEMPLATES = [{
+    "BACKEND": "django.template.backends.django.DjangoTemplates",
+    "OPTIONS": {"loaders": [("django.template.loaders.locmem.Loader", {
+        "page.html": "<main>{{ listing }}</main>",
+        "listing.html": "{% for item in object_list %}{{ item }};{% endfor %}",
+    })]},
+}]
+
+
+class ItemIndexView(listings.CachedListingMixin, ListView):
+    template_name = "page.html"
+    listing_template_name = "listing.html"
+    listing_sections = (listings.MAPS,)
+    listing_params = ("search",)
+    items = ["a", "b"]
+
+    def get_queryset(self):
+        type(self).queries += 1
+        search = self.request.GET.get("search")
+        return [item for item in self.items if not search or item == search]
+# End class ItemIndexView
+
+
+@override_settings(CACHES=LOCMEM_CACHES, TEMPLATES=LOCMEM_TEMPLATES)
+class TestCachedListingMixin(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        ItemIndexView.queries = 0
+        ItemIndexView.items = ["a", "b"]
+        self.factory = RequestFactory()
+
+    def get(self, path: str = "/") -> str:
+        response = ItemIndexView.as_view()(self.factory.get(path))
+        return response.render().content.decode("utf-8")
+    # End def get
+
+    def test_get_shouldServeCachedListing(self):
+        self.assertEqual(self.get(), "<main>a;b;</main>")
+        ItemIndexView.items = ["c"]
+        self.assertEqual(self.get("/?other=1"), "<main>a;b;</main>")
+        self.assertEqual(ItemIndexView.queries, 1)
+    # End def test_get_shouldServeCachedListing
+
+    def test_get_shouldKeyListingByParams(self):
+        self.assertEqual(self.get("/?search=a"), "<main>a;</main>")
+        self.assertEqual(self.get("/?search=b"), "<main>b;</main>")
+        self.assertEqual(ItemIndexView.queries, 2)
+    # End def test_get_shouldKeyListingByParams
+
+    def test_invalidateListings_shouldRenewListing(self):
+        self.get()
+        ItemIndexView.items = ["c"]
+        with self.captureOnCommitCallbacks(execute=True):
+            listings.invalidate_listings(listings.MAPS)
+        self.assertEqual(self.get(), "<main>c;</main>")
+        with self.captureOnCommitCallbacks(execute=True):
+            listings.invalidate_listings(listings.DATASETS)
+        self.assertEqual(self.get(), "<main>c;</main>")
+        self.assertEqual(ItemIndexView.queries, 2)
+    # End def test_invalidateListings_shouldRenewListing
+# End class TestCachedListingMixin
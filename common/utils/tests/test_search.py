@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `common/utils/search.py` file.
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.postgres.search import CombinedSearchVector, SearchVector
+from django.test import SimpleTestCase, override_settings
+from django.utils import translation
+
+from common.utils import search
+
+
+class TestSearchConfig(SimpleTestCase):
+
+    def test_search_config_shouldUseActiveLanguage_givenNoLanguage(self):
+        with translation.override("fr"):
+            self.assertEqual(search.search_config(), "french")
+        with translation.override("en"):
+            self.assertEqual(search.search_config(), "english")
+    # End def test_search_config_shouldUseActiveLanguage_givenNoLanguage
+
+    def test_search_config_shouldIgnoreRegion_givenRegionalLanguage(self):
+        self.assertEqual(search.search_config("fr-ca"), "french")
+    # End def test_search_config_shouldIgnoreRegion_givenRegionalLanguage
+
+    @override_settings(LANGUAGE_CODE="fr")
+    def test_search_config_shouldUseDefaultLanguage_givenUnknownLanguage(self):
+        self.assertEqual(search.search_config("de"), "french")
+    # End def test_search_config_shouldUseDefaultLanguage_givenUnknownLanguage
+# End class TestSearchConfig
+
+
+class TestSearchVector(SimpleTestCase):
+
+    def test_search_vector_shouldBuildEachFieldInEachConfig_givenFields(self):
+        vector = search.search_vector(("title", "A"), ("body", "C"))
+
+        self.assertIsInstance(vector, CombinedSearchVector)
+        parts = []
+        stack = [vector]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, CombinedSearchVector):
+                stack.extend((node.lhs, node.rhs))
+            else:
+                parts.append(node)
+        self.assertEqual(len(parts), 2 * len(search.SEARCH_CONFIGS))
+        self.assertTrue(all(isinstance(part, SearchVector) for part in parts))
+        configs = {part.config.config.value for part in parts}
+        self.assertEqual(configs, set(search.SEARCH_CONFIGS.values()))
+    # End def test_search_vector_shouldBuildEachFieldInEachConfig_givenFields
+# End class TestSearchVector
+
+
+class TestChangedObjects(SimpleTestCase):
+
+    def setUp(self):
+        self.model = mock.MagicMock()
+        self.model._meta.model_name = "map"
+        self.model.objects.filter.return_value.values_list.return_value = [1, 2]
+        self.instance = SimpleNamespace(pk=7)
+    # End def setUp
+
+    def test_changed_objects_shouldReturnInstance_givenSaveOrForwardChange(self):
+        search.changed_objects(self.model, "authors", self.instance)
+        self.model.objects.filter.assert_called_with(pk=7)
+
+        self.assertIsNone(search.changed_objects(self.model, "authors", self.instance, action="pre_add"))
+        search.changed_objects(self.model, "authors", self.instance, action="post_add", pk_set={3})
+        self.model.objects.filter.assert_called_with(pk=7)
+    # End def test_changed_objects_shouldReturnInstance_givenSaveOrForwardChange
+
+    def test_changed_objects_shouldReturnChangedObjects_givenReverseChange(self):
+        search.changed_objects(self.model, "authors", self.instance, action="post_remove", reverse=True, pk_set={3})
+        self.model.objects.filter.assert_called_with(pk__in={3})
+    # End def test_changed_objects_shouldReturnChangedObjects_givenReverseChange
+
+    def test_changed_objects_shouldReturnClearedObjects_givenReverseClear(self):
+        kwargs = {"reverse": True, "pk_set": None, "model": object}
+        self.assertIsNone(search.changed_objects(self.model, "authors", self.instance, action="pre_clear", **kwargs))
+        self.model.objects.filter.assert_called_with(authors=self.instance)
+
+        search.changed_objects(self.model, "authors", self.instance, action="post_clear", **kwargs)
+        self.model.objects.filter.assert_called_with(pk__in=[1, 2])
+    # End def test_changed_objects_shouldReturnClearedObjects_givenReverseClear
+# End class TestChangedObjects
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2024-11-06 09:41
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# Frozen copy of the search document of the organizations (see `core.models.organization_search_vector`),
+# so that this migration does not depend on the current models.
+SEARCH_CONFIGS = ("french", "english")
+
+
+def search_vector(*fields):
+    vector = None
+    for field, weight in fields:
+        for config in SEARCH_CONFIGS:
+            part = SearchVector(field, config=config, weight=weight)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+def populate_search_vectors(apps, schema_editor):
+    Organization = apps.get_model('core', 'Organization')
+    Organization.objects.update(search_vector=search_vector(
+        ("name", "A"),
+        ("type", "B"),
+        ("description", "C"),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_organization_name_alter_organization_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='The document of the organization for the full-text search, maintained on save.', null=True, verbose_name='Search vector'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='organization_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -5,13 +5,21 @@ Models for the core application.
 from pathlib import Path
 from uuid import uuid4
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models.signals import pre_save
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.template.defaultfilters import slugify
 from django.utils.translation import gettext_lazy as _
 
+from common.utils.listings import ARTICLES, MAPS, ORGANIZATIONS, invalidate_listings
+from common.utils.search import search_vector
+
 
 # ======================================================================================================================
 # Person (Author, Contributor, etc.)
@@ -201,6 +209,30 @@ def generate_person_slug(sender, instance, **kwargs):
         instance.slug = slugify(f"{instance.firstname} {instance.lastname} {instance.id}")
 # End def generate_person_slug
 
+@receiver([post_save, post_delete], sender=Person)
+def invalidate_person_listings(sender, **kwargs):
+    """Invalidate the cached listings displaying the authors: the maps and the articles."""
+    invalidate_listings(MAPS, ARTICLES)
+# End def invalidate_person_listings
+
+@receiver(post_save, sender=Person)
+def update_person_search_vectors(sender, instance, raw=False, **kwargs):
+    """Update the search documents of the maps and articles of a person, which include the names of their authors."""
+    if raw:
+        return
+    for model in (apps.get_model("interactive_maps", "Map"), apps.get_model("articles", "Article")):
+        model.update_search_vectors(model.objects.filter(authors=instance))
+# End def update_person_search_vectors
+
+def person_search_text(prefix: str = "") -> Concat:
+    """Get an expression of the names of a person, for the search documents of their works.
+
+    Args:
+        prefix (str): The path to the person from the model queried, e.g. `person__`.
+    """
+    return Concat(f"{prefix}firstname", Value(" "), f"{prefix}lastname", Value(" "), f"{prefix}pseudonym")
+# End def person_search_text
+
 
 
 # ======================================================================================================================
@@ -215,6 +247,19 @@ def organization_logo_path(instance, filename):
         return str(Path('images/organizations') / instance.slug / f"logo_{uuid4()}.{extension}")
 # End def organization_logo_path
 
+def organization_search_vector(model) -> SearchVector:
+    """Build the search document of the organizations: their name, type and description.
+
+    Args:
+        model: The `Organization` model.
+    """
+    return search_vector(
+        ("name", "A"),
+        ("type", "B"),
+        ("description", "C"),
+    )
+# End def organization_search_vector
+
 class Organization(models.Model):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -262,6 +307,15 @@ class Organization(models.Model):
     twitter_x = models.URLField(blank=True, null=True)
     website = models.URLField(blank=True, null=True)
 
+    # ----- Search -----
+
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name=_("Search vector"),
+        help_text=_("The document of the organization for the full-text search, maintained on save.")
+    )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Methods
     # ------------------------------------------------------------------------------------------------------------------
@@ -273,8 +327,37 @@ class Organization(models.Model):
     def get_absolute_url(self):
         return f"/organization/{self.slug}"
     # End def get_absolute_url
+
+    @classmethod
+    def update_search_vectors(cls, queryset: models.QuerySet | None = None) -> int:
+        """Update the search documents of organizations, all by default (see `common.utils.search`)."""
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(search_vector=organization_search_vector(cls))
+    # End def update_search_vectors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Meta
+    # ------------------------------------------------------------------------------------------------------------------
+
+    class Meta:
+        indexes = [GinIndex(fields=['search_vector'], name='organization_search_vector_idx')]
+    # End class Meta
 # End class Organization
 
 @receiver(pre_save, sender=Organization)
 def generate_organization_slug(sender, instance, **kwargs):
-    instance.slug = slugify(instance.name)
\ No newline at end of file
+    instance.slug = slugify(instance.name)
+# End def generate_organization_slug
+
+@receiver(post_save, sender=Organization)
+def update_organization_search_vector(sender, instance, raw=False, **kwargs):
+    """Update the search document of an organization once saved."""
+    if not raw:
+        Organization.update_search_vectors(Organization.objects.filter(pk=instance.pk))
+# End def update_organization_search_vector
+
+@receiver([post_save, post_delete], sender=Organization)
+def invalidate_organization_listings(sender, **kwargs):
+    """Invalidate the cached listings displaying the organizations."""
+    invalidate_listings(ORGANIZATIONS)
+# End def invalidate_organization_listings
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Search of the whole site: maps, articles, datasets, themes and organizations.
+
+Each section of the site is searched with the full-text search of its model (see `common.utils.search`),
+and the matches of the sections are merged by rank in a single query (a `UNION ALL` of the indexed
+searches), which is the one paginated. Only the results of the page are then read, with the headlines of
+their title and summary highlighting the words matched, so that the cost of a search does not depend on the
+number of objects matching it.
+"""
+from __future__ import annotations
+
+import html
+from collections import defaultdict
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline
+from django.db.models import CharField, Expression, F, QuerySet, Value
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import SafeString, mark_safe
+from django.utils.translation import gettext_lazy as _
+
+from articles.models import Article
+from common.choices import PublicationStatus
+from common.utils.search import search_config, search_query, search_queryset, strip_html
+from core.models import Organization
+from datasets.models import Dataset
+from interactive_maps.models import Map
+from thematic.models import Theme
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+# Number of results per page of the search
+SEARCH_PAGE_SIZE = getattr(settings, "SEARCH_PAGE_SIZE", 10)
+
+# Markers of the words matched in the headlines, replaced by `<mark>` tags once the headlines are escaped
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+# Options of the headlines of the summaries (see `ts_headline`)
+HEADLINE_OPTIONS = {"min_words": 15, "max_words": 35, "max_fragments": 2, "fragment_delimiter": " … "}
+
+# ======================================================================================================================
+# Sections
+# ======================================================================================================================
+
+class SearchSection:
+    """A section of the site searched, i.e. a model with a `search_vector` field (see `common.utils.search`)."""
+
+    def __init__(self,
+                 kind: str,
+                 label: str,
+                 queryset: Callable[[], QuerySet],
+                 url_name: str,
+                 title: str,
+                 summary: str | Expression,
+                 *,
+                 html_summary: bool = False) -> None:
+        """Create the section.
+
+        Args:
+            kind (str): The identifier of the section, e.g. `map`.
+            label (str): The name of the section displayed with its results.
+            queryset (Callable[[], QuerySet]): Get the objects that can be found, e.g. the published maps.
+            url_name (str): The name of the URL of an object, taking its slug.
+            title (str): The field of the title of an object.
+            summary (str | Expression): The field (or expression) of the text summarizing an object.
+            html_summary (bool): Whether the summary is the text of an HTML field, holding HTML entities.
+        """
+        self.kind         : str = kind
+        self.label        : str = label
+        self.queryset     : Callable[[], QuerySet] = queryset
+        self.url_name     : str = url_name
+        self.title        : str = title
+        self.summary      : str | Expression = summary
+        self.html_summary : bool = html_summary
+    # End def __init__
+# End class SearchSection
+
+
+SEARCH_SECTIONS : tuple[SearchSection, ...] = (
+    SearchSection(
+        "map", _("Map"),
+        lambda: Map.objects.filter(publication_status=PublicationStatus.PUBLISHED),
+        "map-detail", "title", strip_html("introduction"), html_summary=True,
+    ),
+    SearchSection(
+        "article", _("Article"),
+        lambda: Article.objects.filter(status=PublicationStatus.PUBLISHED),
+        "article", "title", strip_html("body"), html_summary=True,
+    ),
+    SearchSection(
+        "dataset", _("Dataset"),
+        lambda: Dataset.objects.filter(public=True),
+        "dataset", "name", Coalesce("short_desc", "description"),
+    ),
+    SearchSection(
+        "theme", _("Theme"),
+        lambda: Theme.objects.all(),
+        "theme", "name", "summary",
+    ),
+    SearchSection(
+        "organization", _("Organization"),
+        lambda: Organization.objects.all(),
+        "organization_detail", "name", "description",
+    ),
+)
+
+# ======================================================================================================================
+# Results
+# ======================================================================================================================
+
+class SearchResult:
+    """A result of the search, with its headlines highlighting the words matched."""
+
+    def __init__(self, section: SearchSection, rank: float, url: str | None, title: SafeString,
+                 summary: SafeString) -> None:
+        self.kind    : str = section.kind
+        self.label   : str = section.label
+        self.rank    : float = rank
+        self.url     : str | None = url
+        self.title   : SafeString = title
+        self.summary : SafeString = summary
+    # End def __init__
+# End class SearchResult
+
+
+def search_results(search: str, *, language: str | None = None) -> QuerySet:
+    """Get the matches of a search in all the sections, merged and ordered by rank.
+
+    The matches are dictionaries of the `kind` of their section, the `key` of their object and their `rank`,
+    see `highlight_results` to get the results of a page of matches.
+    """
+    queries = [
+        search_queryset(section.queryset(), search, language=language)
+        .order_by()
+        .annotate(kind=Value(section.kind, output_field=CharField()), key=F("pk"))
+        .values("kind", "key", "rank")
+        for section in SEARCH_SECTIONS
+    ]
+    return queries[0].union(*queries[1:], all=True).order_by("-rank", "kind", "key")
+# End def search_results
+
+
+def highlight_results(matches: Iterable[dict], search: str, *, language: str | None = None) -> list[SearchResult]:
+    """Get the results of matches of a search, e.g. a page of `search_results`, in the same order.
+
+    The objects matched are read with a query per section, with the headlines of their title and summary.
+    """
+    # 1. Group the matches by section
+    matches = list(matches)
+    keys = defaultdict(list)
+    for match in matches:
+        keys[match["kind"]].append(match["key"])
+
+    # 2. Read the objects of each section, with their headlines
+    query = search_query(search, language)
+    config = search_config(language)
+    marks = {"start_sel": HIGHLIGHT_START, "stop_sel": HIGHLIGHT_STOP}
+    objects = {}
+    for section in SEARCH_SECTIONS:
+        if section.kind not in keys:
+            continue
+        rows = (section.queryset()
+                .filter(pk__in=keys[section.kind])
+                .annotate(title_headline=SearchHeadline(F(section.title), query, config=config,
+                                                        highlight_all=True, **marks),
+                          summary_headline=SearchHeadline(section.summary, query, config=config,
+                                                          **marks, **HEADLINE_OPTIONS))
+                .values("pk", "slug", "title_headline", "summary_headline"))
+        for row in rows:
+            objects[(section.kind, row["pk"])] = (section, row)
+
+    # 3. Build the results, in the order of the matches
+    results = []
+    for match in matches:
+        if (match["kind"], match["key"]) not in objects:
+            continue  # Deleted since matched
+        section, row = objects[(match["kind"], match["key"])]
+        results.append(SearchResult(
+            section,
+            match["rank"],
+            reverse(section.url_name, args=[row["slug"]]) if row["slug"] else None,
+            highlight(row["title_headline"] or ""),
+            highlight(row["summary_headline"] or "", html_text=section.html_summary),
+        ))
+    return results
+# End def highlight_results
+
+
+def highlight(headline: str, *, html_text: bool = False) -> SafeString:
+    """Escape a headline, marking its words matched with `<mark>` tags.
+
+    Args:
+        headline (str): The headline, its words matched between `HIGHLIGHT_START` and `HIGHLIGHT_STOP`.
+        html_text (bool): Whether the headline is the text of an HTML field, whose HTML entities are decoded.
+    """
+    if html_text:
+        headline = html.unescape(headline)
+    headline = escape(headline).replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+    return mark_safe(headline)
+# End def highlight
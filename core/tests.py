@@ -1,3 +1,29 @@
-from django.test import TestCase
+# -*- coding: utf-8 -*-
+"""
+Tests for the `core` application.
+"""
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from core.search import HIGHLIGHT_START, HIGHLIGHT_STOP, highlight
+
+
+class TestHighlight(SimpleTestCase):
+
+    def test_highlight_shouldMarkMatches_givenHeadline(self):
+        headline = f"Les {HIGHLIGHT_START}forêts{HIGHLIGHT_STOP} du Québec"
+
+        self.assertEqual(highlight(headline), "Les <mark>forêts</mark> du Québec")
+    # End def test_highlight_shouldMarkMatches_givenHeadline
+
+    def test_highlight_shouldEscapeText_givenMarkup(self):
+        headline = f"<script>{HIGHLIGHT_START}alert{HIGHLIGHT_STOP}</script> & co"
+
+        self.assertEqual(highlight(headline), "&lt;script&gt;<mark>alert</mark>&lt;/script&gt; &amp; co")
+    # End def test_highlight_shouldEscapeText_givenMarkup
+
+    def test_highlight_shouldDecodeEntities_givenHtmlText(self):
+        headline = f"{HIGHLIGHT_START}Caf&eacute;{HIGHLIGHT_STOP} &lt;b&gt;"
+
+        self.assertEqual(highlight(headline, html_text=True), "<mark>Café</mark> &lt;b&gt;")
+    # End def test_highlight_shouldDecodeEntities_givenHtmlText
+# End class TestHighlight
@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path('', views.home, name='home'),  # Maps the root URL to the home view in views.py
+    path('recherche/', views.SearchView.as_view(), name='search'),
     path('organizations/', views.organizations_list, name='organizations_list'),
     path('organizations/<slug:slug>/', views.OrganizationDetailView.as_view(), name='organization_detail'),
 ]
\ No newline at end of file
@@ -3,9 +3,11 @@
 Views for the `core` application.
 """
 from django.shortcuts import render
-from django.views.generic import DetailView
+from django.views.generic import DetailView, ListView
 
+from common.utils.listings import ARTICLES, DATASETS, MAPS, ORGANIZATIONS, THEMES, CachedListingMixin
 from core.models import Organization
+from core.search import SEARCH_PAGE_SIZE, highlight_results, search_results
 
 
 # ======================================================================================================================
@@ -15,6 +17,36 @@ from core.models import Organization
 def home(request):
     return render(request, 'core/home.html')
 
+# ======================================================================================================================
+# Vue de la recherche sur l'ensemble du site
+# ======================================================================================================================
+
+class SearchView(CachedListingMixin, ListView):
+    """Search of the whole site: maps, articles, datasets, themes and organizations, ranked together."""
+    template_name = 'core/search.html'
+    listing_template_name = 'core/search_listing.html'
+    listing_sections = (MAPS, ARTICLES, DATASETS, THEMES, ORGANIZATIONS)
+    paginate_by = SEARCH_PAGE_SIZE
+
+    def get_search(self) -> str:
+        return self.request.GET.get('search', '').strip()
+    # End def get_search
+
+    def get_queryset(self):
+        search = self.get_search()
+        return search_results(search) if search else []
+    # End def get_queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        search = self.get_search()
+        context['search'] = search or None
+        # Only the matches of the page are read and highlighted
+        context['results'] = highlight_results(context['object_list'], search) if search else []
+        return context
+    # End def get_context_data
+# End class SearchView
+
 # ======================================================================================================================
 # Vues des organisations ayant participé à la cartographie
 # ======================================================================================================================
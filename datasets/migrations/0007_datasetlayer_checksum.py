@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2024-10-22 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0006_alter_datasetcategory_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetlayer',
+            name='checksum',
+            field=models.CharField(blank=True, default=None, help_text='Checksum of the features of the layer, updated each time the features are generated.', max_length=64, null=True, verbose_name='Checksum'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2024-10-29 09:41
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0007_datasetlayer_checksum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetlayer',
+            name='vertex_count',
+            field=models.BigIntegerField(blank=True, default=None, help_text='Number of vertices of the layer, updated each time the features are generated.', null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Vertex count'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.6 on 2024-11-05 10:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, TextField
+
+# Frozen copy of the search document of the datasets (see `datasets.models.dataset_search_vector`),
+# so that this migration does not depend on the current models.
+SEARCH_CONFIGS = ("french", "english")
+
+
+def search_vector(*fields):
+    vector = None
+    for field, weight in fields:
+        for config in SEARCH_CONFIGS:
+            part = SearchVector(field, config=config, weight=weight)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+def related_text(through, owner, text):
+    return Subquery(
+        through.filter(**{owner: OuterRef("pk")})
+        .values(owner)
+        .annotate(text=StringAgg(text, delimiter=" ", output_field=TextField()))
+        .values("text")[:1],
+        output_field=TextField()
+    )
+
+
+def populate_search_vectors(apps, schema_editor):
+    Dataset = apps.get_model('datasets', 'Dataset')
+    Dataset.objects.update(search_vector=search_vector(
+        ("name", "A"),
+        (related_text(Dataset.categories.through.objects.all(), "dataset", "datasetcategory__name"), "B"),
+        ("short_desc", "B"),
+        ("description", "C"),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0008_datasetlayer_vertex_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='The document of the dataset for the full-text search, maintained on save.', null=True, verbose_name='Search vector'),
+        ),
+        migrations.AddIndex(
+            model_name='dataset',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='dataset_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -14,15 +14,19 @@ from time import time
 import django.contrib.gis.db.models as gis_models
 from django.contrib.gis.gdal import DataSource
 from django.contrib.gis.geos import Polygon
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from django.db import models
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.template.defaultfilters import slugify
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from common.utils.listings import DATASETS, invalidate_listings
+from common.utils.search import changed_objects, related_text, search_vector
 from common.utils.tasks import TaskStatus
 from datasets import tasks
 from datasets.validators import validate_dataset_version_file
@@ -288,6 +292,24 @@ class DatasetLayer(models.Model):
         help_text=_("Type of the geometries in the layer.")
     )
 
+    vertex_count = models.BigIntegerField(
+        blank=True,
+        null=True,
+        default=None,
+        verbose_name=_("Vertex count"),
+        help_text=_("Number of vertices of the layer, updated each time the features are generated."),
+        validators=[MinValueValidator(0)]
+    )
+
+    checksum = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        default=None,
+        verbose_name=_("Checksum"),
+        help_text=_("Checksum of the features of the layer, updated each time the features are generated.")
+    )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Methods
     # ------------------------------------------------------------------------------------------------------------------
@@ -600,6 +622,19 @@ class DatasetTechnicalInformation(models.Model):
 # Dataset Model
 # ======================================================================================================================
 
+def dataset_search_vector(model) -> SearchVector:
+    """Build the search document of the datasets: their name, categories and descriptions.
+
+    Args:
+        model: The `Dataset` model.
+    """
+    return search_vector(
+        ("name", "A"),
+        (related_text(model.categories.through.objects.all(), "dataset", "datasetcategory__name"), "B"),
+        ("short_desc", "B"),
+        ("description", "C"),
+    )
+# End def dataset_search_vector
 
 class Dataset(models.Model):
     """A dataset is a file containing geographic data.
@@ -696,6 +731,15 @@ class Dataset(models.Model):
         help_text=_("Restrictions on the usage of the dataset (optional).")
     )
 
+    # ----- Search -----
+
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name=_("Search vector"),
+        help_text=_("The document of the dataset for the full-text search, maintained on save.")
+    )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Methods
     # ------------------------------------------------------------------------------------------------------------------
@@ -723,6 +767,13 @@ class Dataset(models.Model):
         return f"/dataset/{self.slug}"
     # End def get_absolute_url
 
+    @classmethod
+    def update_search_vectors(cls, queryset: models.QuerySet | None = None) -> int:
+        """Update the search documents of datasets, all by default (see `common.utils.search`)."""
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(search_vector=dataset_search_vector(cls))
+    # End def update_search_vectors
+
     # ------------------------------------------------------------------------------------------------------------------
     # Meta
     # ------------------------------------------------------------------------------------------------------------------
@@ -731,6 +782,7 @@ class Dataset(models.Model):
         verbose_name = "Jeu de données"
         verbose_name_plural = "Jeux de données"
         ordering = ['name']
+        indexes = [GinIndex(fields=['search_vector'], name='dataset_search_vector_idx')]
     # End class Meta
 # End class Dataset
 
@@ -750,3 +802,26 @@ def generate_dataset_slug(sender, instance, **kwargs):
     """Generate the slug for the resource"""
     instance.slug = slugify(instance.name)
 # End def generate_dataset_slug
+
+@receiver([post_save, post_delete], sender=Dataset)
+@receiver([post_save, post_delete], sender=DatasetCategory)
+@receiver(m2m_changed, sender=Dataset.categories.through)
+def invalidate_dataset_listings(sender, **kwargs):
+    """Invalidate the cached listings of the datasets once a dataset, its categories or a category change."""
+    invalidate_listings(DATASETS)
+# End def invalidate_dataset_listings
+
+@receiver(post_save, sender=Dataset)
+@receiver(post_save, sender=DatasetCategory)
+@receiver(m2m_changed, sender=Dataset.categories.through)
+def update_dataset_search_vector(sender, instance, raw=False, **kwargs):
+    """Update the search documents of the datasets once a dataset, its categories or a category change."""
+    if raw:
+        return
+    if sender is DatasetCategory:
+        datasets = Dataset.objects.filter(categories=instance)
+    else:
+        datasets = changed_objects(Dataset, "categories", instance, **kwargs)
+    if datasets is not None:
+        Dataset.update_search_vectors(datasets)
+# End def update_dataset_search_vector
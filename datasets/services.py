@@ -4,6 +4,8 @@ Service module for the `datasets` application.
 It contains the business logic for the application needed to process the datasets.
 """
 import datetime
+import hashlib
+import json
 import logging
 import os
 import shutil
@@ -29,8 +31,12 @@ logger = logging.getLogger(__name__)
 # ======================================================================================================================
 
 # noinspection PyPep8Naming
-def generate_features(dataset_version_id: int) -> None:
-    """Process the dataset into a geojson layer."""
+def generate_features(dataset_version_id: int) -> list[int]:
+    """Process the dataset into a geojson layer.
+
+    Returns:
+        list[int]: The ids of the dataset layers whose features changed.
+    """
 
     # Get the required models. This is done inside the function to avoid circular imports
     DatasetLayer   = apps.get_model('datasets.DatasetLayer')
@@ -39,6 +45,7 @@ def generate_features(dataset_version_id: int) -> None:
 
     # 1. Get the dataset version
     dataset_version = DatasetVersion.objects.get(id=dataset_version_id)
+    changed_layer_ids = []
 
     with zipfile.ZipFile(dataset_version.file.path) as zip_file, tempfile.TemporaryDirectory() as temp_dir:
         # 2. Extract the contents of the zip file
@@ -65,7 +72,10 @@ def generate_features(dataset_version_id: int) -> None:
                 # 4.3. Clean the features of the layer
                 dataset_layer.features.all().delete()
 
-                # 4.3 Iterate over all features in the layer and save them to the database
+                # 4.3 Iterate over all features in the layer and save them to the database.
+                # A checksum of the features is computed along the way to identify the data of the layer.
+                checksum = hashlib.sha256()
+                vertex_count = 0
                 for feature in layer:
                     # Enforce the encoding of the feature according to the dataset
                     # This is necessary because the encoding of the shapefile is not always correct
@@ -95,6 +105,20 @@ def generate_features(dataset_version_id: int) -> None:
                         geometry=geometry,
                         fields=fields
                     ).save()
+                    checksum.update(bytes(geometry.ewkb))
+                    checksum.update(json.dumps(fields, sort_keys=True, default=str).encode('utf-8'))
+                    vertex_count += geometry.num_coords
+
+                # 4.4. Save the checksum and the statistics of the layer.
+                # Use the `update` method to not trigger the `save` method nor the signals.
+                DatasetLayer.objects.filter(id=dataset_layer.id).update(
+                    checksum=checksum.hexdigest(),
+                    vertex_count=vertex_count,
+                )
+                if dataset_layer.checksum != checksum.hexdigest():
+                    changed_layer_ids.append(dataset_layer.id)
+
+    return changed_layer_ids
 # End def generate_features
 
 
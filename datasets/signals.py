@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Signals of the `datasets` application.
+"""
+from django.dispatch import Signal
+
+# ======================================================================================================================
+# Signals
+# ======================================================================================================================
+
+# Sent once the features of a dataset version have been successfully generated.
+# Arguments:
+#   - dataset_version_id (int): The id of the dataset version.
+#   - dataset_layer_ids (list[int]): The ids of the dataset layers whose features changed.
+features_generated = Signal()
@@ -7,6 +7,7 @@ from django.apps import apps
 
 from common.utils.tasks import TaskStatus
 from datasets.services import generate_features
+from datasets.signals import features_generated
 
 # ======================================================================================================================
 # Tasks
@@ -36,7 +37,7 @@ def generate_features_task(self, dataset_version_id: int) -> None:
     task_id = self.request.id
     task_status = TaskStatus.FAILURE
     try:
-        generate_features(dataset_version_id)
+        changed_layer_ids = generate_features(dataset_version_id)
     except Exception:
         # 4. Set the task status to 'FAILURE'
         # The task_id field is not cleared to allow tracking the task in the admin interface.
@@ -52,6 +53,11 @@ def generate_features_task(self, dataset_version_id: int) -> None:
         DatasetVersion.objects.filter(id=dataset_version_id).update(task_status=task_status,
                                                                     task_id=task_id,
                                                                     regenerate=False)
+
+    # 7. Notify the applications depending on the features of the layers, e.g. to refresh the maps using them
+    features_generated.send(sender=DatasetVersion,
+                            dataset_version_id=dataset_version_id,
+                            dataset_layer_ids=changed_layer_ids)
 # End def generate_features_task
 
 
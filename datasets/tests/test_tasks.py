@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the tasks of the `datasets` application.
+"""
+from pathlib import Path
+from unittest import mock
+
+from django.core.files import File
+from django.test import TestCase
+
+from datasets import tasks
+from datasets.models import Dataset, DatasetLayer, DatasetVersion
+from datasets.services import generate_features
+from datasets.signals import features_generated
+
+
+class TestGenerateFeatures(TestCase):
+    def setUp(self):
+        dataset = Dataset.objects.create(name="Test Dataset")
+        path = Path(__file__).parent / "resources" / "Test_shapefile_AO-shp.zip"
+        with open(path, "rb") as file:
+            # Created in bulk to skip the generation of the layers and features from the file
+            self.version, = DatasetVersion.objects.bulk_create([
+                DatasetVersion(dataset=dataset, file=File(file, name=path.name))
+            ])
+        self.layer = DatasetLayer.objects.create(dataset=self.version, name="Test_shapefile_AO", srid=4326)
+    # End def setUp
+
+    def test_generateFeatures_shouldOnlyReturnChangedLayers(self):
+        self.assertEqual(generate_features(self.version.id), [self.layer.id])
+        checksum = DatasetLayer.objects.get(id=self.layer.id).checksum
+        self.assertIsNotNone(checksum)
+
+        # Same features, same checksum
+        self.assertEqual(generate_features(self.version.id), [])
+        self.assertEqual(DatasetLayer.objects.get(id=self.layer.id).checksum, checksum)
+    # End def test_generateFeatures_shouldOnlyReturnChangedLayers
+# End class TestGenerateFeatures
+
+
+class TestGenerateFeaturesTask(TestCase):
+    def setUp(self):
+        dataset = Dataset.objects.create(name="Test Dataset")
+        self.version, = DatasetVersion.objects.bulk_create([DatasetVersion(dataset=dataset)])
+        self.receiver = mock.Mock()
+        features_generated.connect(self.receiver)
+        self.addCleanup(features_generated.disconnect, self.receiver)
+    # End def setUp
+
+    def test_task_shouldSendChangedLayers_givenGeneratedFeatures(self):
+        with mock.patch.object(tasks, "generate_features", return_value=[3, 5]):
+            tasks.generate_features_task(self.version.id)
+        self.receiver.assert_called_once()
+        kwargs = self.receiver.call_args.kwargs
+        self.assertEqual(kwargs["sender"], DatasetVersion)
+        self.assertEqual(kwargs["dataset_version_id"], self.version.id)
+        self.assertEqual(kwargs["dataset_layer_ids"], [3, 5])
+    # End def test_task_shouldSendChangedLayers_givenGeneratedFeatures
+
+    def test_task_shouldNotSend_givenFailure(self):
+        with mock.patch.object(tasks, "generate_features", side_effect=ValueError("Invalid file")):
+            with self.assertRaises(ValueError):
+                tasks.generate_features_task(self.version.id)
+        self.receiver.assert_not_called()
+    # End def test_task_shouldNotSend_givenFailure
+# End class TestGenerateFeaturesTask
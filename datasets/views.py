@@ -2,12 +2,14 @@
 """
 Views for the `datasets` application.
 """
-from django.db.models import Q, QuerySet
+from django.db.models import QuerySet
 from django.http import HttpRequest, HttpResponse
 from django.utils.text import slugify
 from django.utils.translation import gettext as _
 from django.views.generic import DetailView, ListView
 
+from common.utils.listings import DATASETS, CachedListingMixin
+from common.utils.search import search_queryset
 from datasets.models import Dataset, DatasetCategory, DatasetVersion
 
 
@@ -15,10 +17,13 @@ from datasets.models import Dataset, DatasetCategory, DatasetVersion
 # Dataset Main view (search)
 # ======================================================================================================================
 
-class DatasetsIndexView(ListView):
+class DatasetsIndexView(CachedListingMixin, ListView):
 
     model = Dataset
     template_name = 'datasets/dataset_index.html'
+    listing_template_name = 'datasets/dataset_index_listing.html'
+    listing_sections = (DATASETS,)
+    listing_params = ('category', 'search')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -49,11 +54,7 @@ class DatasetsIndexView(ListView):
         # Filter by search query
         search = self.request.GET.get('search')
         if search:
-            # TODO: add search by category
-            datasets = datasets.filter(
-                Q(name__icontains=search) |
-                Q(description__icontains=search)
-            )
+            datasets = search_queryset(datasets, search)
 
         return datasets
 # End def datasets_filter_view
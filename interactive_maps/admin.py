@@ -3,10 +3,11 @@
 Admin for the `interactive_maps` application.
 """
 from django.contrib import admin
-from django.utils.html import format_html
+from django.template.defaultfilters import filesizeformat
+from django.utils.html import format_html, format_html_join
 from django.utils.translation import gettext_lazy as _
 
-from .models import Map, MapRender
+from .models import Map, MapRender, MapRenderProfile
 
 # ======================================================================================================================
 # AttachmentInline
@@ -35,6 +36,62 @@ class AttachmentInline(admin.TabularInline):
         return list(super().get_readonly_fields(request, obj)) + ["slug", "description", "download_url"]
 # End class AttachmentInline
 
+# ======================================================================================================================
+# MapRenderProfileInline
+# ======================================================================================================================
+
+class MapRenderProfileInline(admin.StackedInline):
+    """Inline for the `MapRenderProfile` model, showing the latest renders and their slowest layers."""
+    model = MapRenderProfile
+    extra = 0
+    max_num = MapRenderProfile.MAX_PROFILES
+    classes = ('collapse',)
+    fields = (('created_at', 'duration_display'), ('embed_size_display', 'full_size_display'), 'stages_table',
+              'layers_table')
+    readonly_fields = ('created_at', 'duration_display', 'embed_size_display', 'full_size_display', 'stages_table',
+                       'layers_table')
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def duration_display(self, obj: MapRenderProfile):
+        return f"{obj.duration:.2f} s"
+    duration_display.short_description = _("Duration")
+
+    def embed_size_display(self, obj: MapRenderProfile):
+        return filesizeformat(obj.embed_size) if obj.embed_size is not None else "-"
+    embed_size_display.short_description = _("Embedded HTML Size")
+
+    def full_size_display(self, obj: MapRenderProfile):
+        return filesizeformat(obj.full_size) if obj.full_size is not None else "-"
+    full_size_display.short_description = _("Full HTML Size")
+
+    def stages_table(self, obj: MapRenderProfile):
+        rows = format_html_join(
+            "", "<tr><td>{}</td><td>{}</td></tr>", ((name, f"{duration:.3f} s") for name, duration in obj.stages.items())
+        )
+        return format_html("<table><tr><th>{}</th><th>{}</th></tr>{}</table>", _("Stage"), _("Duration"), rows)
+    stages_table.short_description = _("Stages")
+
+    def layers_table(self, obj: MapRenderProfile):
+        rows = format_html_join("", "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>", (
+            (
+                layer["name"],
+                layer["source"] or "-",
+                f"{layer['duration']:.3f} s",
+                layer["features"] if layer["features"] is not None else "-",
+                filesizeformat(layer["bytes"]) if layer["bytes"] is not None else "-",
+                ", ".join(f"{stage}: {duration:.3f} s" for stage, duration in layer["stages"].items()),
+            )
+            for layer in obj.layers
+        ))
+        return format_html(
+            "<table><tr><th>{}</th><th>{}</th><th>{}</th><th>{}</th><th>{}</th><th>{}</th></tr>{}</table>",
+            _("Layer"), _("Source"), _("Duration"), _("Features"), _("Size"), _("Stages"), rows
+        )
+    layers_table.short_description = _("Layers (slowest first)")
+# End class MapRenderProfileInline
+
 # ======================================================================================================================
 # Admin classes for the MapRender model
 # ======================================================================================================================
@@ -44,7 +101,11 @@ class MapRenderAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'linked_template', 'has_full_html', 'has_embed_html')
     search_fields = ('id', 'name')
 
-    readonly_fields = ('id', 'slug', 'template', 'map')
+    readonly_fields = ('id', 'slug', 'template', 'map', 'fingerprint', 'digest', 'assets', 'encodings', 'degradations')
+
+    inlines = [
+        MapRenderProfileInline,
+    ]
 
     # ------------------------------------------------------------------------------------------------------------------
     # Fieldset
@@ -55,7 +116,12 @@ class MapRenderAdmin(admin.ModelAdmin):
             'classes': ('collapse',),
             'fields': (
                 ('id','slug',),
-                ('template', 'map')
+                ('template', 'map'),
+                'fingerprint',
+                'digest',
+                'assets',
+                'encodings',
+                'degradations',
             ),
         }),
         (_('Description'), {
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2024-10-22 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactive_maps', '0010_alter_map_thumbnail_attributions_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maprender',
+            name='fingerprint',
+            field=models.CharField(blank=True, default=None, help_text='Fingerprint of the template and the data the map was rendered from.', max_length=64, null=True, verbose_name='Fingerprint'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2024-10-25 14:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactive_maps', '0011_maprender_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapRenderProfile',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('duration', models.FloatField(help_text='Total duration of the render, in seconds.', verbose_name='Duration')),
+                ('embed_size', models.PositiveBigIntegerField(default=None, help_text='Size of the embedded HTML of the map, in bytes.', null=True, verbose_name='Embedded HTML Size')),
+                ('full_size', models.PositiveBigIntegerField(default=None, help_text='Size of the full HTML of the map, in bytes.', null=True, verbose_name='Full HTML Size')),
+                ('stages', models.JSONField(default=dict, help_text='Duration of each stage of the render, in seconds.', verbose_name='Stages')),
+                ('layers', models.JSONField(default=list, help_text='Duration, stages, feature count and data size of each layer, the slowest first.', verbose_name='Layers')),
+                ('map_render', models.ForeignKey(help_text='The map render the profile was recorded for.', on_delete=django.db.models.deletion.CASCADE, related_name='profiles', to='interactive_maps.maprender', verbose_name='Map Render')),
+            ],
+            options={
+                'verbose_name': 'Map Render Profile',
+                'verbose_name_plural': 'Map Render Profiles',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2024-10-28 10:12
+
+import interactive_maps.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactive_maps', '0012_maprenderprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayerAsset',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(help_text='SHA-256 digest of the content of the asset.', max_length=64, unique=True, verbose_name='Digest')),
+                ('file', models.FileField(help_text='The GeoJSON data of the layer.', max_length=255, upload_to=interactive_maps.models.layer_asset_path, verbose_name='File')),
+                ('size', models.PositiveBigIntegerField(help_text='Size of the asset, in bytes.', verbose_name='Size')),
+                ('used_at', models.DateTimeField(auto_now=True, help_text='The last time a render used the asset.', verbose_name='Used at')),
+            ],
+            options={
+                'verbose_name': 'Layer Asset',
+                'verbose_name_plural': 'Layer Assets',
+            },
+        ),
+        migrations.AddField(
+            model_name='maprender',
+            name='assets',
+            field=models.ManyToManyField(blank=True, help_text='The data of the layers of the map, shared with the other renders displaying the same data.', related_name='renders', to='interactive_maps.layerasset', verbose_name='Assets'),
+        ),
+    ]
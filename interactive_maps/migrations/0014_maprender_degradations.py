@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2024-10-29 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactive_maps', '0013_layerasset_maprender_assets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maprender',
+            name='degradations',
+            field=models.JSONField(blank=True, default=list, help_text='The layers degraded to meet the render budget of the template, with the level of degradation applied to each of them.', verbose_name='Degradations'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2024-10-29 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactive_maps', '0014_maprender_degradations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maprender',
+            name='encodings',
+            field=models.JSONField(blank=True, default=list, help_text='The content codings the documents of the map are precompressed with, by order of preference.', verbose_name='Encodings'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2024-10-29 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactive_maps', '0015_maprender_encodings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maprender',
+            name='digest',
+            field=models.CharField(blank=True, default=None, help_text='SHA-256 digest of the full HTML of the map, identifying its version in the URLs it is served at.', max_length=64, null=True, verbose_name='Digest'),
+        ),
+    ]
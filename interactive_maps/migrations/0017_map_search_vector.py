@@ -0,0 +1,71 @@
+# Generated by Django 5.0.6 on 2024-11-05 10:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, Func, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Concat
+
+# Frozen copy of the search document of the maps (see `interactive_maps.models.map_search_vector`),
+# so that this migration does not depend on the current models.
+SEARCH_CONFIGS = ("french", "english")
+
+
+def strip_html(field):
+    return Func(F(field), Value("<[^>]+>"), Value(" "), Value("g"), function="regexp_replace",
+                output_field=TextField())
+
+
+def search_vector(*fields):
+    vector = None
+    for field, weight in fields:
+        for config in SEARCH_CONFIGS:
+            part = SearchVector(field, config=config, weight=weight)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+def related_text(through, owner, text):
+    return Subquery(
+        through.filter(**{owner: OuterRef("pk")})
+        .values(owner)
+        .annotate(text=StringAgg(text, delimiter=" ", output_field=TextField()))
+        .values("text")[:1],
+        output_field=TextField()
+    )
+
+
+def person_search_text(prefix):
+    return Concat(f"{prefix}firstname", Value(" "), f"{prefix}lastname", Value(" "), f"{prefix}pseudonym")
+
+
+def populate_search_vectors(apps, schema_editor):
+    Map = apps.get_model('interactive_maps', 'Map')
+    Map.objects.update(search_vector=search_vector(
+        ("title", "A"),
+        (related_text(Map.authors.through.objects.all(), "map", person_search_text("person__")), "A"),
+        (strip_html("introduction"), "B"),
+        (strip_html("body"), "C"),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interactive_maps', '0016_maprender_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='map',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='The document of the map for the full-text search, maintained on save.', null=True, verbose_name='Search vector'),
+        ),
+        migrations.AddIndex(
+            model_name='map',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='map_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -2,21 +2,169 @@
 """
 Models for the `interactive_maps` application.
 """
+import hashlib
+import os
+from datetime import timedelta
+
 from django import urls
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.files.base import ContentFile, File
+from django.db.models.fields.files import FieldFile
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.template.defaultfilters import slugify
 from django.utils.translation import gettext_lazy as _
 from tinymce import models as tinymce_models
 
 from common.choices import PublicationStatus, License
-from core.models import Organization
+from common.utils.cache import TieredCache
+from common.utils.listings import MAPS, invalidate_listings
+from common.utils.search import changed_objects, related_text, search_vector, strip_html
+from core.models import Organization, person_search_text
 from thematic.models import Theme
 
 
+# ======================================================================================================================
+# Layer Asset
+# ======================================================================================================================
+
+def layer_asset_path(instance, filename):
+    # The assets are named after the digest of their content, and spread over sub-directories
+    return f"maps/assets/{instance.digest[:2]}/{instance.digest}.geojson"
+# End def layer_asset_path
+
+class LayerAsset(models.Model):
+    """This class represents the data of a layer, shared by all the map renders displaying the same data.
+
+    The assets are content-addressed: they are stored under the digest of their content, so that the maps
+    displaying the same data reference the same file, cached once by the browsers.
+    """
+
+    # Delay before an asset no longer used by any render is deleted, so that a render in progress
+    # can still reference it
+    PRUNE_DELAY = timedelta(hours=1)
+    # Size of the chunks the files are hashed by, in bytes
+    CHUNK_SIZE = 1024 * 1024
+
+    id = models.AutoField(
+        primary_key=True,
+        verbose_name=_("ID"),
+    )
+
+    digest = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name=_("Digest"),
+        help_text=_("SHA-256 digest of the content of the asset.")
+    )
+
+    file = models.FileField(
+        name="file",
+        verbose_name=_("File"),
+        help_text=_("The GeoJSON data of the layer."),
+        upload_to=layer_asset_path,
+        max_length=255,
+    )
+
+    size = models.PositiveBigIntegerField(
+        verbose_name=_("Size"),
+        help_text=_("Size of the asset, in bytes.")
+    )
+
+    used_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name=_("Used at"),
+        help_text=_("The last time a render used the asset.")
+    )
+
+    class Meta:
+        verbose_name = _("Layer Asset")
+        verbose_name_plural = _("Layer Assets")
+    # End class Meta
+
+    def __str__(self):
+        return self.digest
+    # End def __str__
+
+    @classmethod
+    def store(cls, content: bytes) -> "LayerAsset":
+        """Get the asset holding some content, storing it if no asset holds it yet."""
+        return cls._store(hashlib.sha256(content).hexdigest(), len(content), ContentFile(content))
+    # End def store
+
+    @classmethod
+    def store_file(cls, path: str | os.PathLike) -> "LayerAsset":
+        """Get the asset holding the content of a file, storing it if no asset holds it yet.
+
+        The file is hashed and copied by chunks, it is never loaded in memory at once.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(cls.CHUNK_SIZE), b""):
+                digest.update(chunk)
+        with open(path, "rb") as file:
+            return cls._store(digest.hexdigest(), os.path.getsize(path), File(file))
+    # End def store_file
+
+    @classmethod
+    def _store(cls, digest: str, size: int, content: File) -> "LayerAsset":
+        # 1. Reuse the asset holding the same content
+        asset = cls.objects.filter(digest=digest).first()
+        if asset is not None:
+            asset.save(update_fields=['used_at'])
+            return asset
+
+        # 2. Otherwise, store the content. The file may have been left by an asset deleted meanwhile.
+        asset = cls(digest=digest, size=size)
+        name = layer_asset_path(asset, "")
+        if asset.file.storage.exists(name):
+            asset.file.name = name
+        else:
+            asset.file.save(name, content, save=False)
+        try:
+            with transaction.atomic():
+                asset.save()
+        except IntegrityError:
+            # Stored concurrently by another render
+            return cls.objects.get(digest=digest)
+        return asset
+    # End def _store
+
+    @classmethod
+    def prune(cls) -> int:
+        """Delete the assets no longer used by any render, and their files.
+
+        Returns:
+            int: The number of assets deleted.
+        """
+        stale = cls.objects.filter(renders__isnull=True, used_at__lt=timezone.now() - cls.PRUNE_DELAY)
+        count = 0
+        for asset in stale:
+            asset.file.delete(save=False)
+            asset.delete()
+            count += 1
+        return count
+    # End def prune
+# End class LayerAsset
+
 # ======================================================================================================================
 # Rendered Map
 # ======================================================================================================================
 
+# Cache of the documents of the renders, in process and in the shared cache, keyed by render, digest and coding.
+# The documents larger than `MAP_RENDER_CACHE_ITEM_BYTES` are streamed from the storage instead.
+RENDER_CACHE = TieredCache(
+    "map-render",
+    max_bytes=getattr(settings, "MAP_RENDER_CACHE_BYTES", 64 * 1024 * 1024),
+    max_item_bytes=getattr(settings, "MAP_RENDER_CACHE_ITEM_BYTES", 4 * 1024 * 1024),
+    alias=getattr(settings, "MAP_RENDER_CACHE_ALIAS", "default"),
+    timeout=getattr(settings, "MAP_RENDER_CACHE_TIMEOUT", 24 * 60 * 60),
+)
+
 def map_render_embed_path(instance, filename):
     # Get the extension of the file
     extension = filename.split('.')[-1]
@@ -32,7 +180,13 @@ def map_render_full_path(instance, filename):
 # End def map_render_full_path
 
 class MapRender(models.Model):
-    """This class represents a map render."""
+    """This class represents a map render.
+
+    Its documents are also stored precompressed, next to them, with each of the content codings of `encodings`.
+    """
+
+    # Suffixes of the names of the precompressed documents, by content coding
+    ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
 
     # ------------------------------------------------------------------------------------------------------------------
     # ID fields
@@ -98,6 +252,47 @@ class MapRender(models.Model):
         default=None,
     )
 
+    fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        default=None,
+        verbose_name=_("Fingerprint"),
+        help_text=_("Fingerprint of the template and the data the map was rendered from.")
+    )
+
+    assets = models.ManyToManyField(
+        to=LayerAsset,
+        related_name='renders',
+        blank=True,
+        verbose_name=_("Assets"),
+        help_text=_("The data of the layers of the map, shared with the other renders displaying the same data.")
+    )
+
+    digest = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        default=None,
+        verbose_name=_("Digest"),
+        help_text=_("SHA-256 digest of the full HTML of the map, identifying its version in the URLs it is served at.")
+    )
+
+    encodings = models.JSONField(
+        blank=True,
+        default=list,
+        verbose_name=_("Encodings"),
+        help_text=_("The content codings the documents of the map are precompressed with, by order of preference.")
+    )
+
+    degradations = models.JSONField(
+        blank=True,
+        default=list,
+        verbose_name=_("Degradations"),
+        help_text=_("The layers degraded to meet the render budget of the template, with the level of "
+                    "degradation applied to each of them.")
+    )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Meta
     # ------------------------------------------------------------------------------------------------------------------
@@ -133,15 +328,207 @@ class MapRender(models.Model):
         return urls.reverse('map-detail-fullscreen', kwargs={'slug': self.map.slug})
     # End def get_absolute_url
 
+    def get_version_url(self):
+        """Get the URL of the current version of the render, cached for good by the browsers.
+
+        Falls back to the URL of the render if its digest is unknown.
+        """
+        if self.is_linked_to_map() is False:
+            return None
+        if not self.digest:
+            return self.get_absolute_url()
+
+        kwargs = {'slug': self.map.slug, 'digest': self.digest}
+        if self.map.publication_status == PublicationStatus.DRAFT:
+            return urls.reverse('map-draft-detail-fullscreen-version', kwargs=kwargs)
+        return urls.reverse('map-detail-fullscreen-version', kwargs=kwargs)
+    # End def get_version_url
+
     def is_linked_to_map(self):
         return hasattr(self, 'map') and self.map is not None
     # End def is_linked_to_map
+
+    def encoded_name(self, file: FieldFile, encoding: str) -> str:
+        """Get the name of a document of the render precompressed with a content coding."""
+        if encoding not in self.ENCODING_SUFFIXES:
+            raise ValueError(f"Unsupported encoding '{encoding}'")
+        return f"{file.name}{self.ENCODING_SUFFIXES[encoding]}"
+    # End def encoded_name
+
+    def save_encoded(self, file: FieldFile, encoding: str, content: File) -> None:
+        """Store a document of the render precompressed with a content coding, next to the document.
+
+        The document must be saved beforehand. It does not record the encoding, see `encodings`.
+        """
+        name = self.encoded_name(file, encoding)
+        if file.storage.exists(name):
+            file.storage.delete(name)
+        file.storage.save(name, content)
+    # End def save_encoded
+
+    def open_encoded(self, file: FieldFile, encoding: str) -> File:
+        """Open a document of the render precompressed with a content coding.
+
+        Raises:
+            FileNotFoundError: If the document is not stored with this coding.
+        """
+        return file.storage.open(self.encoded_name(file, encoding), "rb")
+    # End def open_encoded
+
+    def cache_key(self, file: FieldFile, encoding: str | None = None) -> str | None:
+        """Get the key of a document of the render in `RENDER_CACHE`, None if the render has no digest yet."""
+        if not self.digest:
+            return None
+        return f"{self.id}:{self.digest}:{file.field.name}:{encoding or 'identity'}"
+    # End def cache_key
+
+    def read_document(self, file: FieldFile, encoding: str | None = None) -> bytes | File:
+        """Read a document of the render, possibly precompressed, from `RENDER_CACHE` if it is cached there.
+
+        Returns:
+            bytes | File: The content of the document, or the document opened if it is too large to be cached.
+
+        Raises:
+            FileNotFoundError: If the document is not stored with this coding.
+        """
+        key = self.cache_key(file, encoding)
+        if key is not None:
+            content = RENDER_CACHE.get(key)
+            if content is not None:
+                return content
+
+        document = self.open_encoded(file, encoding) if encoding is not None else file.open("rb")
+        if key is None or document.size > RENDER_CACHE.max_item_bytes:
+            return document
+        with document:
+            content = document.read()
+        RENDER_CACHE.set(key, content)
+        return content
+    # End def read_document
 # End class MapRender
 
+
+@receiver([post_save, post_delete], sender=MapRender)
+def invalidate_map_render_cache(sender, instance: MapRender, **kwargs):
+    """Drop the cached documents of a render once it is saved or deleted.
+
+    The documents of the previous versions of the render are keyed by their own digest, and are never read again:
+    they are dropped from the cache of this process, and expire from the shared cache.
+    """
+    keys = [
+        instance.cache_key(file, encoding)
+        for file in (instance.embed_html, instance.full_html)
+        for encoding in (None, *MapRender.ENCODING_SUFFIXES)
+    ]
+    RENDER_CACHE.delete_many([key for key in keys if key is not None], local_prefix=f"{instance.id}:")
+# End def invalidate_map_render_cache
+
+
+class MapRenderProfile(models.Model):
+    """This class represents the profile of a run of the render of a map.
+
+    Records the time spent in each stage of the render, and in the generation of each layer,
+    along with the number of features and the size of the data of the layers.
+    """
+
+    # Number of profiles kept per map render, the oldest are deleted
+    MAX_PROFILES = 10
+
+    id = models.AutoField(
+        primary_key=True,
+        verbose_name=_("ID"),
+    )
+
+    map_render = models.ForeignKey(
+        to=MapRender,
+        related_name='profiles',
+        on_delete=models.CASCADE,
+        verbose_name=_("Map Render"),
+        help_text=_("The map render the profile was recorded for.")
+    )
+
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name=_("Created at"),
+    )
+
+    duration = models.FloatField(
+        verbose_name=_("Duration"),
+        help_text=_("Total duration of the render, in seconds.")
+    )
+
+    embed_size = models.PositiveBigIntegerField(
+        null=True,
+        default=None,
+        verbose_name=_("Embedded HTML Size"),
+        help_text=_("Size of the embedded HTML of the map, in bytes.")
+    )
+
+    full_size = models.PositiveBigIntegerField(
+        null=True,
+        default=None,
+        verbose_name=_("Full HTML Size"),
+        help_text=_("Size of the full HTML of the map, in bytes.")
+    )
+
+    stages = models.JSONField(
+        default=dict,
+        verbose_name=_("Stages"),
+        help_text=_("Duration of each stage of the render, in seconds.")
+    )
+
+    layers = models.JSONField(
+        default=list,
+        verbose_name=_("Layers"),
+        help_text=_("Duration, stages, feature count and data size of each layer, the slowest first.")
+    )
+
+    class Meta:
+        verbose_name = _("Map Render Profile")
+        verbose_name_plural = _("Map Render Profiles")
+        ordering = ['-created_at']
+    # End class Meta
+
+    def __str__(self):
+        return f"{self.map_render} ({self.duration:.2f}s)"
+    # End def __str__
+
+    @classmethod
+    def record(cls, map_render: MapRender, profile: dict) -> "MapRenderProfile":
+        """Record the profile of a render, as built by the profiler of the processor."""
+        instance = cls.objects.create(
+            map_render=map_render,
+            duration=profile["duration"],
+            embed_size=profile["sizes"].get("embed_html", None),
+            full_size=profile["sizes"].get("full_html", None),
+            stages=profile["stages"],
+            layers=profile["layers"],
+        )
+        # Only keep the latest profiles
+        stale_ids = cls.objects.filter(map_render=map_render).values_list('id', flat=True)[cls.MAX_PROFILES:]
+        cls.objects.filter(id__in=list(stale_ids)).delete()
+        return instance
+    # End def record
+# End class MapRenderProfile
+
 # ======================================================================================================================
 # Interactive Map
 # ======================================================================================================================
 
+def map_search_vector(model) -> SearchVector:
+    """Build the search document of the maps: their title and authors, introduction and body.
+
+    Args:
+        model: The `Map` model.
+    """
+    return search_vector(
+        ("title", "A"),
+        (related_text(model.authors.through.objects.all(), "map", person_search_text("person__")), "A"),
+        (strip_html("introduction"), "B"),
+        (strip_html("body"), "C"),
+    )
+# End def map_search_vector
+
 def thumbnail_path(instance, filename):
     # Get the extension of the file
     extension = filename.split('.')[-1]
@@ -302,6 +689,17 @@ class Map(models.Model):
         blank=True,
     )
 
+    # ------------------------------------------------------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------------------------------------------------------
+
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name=_("Search vector"),
+        help_text=_("The document of the map for the full-text search, maintained on save.")
+    )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Meta
     # ------------------------------------------------------------------------------------------------------------------
@@ -309,6 +707,7 @@ class Map(models.Model):
         ordering = ['id',]  # Order Thematic maps by 'title' field
         verbose_name = _("Interactive Map")
         verbose_name_plural = _("Interactive Maps")
+        indexes = [GinIndex(fields=['search_vector'], name='map_search_vector_idx')]
     # End class Meta
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -323,6 +722,13 @@ class Map(models.Model):
     # Methods
     # ------------------------------------------------------------------------------------------------------------------
 
+    @classmethod
+    def update_search_vectors(cls, queryset: models.QuerySet | None = None) -> int:
+        """Update the search documents of maps, all by default (see `common.utils.search`)."""
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(search_vector=map_search_vector(cls))
+    # End def update_search_vectors
+
     def clean(self, exclude=None):
         super().clean()
         self.slug = slugify(self.title)
@@ -340,3 +746,22 @@ class Map(models.Model):
         return urls.reverse('map-detail', kwargs={'slug': self.slug})
     # End def get_absolute_url
 # End class Map
+
+
+@receiver([post_save, post_delete], sender=Map)
+@receiver(m2m_changed, sender=Map.authors.through)
+@receiver(m2m_changed, sender=Map.themes.through)
+def invalidate_map_listings(sender, **kwargs):
+    """Invalidate the cached listings of the maps once a map, its authors or its themes change."""
+    invalidate_listings(MAPS)
+# End def invalidate_map_listings
+
+
+@receiver(post_save, sender=Map)
+@receiver(m2m_changed, sender=Map.authors.through)
+def update_map_search_vector(sender, instance, raw=False, **kwargs):
+    """Update the search document of a map once saved, or once its authors change."""
+    maps = None if raw else changed_objects(Map, "authors", instance, **kwargs)
+    if maps is not None:
+        Map.update_search_vectors(maps)
+# End def update_map_search_vector
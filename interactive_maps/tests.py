@@ -1,3 +1,111 @@
-from django.test import TestCase
+# -*- coding: utf-8 -*-
+"""
+Tests for the `interactive_maps` application.
+"""
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from interactive_maps.models import RENDER_CACHE, LayerAsset, MapRender, MapRenderProfile
+
+
+class TestLayerAsset(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.media_root.cleanup)
+
+    def test_store_shouldReuseAsset_givenSameContent(self):
+        asset = LayerAsset.store(b'{"type":"FeatureCollection","features":[]}')
+        same = LayerAsset.store(b'{"type":"FeatureCollection","features":[]}')
+        self.assertEqual(asset.id, same.id)
+        self.assertEqual(LayerAsset.objects.count(), 1)
+        self.assertTrue(asset.file.name.endswith(f"{asset.digest}.geojson"))
+    # End def test_store_shouldReuseAsset_givenSameContent
+
+    def test_store_shouldCreateAsset_givenOtherContent(self):
+        asset = LayerAsset.store(b'{"type":"FeatureCollection","features":[]}')
+        other = LayerAsset.store(b'{"type":"FeatureCollection","features":[{}]}')
+        self.assertNotEqual(asset.digest, other.digest)
+        self.assertEqual(other.size, len(b'{"type":"FeatureCollection","features":[{}]}'))
+    # End def test_store_shouldCreateAsset_givenOtherContent
+# End class TestLayerAsset
+
+
+class TestMapRenderCache(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.TemporaryDirectory()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.media_root.cleanup)
+        self.addCleanup(RENDER_CACHE.local.clear)
+        RENDER_CACHE.local.clear()
+
+        self.map_render = MapRender(name="TestRender", digest="0" * 64)
+        self.map_render.full_html.save("test.html", ContentFile(b"<html>v1</html>"), save=False)
+        self.map_render.save()
+
+    def test_readDocument_shouldCacheDocument(self):
+        self.assertEqual(self.map_render.read_document(self.map_render.full_html), b"<html>v1</html>")
+        hits = RENDER_CACHE.local.hits
+        self.assertEqual(self.map_render.read_document(self.map_render.full_html), b"<html>v1</html>")
+        self.assertEqual(RENDER_CACHE.local.hits, hits + 1)
+    # End def test_readDocument_shouldCacheDocument
+
+    def test_save_shouldInvalidateCachedDocuments(self):
+        self.map_render.read_document(self.map_render.full_html)
+        self.map_render.full_html.save("test.html", ContentFile(b"<html>v2</html>"), save=False)
+        self.map_render.save()
+        self.assertEqual(self.map_render.read_document(self.map_render.full_html), b"<html>v2</html>")
+    # End def test_save_shouldInvalidateCachedDocuments
+
+    def test_readDocument_shouldNotCache_givenNoDigest(self):
+        self.map_render.digest = None
+        document = self.map_render.read_document(self.map_render.full_html)
+        self.assertNotIsInstance(document, bytes)
+        document.close()
+    # End def test_readDocument_shouldNotCache_givenNoDigest
+# End class TestMapRenderCache
+
+
+class TestMapRenderProfile(TestCase):
+    def setUp(self):
+        self.map_render = MapRender.objects.create(name="TestRender")
+        self.profile = {
+            "duration": 3.5,
+            "stages": {"layers_data": 2.0, "render": 1.5},
+            "sizes": {"embed_html": 100, "full_html": 120, "assets": 4000},
+            "layers": [{"name": "TestLayer", "source": "database", "features": 3, "bytes": 4000,
+                        "duration": 1.5, "stages": {"query": 1.0}}],
+        }
+    # End def setUp
+
+    def test_record_shouldStoreProfile(self):
+        profile = MapRenderProfile.record(self.map_render, self.profile)
+        profile.refresh_from_db()
+        self.assertEqual(profile.map_render, self.map_render)
+        self.assertEqual(profile.duration, 3.5)
+        self.assertEqual((profile.embed_size, profile.full_size), (100, 120))
+        self.assertEqual(profile.stages, self.profile["stages"])
+        self.assertEqual(profile.layers, self.profile["layers"])
+    # End def test_record_shouldStoreProfile
+
+    def test_record_shouldStoreNoSizes_givenRenderNotWritten(self):
+        profile = MapRenderProfile.record(self.map_render, {**self.profile, "sizes": {}})
+        self.assertEqual((profile.embed_size, profile.full_size), (None, None))
+    # End def test_record_shouldStoreNoSizes_givenRenderNotWritten
+
+    def test_record_shouldOnlyKeepLatestProfiles(self):
+        other = MapRenderProfile.record(MapRender.objects.create(name="OtherRender"), self.profile)
+        with mock.patch.object(MapRenderProfile, "MAX_PROFILES", 2):
+            profiles = [MapRenderProfile.record(self.map_render, self.profile) for _ in range(4)]
+        self.assertEqual(list(self.map_render.profiles.values_list("id", flat=True)),
+                         [profiles[3].id, profiles[2].id])
+        self.assertTrue(MapRenderProfile.objects.filter(id=other.id).exists())
+    # End def test_record_shouldOnlyKeepLatestProfiles
+# End class TestMapRenderProfile
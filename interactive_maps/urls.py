@@ -10,6 +10,9 @@ urlpatterns = [
     path('cartes/', MapIndexView.as_view(), name='map-index'),
     path('carte/<slug:slug>/', MapDetailView.as_view(), name='map-detail'),
     path('carte/<slug:slug>/plein-ecran', map_fullscreen_view, name='map-detail-fullscreen'),
+    path('carte/<slug:slug>/plein-ecran/<slug:digest>', map_fullscreen_view, name='map-detail-fullscreen-version'),
     path('carte/draft/<slug:slug>/', MapDraftDetailView.as_view(), name='map-draft-detail'),
-    path('carte/draft/<slug:slug>/plein-ecran', map_draft_fullscreen_view, name='map-draft-detail-fullscreen')
+    path('carte/draft/<slug:slug>/plein-ecran', map_draft_fullscreen_view, name='map-draft-detail-fullscreen'),
+    path('carte/draft/<slug:slug>/plein-ecran/<slug:digest>', map_draft_fullscreen_view,
+         name='map-draft-detail-fullscreen-version'),
 ]
\ No newline at end of file
@@ -4,30 +4,43 @@ Views for the interactive maps application.
 """
 from __future__ import annotations
 
+import logging
+
 from bs4 import BeautifulSoup
-from django import urls
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Q
-from django.http import FileResponse, Http404
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.utils.decorators import method_decorator
 from django.utils.translation import gettext as _
+from django.views.decorators.clickjacking import xframe_options_sameorigin
 from django.views.generic import DetailView, ListView
 
 from common.choices import PublicationStatus, get_license_url, License
+from common.utils.http import etag_matches, negotiate_encoding
+from common.utils.listings import MAPS, THEMES, CachedListingMixin
+from common.utils.search import search_queryset
 from core.models import Person
-from interactive_maps.models import Map
+from interactive_maps.models import Map, MapRender
 from thematic.models import Theme
 
+logger = logging.getLogger(__name__)
+
+# Duration in seconds the versions of the map renders are cached for by the browsers
+RENDER_MAX_AGE = getattr(settings, "MAP_RENDER_MAX_AGE", 365 * 24 * 60 * 60)
 
 # ======================================================================================================================
 # Interactive maps' index view
 # ======================================================================================================================
 
-class MapIndexView(ListView):
+class MapIndexView(CachedListingMixin, ListView):
     """Index view for the interactive maps."""
     model = Map
     template_name = 'interactive_maps/map_index.html'
+    listing_template_name = 'interactive_maps/map_index_listing.html'
+    listing_sections = (MAPS, THEMES)
+    listing_params = ('theme', 'search')
     context_object_name = 'maps'
 
     def get_queryset(self):
@@ -43,11 +56,7 @@ class MapIndexView(ListView):
         # 2. Filter by search query
         search = self.request.GET.get('search')
         if search:
-            maps = maps.filter(
-                Q(title__icontains=search) |
-                Q(authors__firstname__icontains=search) |
-                Q(authors__lastname__icontains=search)
-            ).distinct()
+            maps = search_queryset(maps, search)
         return maps
     # End def get_queryset
 
@@ -85,13 +94,13 @@ class MapDetailView(DetailView):
         themes       : set[Theme]  = self.object.themes.all()
         authors      : set[Person] = self.object.authors.all()
         title        : str         = self.object.title
-        try:
-            map_embed_html : str | None = self.object.render.embed_html.read().decode('utf-8')
-            map_fs_link    : str | None = urls.reverse('map-detail-fullscreen', kwargs={'slug': self.object.slug})
-        except AttributeError:
+        # The map is loaded in a frame from the current version of its fullscreen view,
+        # which serves it precompressed and cached for good
+        if self.object.render is not None and self.object.render.full_html:
+            map_fs_link : str | None = self.object.render.get_version_url()
+        else:
             # If the map_render is None, then the map has not been generated yet
-            map_embed_html = None
-            map_fs_link     = None
+            map_fs_link = None
 
         # Add the body and sections to the context
         context['title']         = title
@@ -103,7 +112,6 @@ class MapDetailView(DetailView):
         context['introduction']  = None if introduction is None else self.__format_introduction(introduction)
         context['text']          = text
 
-        context['map_embed']     = map_embed_html
         context['map_fs_link']   = map_fs_link
 
         context['thumbnail']     = None
@@ -166,13 +174,8 @@ class MapDetailView(DetailView):
 
 @method_decorator(staff_member_required, name='dispatch')
 class MapDraftDetailView(MapDetailView):
+    # The URL of the fullscreen view of the drafts is given by their render, see `MapRender.get_version_url`
     queryset = Map.objects.filter(publication_status=PublicationStatus.DRAFT)
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        if context['map_fs_link'] is not None:
-            context['map_fs_link'] = urls.reverse('map-draft-detail-fullscreen', kwargs={'slug': self.object.slug})
-        return context
 # End class MapDraftDetailView
 
 
@@ -180,7 +183,67 @@ class MapDraftDetailView(MapDetailView):
 # Interactive maps' full screen view
 # ======================================================================================================================
 
-def map_fullscreen_view(request, slug):
+def render_response(request,
+                    map_render: MapRender,
+                    *,
+                    versioned: bool = False,
+                    private: bool = False) -> HttpResponse | FileResponse | HttpResponseNotModified:
+    """Serve the full document of a map render, precompressed with the best coding accepted by the client.
+
+    The documents are read through the cache of the renders, see `MapRender.read_document`.
+
+    The responses are tagged with the digest of the render, so that the browsers revalidate their copy
+    rather than download it again.
+
+    Args:
+        versioned (bool): Whether the render is served at the URL of its version, which never changes,
+            in which case the browsers cache it for good. Otherwise, they revalidate it on each visit.
+        private (bool): Whether the render must not be cached by shared caches.
+    """
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'), map_render.encodings)
+    content = None
+    if encoding is not None:
+        try:
+            content = map_render.read_document(map_render.full_html, encoding)
+        except FileNotFoundError:
+            logger.warning(f"The '{encoding}' document of the map render '{map_render}' is missing.")
+    if content is None:
+        encoding = None
+        content = map_render.read_document(map_render.full_html)
+
+    # Each coding of the render is a distinct representation, with its own entity tag
+    etag = None
+    if map_render.digest:
+        etag = f'"{map_render.digest}-{encoding}"' if encoding is not None else f'"{map_render.digest}"'
+
+    if etag is not None and etag_matches(request.headers.get('If-None-Match'), etag):
+        if not isinstance(content, bytes):
+            content.close()
+        response = HttpResponseNotModified()
+    else:
+        # The documents read from the cache are served from memory, the others streamed from the storage
+        if isinstance(content, bytes):
+            response = HttpResponse(content, content_type='text/html; charset=utf-8')
+        else:
+            response = FileResponse(content, as_attachment=False, content_type='text/html; charset=utf-8')
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+
+    if etag is not None:
+        response['ETag'] = etag
+    scope = {'private': True} if private else {'public': True}
+    if versioned:
+        patch_cache_control(response, **scope, max_age=RENDER_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, **scope, no_cache=True)
+    # The response depends on the codings accepted by the client
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+# End def render_response
+
+
+@xframe_options_sameorigin
+def map_fullscreen_view(request, slug, digest=None):
     # Get the map
     map_instance = get_object_or_404(Map, slug=slug, publication_status=PublicationStatus.PUBLISHED)
 
@@ -190,12 +253,17 @@ def map_fullscreen_view(request, slug):
     if map_render is None or map_render.full_html is None:
         raise Http404(_("The fullscreen view of the map '{title}' is not available.").format(title=map_instance.title))
 
+    # Redirect the outdated versions of the map to the current one
+    if digest is not None and digest != map_render.digest:
+        return redirect(map_render.get_version_url())
+
     # Return the html of the map's fullscreen view
-    return FileResponse(map_render.full_html, as_attachment=False)
+    return render_response(request, map_render, versioned=digest is not None)
 # End def interactive_map_fullscreen_view
 
+@xframe_options_sameorigin
 @staff_member_required
-def map_draft_fullscreen_view(request, slug):
+def map_draft_fullscreen_view(request, slug, digest=None):
     # Get the map
     map_instance = get_object_or_404(Map, slug=slug, publication_status=PublicationStatus.DRAFT)
 
@@ -205,6 +273,10 @@ def map_draft_fullscreen_view(request, slug):
     if map_render is None or map_render.full_html is None:
         raise Http404(_("The fullscreen view of the map '{title}' is not available.").format(title=map_instance.title))
 
-    # Return the html of the map's fullscreen view
-    return FileResponse(map_render.full_html, as_attachment=False)
+    # Redirect the outdated versions of the map to the current one
+    if digest is not None and digest != map_render.digest:
+        return redirect(map_render.get_version_url())
+
+    # Return the html of the map's fullscreen view, which is only cached by the browsers of the staff
+    return render_response(request, map_render, versioned=digest is not None, private=True)
 # End def interactive_map_draft_fullscreen_view
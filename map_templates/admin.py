@@ -5,17 +5,21 @@ Admin module for the `map_templates` application.
 from __future__ import annotations
 
 from django import forms
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.gis.admin import GISModelAdmin
 from django.contrib.gis.db.models import GeometryField
 from django.contrib.gis.forms import OSMWidget
-from django.utils.html import format_html
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
 from nested_admin.nested import NestedModelAdmin, NestedStackedInline, NestedTabularInline
 
 from common.utils.admin import get_clock_icon_html
 from common.utils.tasks import TaskStatus
 from map_templates.models import CirclePattern, FeatureGroup, Filter, Layer, MapTemplate, PropertyStyle, StripePattern, \
     Style, TileLayer, Tooltip, TooltipField
+from map_templates.services.estimator import RenderEstimate
+from map_templates.services.processor import TemplateProcessor
 from django.utils.translation import gettext_lazy as _
 
 # ======================================================================================================================
@@ -396,7 +400,8 @@ class MapTemplateAdmin(NestedModelAdmin, GISModelAdmin):
     search_fields = ('id', 'name',)
     list_per_page = 25
 
-    readonly_fields = ('id', 'task_status', 'task_id')
+    readonly_fields = ('id', 'task_status', 'task_id', 'render_version', 'render_status', 'render_estimate')
+    actions = ('estimate_render_size',)
 
     inlines = [
         LayerInline,
@@ -416,6 +421,8 @@ class MapTemplateAdmin(NestedModelAdmin, GISModelAdmin):
             'classes': ('collapse',),
             'fields': (
                 ('task_id', 'task_status'),
+                ('render_version', 'render_status'),
+                'render_estimate',
                 'regenerate'
             )
         }),
@@ -428,6 +435,7 @@ class MapTemplateAdmin(NestedModelAdmin, GISModelAdmin):
                 'zoom_start',
                 ('layer_control', 'zoom_control'),
                 'center',
+                'render_budget',
             )
         }),
     )
@@ -460,4 +468,69 @@ class MapTemplateAdmin(NestedModelAdmin, GISModelAdmin):
             id_ = obj.render.id
             return format_html(f'<a href="/admin/interactive_maps/maprender/{id_}/change/">{name}@{id_}</a>')
     child_map_render.short_description = _("Child Map Render")
+
+    def render_status(self, obj : MapTemplate):
+        if obj.pk is None:
+            return "-"
+        try:
+            up_to_date = TemplateProcessor(obj).is_up_to_date()
+        except ValueError:
+            return format_html('<img src="/static/admin/img/icon-alert.svg" alt="Invalid"> {}', _("Invalid template"))
+        if up_to_date:
+            return format_html('<img src="/static/admin/img/icon-yes.svg" alt="True"> {}', _("Up to date"))
+        return format_html('<img src="/static/admin/img/icon-no.svg" alt="False"> {}', _("Outdated"))
+    render_status.short_description = _("Render Status")
+
+    def render_estimate(self, obj : MapTemplate):
+        if obj.pk is None:
+            return "-"
+        url = reverse('admin:map_templates_maptemplate_estimate', args=(obj.pk,))
+        return format_html('<a class="button" href="{}">{}</a>', url, _("Estimate the render size"))
+    render_estimate.short_description = _("Render Estimate")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # Render Estimate (dry run)
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def get_urls(self):
+        urls = [
+            path(
+                '<path:object_id>/estimate/',
+                self.admin_site.admin_view(self.estimate_view),
+                name='map_templates_maptemplate_estimate'
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def estimate_view(self, request, object_id):
+        template = get_object_or_404(MapTemplate, pk=object_id)
+        self.message_estimate(request, template)
+        return redirect('admin:map_templates_maptemplate_change', template.pk)
+
+    @admin.action(description=_("Estimate the render size of the selected map templates"))
+    def estimate_render_size(self, request, queryset):
+        for template in queryset:
+            self.message_estimate(request, template)
+
+    def message_estimate(self, request, template : MapTemplate):
+        """Estimate the render of a template and report it, with the budgets it exceeds, as messages."""
+        try:
+            estimate : RenderEstimate = TemplateProcessor(template).estimate()
+        except ValueError as e:
+            self.message_user(request, format_html("{}: {}", template.name, e), messages.ERROR)
+            return
+
+        rows = format_html_join(
+            '', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{} KB</td></tr>',
+            ((layer.name, layer.source, layer.features, layer.vertices, round(layer.bytes / 1024))
+             for layer in sorted(estimate.layers, key=lambda l: l.bytes, reverse=True))
+        )
+        self.message_user(request, format_html(
+            '{} – {} features, {} vertices, ~{} KB'
+            '<table><tr><th>{}</th><th>{}</th><th>{}</th><th>{}</th><th>{}</th></tr>{}</table>',
+            template.name, estimate.features, estimate.vertices, round(estimate.bytes / 1024),
+            _("Layer"), _("Source"), _("Features"), _("Vertices"), _("Size"), rows
+        ), messages.INFO)
+        for warning in estimate.warnings():
+            self.message_user(request, format_html("{}: {}", template.name, warning), messages.WARNING)
 # End class MapTemplateAdmin
\ No newline at end of file
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Command to pre-render the vector tiles of the map templates.
+"""
+from django.core.management import BaseCommand, CommandError
+
+from map_templates import tasks
+from map_templates.models import MapTemplate
+from map_templates.services.mbtiles import build_mbtiles
+from map_templates.services.templates import MAX_ZOOM, MIN_ZOOM
+
+
+class Command(BaseCommand):
+    help = "Pre-render the vector tile layers of map templates into MBTiles files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'templates',
+            nargs='*',
+            type=str,
+            help="The names of the map templates to build the tiles of."
+        )
+        parser.add_argument(
+            '--all', '-a',
+            action='store_true',
+            help="Build the tiles of all the map templates."
+        )
+        parser.add_argument(
+            '--jobs', '-j',
+            type=int,
+            default=None,
+            help="The number of processes rendering the tiles. Defaults to the number of CPUs."
+        )
+        parser.add_argument(
+            '--min-zoom',
+            type=int,
+            default=MIN_ZOOM,
+            help=f"The lowest zoom level to render (default: {MIN_ZOOM})."
+        )
+        parser.add_argument(
+            '--max-zoom',
+            type=int,
+            default=MAX_ZOOM,
+            help=f"The highest zoom level to render (default: {MAX_ZOOM})."
+        )
+        parser.add_argument(
+            '--background', '-b',
+            action='store_true',
+            help="Build the tiles in a Celery task instead of the current process, with the same options."
+        )
+    # End def add_arguments
+
+    def handle(self, templates=None, all=False, jobs=None, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM, background=False,
+               **kwargs):
+        if all:
+            map_templates = MapTemplate.objects.all()
+        elif templates:
+            map_templates = MapTemplate.objects.filter(name__in=templates)
+            missing = set(templates) - set(map_templates.values_list('name', flat=True))
+            if missing:
+                raise CommandError(f"Unknown map templates: {', '.join(sorted(missing))}")
+        else:
+            raise CommandError("Provide the names of the map templates or use '--all'.")
+        if not MIN_ZOOM <= min_zoom <= max_zoom <= MAX_ZOOM:
+            raise CommandError(f"The zoom levels must verify {MIN_ZOOM} <= min zoom <= max zoom <= {MAX_ZOOM}.")
+        if jobs is not None and jobs < 1:
+            raise CommandError("The number of jobs must be at least 1.")
+
+        failed = 0
+        for template in map_templates:
+            if background:
+                tasks.build_map_template_tiles_task.delay(template.id, min_zoom=min_zoom, max_zoom=max_zoom, jobs=jobs)
+                self.stdout.write(f"Tiles of '{template.name}' queued.")
+                continue
+            try:
+                path = build_mbtiles(template, min_zoom=min_zoom, max_zoom=max_zoom, jobs=jobs)
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"Failed to build the tiles of '{template.name}': {e}"))
+                continue
+            self.stdout.write(self.style.SUCCESS(f"Tiles of '{template.name}' built in '{path}'."))
+
+        if failed:
+            raise CommandError(f"{failed} of {len(map_templates)} builds failed.")
+    # End def handle
+# End class Command
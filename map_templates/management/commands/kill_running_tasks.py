@@ -36,6 +36,6 @@ class Command(BaseCommand):
             template.task_status = TaskStatus.REVOKED
             template.task_id = None
             template.regenerate = False
-            template.save()
+            template.save(update_fields=["task_status", "task_id", "regenerate"])
     # End def handle
 # End class Command
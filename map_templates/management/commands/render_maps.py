@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Command to render the map templates in batch.
+"""
+from django.core.management import BaseCommand, CommandError
+
+from map_templates.models import MapTemplate
+from map_templates.services.batch import RenderOutcome, render_templates
+from map_templates.services.scheduler import schedule_render
+
+
+class Command(BaseCommand):
+    help = "Render map templates on a pool of processes, e.g. after a change of the styles or of a dependency."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'templates',
+            nargs='*',
+            type=str,
+            help="The names of the map templates to render."
+        )
+        parser.add_argument(
+            '--all', '-a',
+            action='store_true',
+            help="Render all the map templates."
+        )
+        parser.add_argument(
+            '--jobs', '-j',
+            type=int,
+            default=None,
+            help="The number of templates rendered concurrently. Defaults to the number of CPUs."
+        )
+        parser.add_argument(
+            '--force', '-f',
+            action='store_true',
+            help="Render the templates even if their render is up to date."
+        )
+        parser.add_argument(
+            '--background', '-b',
+            action='store_true',
+            help="Schedule the renders on the Celery workers instead of rendering them in the current process."
+        )
+    # End def add_arguments
+
+    def handle(self, templates=None, all=False, jobs=None, force=False, background=False, **kwargs):
+        if jobs is not None and jobs < 1:
+            raise CommandError("The number of jobs must be at least 1.")
+        if all:
+            map_templates = MapTemplate.objects.all()
+        elif templates:
+            map_templates = MapTemplate.objects.filter(name__in=templates)
+            missing = set(templates) - set(map_templates.values_list('name', flat=True))
+            if missing:
+                raise CommandError(f"Unknown map templates: {', '.join(sorted(missing))}")
+        else:
+            raise CommandError("Provide the names of the map templates or use '--all'.")
+        map_templates = list(map_templates.order_by('name').values_list('id', 'name'))
+
+        # 1. Schedule the renders on the workers, which take the locks of the templates
+        if background:
+            for template_id, name in map_templates:
+                version = schedule_render(template_id, countdown=0, force=force)
+                self.stdout.write(f"Render v{version} of '{name}' queued.")
+            return
+
+        # 2. Otherwise, render the templates on a pool of processes
+        outcomes = []
+        for outcome in render_templates((id_ for id_, _ in map_templates), jobs=jobs, force=force):
+            outcomes.append(outcome)
+            message = f"[{len(outcomes)}/{len(map_templates)}] '{outcome.name}': {outcome.status}"
+            if outcome.failed:
+                self.stdout.write(self.style.ERROR(f"{message} ({outcome.error})"))
+            elif outcome.status == RenderOutcome.LOCKED:
+                self.stdout.write(self.style.WARNING(f"{message}, rendered elsewhere"))
+            else:
+                self.stdout.write(f"{message} ({outcome.duration:.1f}s)")
+
+        self.print_summary(outcomes)
+        failed = sum(outcome.failed for outcome in outcomes)
+        if failed:
+            raise CommandError(f"{failed} of {len(outcomes)} renders failed.")
+    # End def handle
+
+    def print_summary(self, outcomes: list[RenderOutcome]):
+        """Print a table of the renders, the slowest first."""
+        rows = [
+            (
+                outcome.name,
+                outcome.status,
+                f"{outcome.duration:.1f}s",
+                f"{outcome.bytes / 1024 / 1024:.2f} MB" if outcome.bytes is not None else "-",
+            )
+            for outcome in sorted(outcomes, key=lambda o: o.duration, reverse=True)
+        ]
+        total = sum(outcome.bytes or 0 for outcome in outcomes)
+        footer = ("Total", f"{len(outcomes)} templates", f"{sum(o.duration for o in outcomes):.1f}s",
+                  f"{total / 1024 / 1024:.2f} MB")
+        header = ("Template", "Status", "Duration", "Size")
+        widths = [max(len(row[i]) for row in (header, footer, *rows)) for i in range(len(header))]
+
+        def line(row):
+            return "  ".join(cell.ljust(width) if i < 2 else cell.rjust(width)
+                             for i, (cell, width) in enumerate(zip(row, widths)))
+
+        self.stdout.write("")
+        self.stdout.write(self.style.MIGRATE_HEADING(line(header)))
+        for row in rows:
+            style = self.style.ERROR if row[1] == RenderOutcome.FAILED else (lambda text: text)
+            self.stdout.write(style(line(row)))
+        self.stdout.write(line(footer))
+    # End def print_summary
+# End class Command
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2024-10-21 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map_templates', '0011_featuregroup_display_layer_display'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='layer',
+            name='source_type',
+            field=models.CharField(choices=[('geojson', 'GeoJSON'), ('vector_tiles', 'Vector Tiles')], default='geojson', help_text='Defines how the data of the layer is delivered to the map. GeoJSON: the features are embedded in the map; Vector Tiles: the features are loaded on demand as Mapbox Vector Tiles, suited for large layers.', max_length=15, verbose_name='Source Type'),
+        ),
+    ]
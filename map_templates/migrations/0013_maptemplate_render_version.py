@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2024-10-24 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map_templates', '0012_layer_source_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maptemplate',
+            name='render_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Incremented each time a render is scheduled. Only the render of the latest version is generated.', verbose_name='Render Version'),
+        ),
+    ]
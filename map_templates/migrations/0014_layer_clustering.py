@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2024-10-28 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map_templates', '0013_maptemplate_render_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='layer',
+            name='clustering',
+            field=models.BooleanField(default=False, help_text='Whether the points of the layer are grouped into clusters at low zoom levels. Only the clusters of the current zoom level are drawn, the points are drawn once zoomed in. Suited for dense point layers, ignored for the layers served as vector tiles.', verbose_name='Cluster Points'),
+        ),
+    ]
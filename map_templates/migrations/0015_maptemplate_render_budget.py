@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2024-10-29 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('map_templates', '0014_layer_clustering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maptemplate',
+            name='render_budget',
+            field=models.PositiveIntegerField(blank=True, default=None, help_text='The maximum size of the data of the layers of the render, in kilobytes. Above it, the layers are degraded, the heaviest first, by dropping their tooltip, rounding their coordinates, simplifying their geometries, and finally serving them as vector tiles. Leave empty to render the layers as they are.', null=True, verbose_name='Render Budget (KB)'),
+        ),
+    ]
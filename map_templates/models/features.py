@@ -135,6 +135,31 @@ class Layer(models.Model):
         )
     )
 
+    source_type = models.CharField(
+        max_length=15,
+        choices=[
+            ("geojson", _("GeoJSON")),
+            ("vector_tiles", _("Vector Tiles"))
+        ],
+        default="geojson",
+        verbose_name=_("Source Type"),
+        help_text=_(
+            "Defines how the data of the layer is delivered to the map. "
+            "GeoJSON: the features are embedded in the map; "
+            "Vector Tiles: the features are loaded on demand as Mapbox Vector Tiles, suited for large layers."
+        )
+    )
+
+    clustering = models.BooleanField(
+        default=False,
+        verbose_name=_("Cluster Points"),
+        help_text=_(
+            "Whether the points of the layer are grouped into clusters at low zoom levels. "
+            "Only the clusters of the current zoom level are drawn, the points are drawn once zoomed in. "
+            "Suited for dense point layers, ignored for the layers served as vector tiles."
+        )
+    )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Style Fields
     # ------------------------------------------------------------------------------------------------------------------
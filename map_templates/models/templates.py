@@ -6,12 +6,15 @@ from django.contrib.gis.db import models as gis_models
 from django.contrib.gis.geos import Point
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext as _
 
 from common.utils.tasks import TaskStatus
-from map_templates import tasks
+from datasets.signals import features_generated
+from map_templates.services.dependencies import schedule_dependent_renders
+from map_templates.services.scheduler import schedule_render
 from map_templates.services.templates import MapTemplate as MapTemplateObject
 
 # ======================================================================================================================
@@ -85,6 +88,18 @@ class MapTemplate(models.Model):
         help_text=_("The tiles to load on the map.")
     )
 
+    # Maximum size of the data of the layers of the render
+    render_budget = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        default=None,
+        verbose_name=_("Render Budget (KB)"),
+        help_text=_("The maximum size of the data of the layers of the render, in kilobytes. Above it, the layers "
+                    "are degraded, the heaviest first, by dropping their tooltip, rounding their coordinates, "
+                    "simplifying their geometries, and finally serving them as vector tiles. "
+                    "Leave empty to render the layers as they are.")
+    )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Task specific fields
     # ------------------------------------------------------------------------------------------------------------------
@@ -113,16 +128,41 @@ class MapTemplate(models.Model):
         help_text=_("Whether the map render should be regenerated.")
     )
 
+    render_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=_("Render Version"),
+        help_text=_("Incremented each time a render is scheduled. Only the render of the latest version is generated.")
+    )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Methods
     # ------------------------------------------------------------------------------------------------------------------
 
+    # Fields written by the render scheduler and tasks with queryset updates, which a full save would overwrite
+    # with the stale values of the instance, e.g. dropping the renders scheduled since it was loaded as superseded
+    SCHEDULED_FIELDS = ("task_id", "task_status", "render_version")
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """Save the template, leaving the `SCHEDULED_FIELDS` out of the full saves of an existing template.
+
+        These fields are only saved by an update listing them explicitly in `update_fields`.
+        """
+        if kwargs.get("update_fields") is None and not args and not self._state.adding \
+                and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.SCHEDULED_FIELDS]
+        super().save(*args, **kwargs)
+    # End def save
+
     def as_template_object(self) -> MapTemplateObject:
         """Returns the map template object."""
-        return MapTemplateObject.from_model(self)
+        # Imported here as the loader depends on the models
+        from map_templates.services.loader import load_template
+        return load_template(self)
     # End def as_template_object
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -143,12 +183,29 @@ class MapTemplate(models.Model):
 
 @receiver(post_save, sender=MapTemplate)
 def generate_map_render(sender, instance, created, **kwargs):
-    """Generate the render of the map template."""
-    if created:
-        tasks.generate_maprender_from_maptemplate_task.delay(instance.id)
-    elif instance.regenerate:
-        # Revoke the previous task to avoid multiple renders
-        if instance.task_id is not None:
-            tasks.generate_maprender_from_maptemplate_task.AsyncResult(str(instance.task_id)).revoke()
-        tasks.generate_maprender_from_maptemplate_task.delay(instance.id)
-# End def generate_map_render
\ No newline at end of file
+    """Generate the render of the map template.
+
+    The render is debounced: the renders scheduled by a burst of saves are superseded by the last one.
+    """
+    if created or instance.regenerate:
+        schedule_render(instance.id)
+# End def generate_map_render
+
+
+@receiver(features_generated)
+def render_dependent_templates(sender, dataset_layer_ids, **kwargs):
+    """Render the map templates displaying the dataset layers whose features changed."""
+    schedule_dependent_renders(dataset_layer_ids)
+# End def render_dependent_templates
+
+
+@receiver([post_save, post_delete], sender="interactive_maps.Map")
+@receiver([post_save, post_delete], sender="interactive_maps.MapRender")
+def refresh_published_tiles(sender, raw=False, **kwargs):
+    """Record whether the maps of the templates are published in their pre-rendered tiles, once a map changes."""
+    # Imported here as the tiles depend on the models
+    from map_templates.services.mbtiles import refresh_published
+
+    if not raw:
+        transaction.on_commit(refresh_published)
+# End def refresh_published_tiles
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Batch render service module for the `map_templates` application.
+
+Renders many map templates at once, e.g. after a change of the styles or of a dependency,
+on a pool of processes, each template being rendered by a single process at a time.
+The renders respect the locks of the templates (see `services.scheduler.render_lock`): a template
+being rendered elsewhere, e.g. by a Celery worker, is skipped rather than rendered twice.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator
+
+from django.apps import apps
+from django.db import connections
+
+from common.utils.tasks import TaskStatus
+from map_templates.services.processor import TemplateProcessor
+from map_templates.services.scheduler import render_lock
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+logger = logging.getLogger(__name__)
+
+# ======================================================================================================================
+# Outcome
+# ======================================================================================================================
+
+class RenderOutcome:
+    """Outcome of the render of a map template in a batch."""
+
+    RENDERED = "rendered"
+    UP_TO_DATE = "up to date"
+    LOCKED = "locked"
+    FAILED = "failed"
+
+    def __init__(self, template_id: int, name: str, status: str) -> None:
+        self.template_id : int = template_id
+        self.name : str = name
+        self.status : str = status
+        self.duration : float = 0.0
+        # Size in bytes of the full document of the render and of the data of its layers
+        self.bytes : int | None = None
+        self.error : str | None = None
+    # End def __init__
+
+    @property
+    def failed(self) -> bool:
+        return self.status == self.FAILED
+    # End def failed
+# End class RenderOutcome
+
+# ======================================================================================================================
+# Render
+# ======================================================================================================================
+
+# noinspection PyPep8Naming
+def render_template(map_template_id: int, *, force: bool = False) -> RenderOutcome:
+    """Render a map template, unless another render of it is running.
+
+    The status of the template is updated as done by the render task. Errors are reported by the outcome.
+
+    Args:
+        map_template_id (int): The id of the map template.
+        force (bool): Whether to render even if the current render is up to date.
+    """
+    MapTemplate = apps.get_model("map_templates", "MapTemplate")
+    start = time.perf_counter()
+    template_query = MapTemplate.objects.filter(id=map_template_id)
+    name = template_query.values_list("name", flat=True).first() or str(map_template_id)
+
+    with render_lock(map_template_id) as acquired:
+        # 1. Skip the templates being rendered elsewhere
+        if not acquired:
+            return RenderOutcome(map_template_id, name, RenderOutcome.LOCKED)
+
+        template_query.update(task_status=TaskStatus.STARTED, task_id=None, regenerate=False)
+        task_status = TaskStatus.FAILURE
+        try:
+            # 2. Render the template, if outdated
+            processor = TemplateProcessor(MapTemplate.objects.get(id=map_template_id))
+            if not force and processor.is_up_to_date():
+                outcome = RenderOutcome(map_template_id, name, RenderOutcome.UP_TO_DATE)
+            else:
+                processor.build()
+                processor.save()
+                outcome = RenderOutcome(map_template_id, name, RenderOutcome.RENDERED)
+                sizes = processor.profiler.sizes
+                outcome.bytes = sizes.get("full_html", 0) + sizes.get("assets", 0)
+            task_status = TaskStatus.SUCCESS
+        except Exception as e:
+            logger.exception(f"Failed to render map template '{name}'.")
+            outcome = RenderOutcome(map_template_id, name, RenderOutcome.FAILED)
+            outcome.error = f"{type(e).__name__}: {e}"
+        finally:
+            template_query.update(task_status=task_status, task_id=None, regenerate=False)
+
+    outcome.duration = time.perf_counter() - start
+    return outcome
+# End def render_template
+
+
+def render_templates(map_template_ids: Iterable[int],
+                     *,
+                     jobs: int | None = None,
+                     force: bool = False) -> Iterator[RenderOutcome]:
+    """Render map templates on a pool of processes.
+
+    Args:
+        map_template_ids (Iterable[int]): The ids of the map templates.
+        jobs (int | None): The number of templates rendered concurrently. Defaults to the number of CPUs.
+        force (bool): Whether to render even the templates whose render is up to date.
+
+    Yields:
+        RenderOutcome: The outcome of each render, as they complete.
+    """
+    map_template_ids = list(map_template_ids)
+    if not map_template_ids:
+        return
+    jobs = min(jobs or os.cpu_count() or 1, len(map_template_ids))
+    with _executor(jobs) as executor:
+        futures = [executor.submit(_render_template, id_, force) for id_ in map_template_ids]
+        for future in as_completed(futures):
+            yield future.result()
+# End def render_templates
+
+
+def _render_template(map_template_id: int, force: bool) -> RenderOutcome:
+    """Render a map template in a worker, closing the connection to the database of the worker once done."""
+    try:
+        return render_template(map_template_id, force=force)
+    finally:
+        connections.close_all()
+# End def _render_template
+
+
+def _executor(jobs: int) -> Executor:
+    """Get the pool rendering the templates.
+
+    Processes are used when possible, the connections to the database being closed beforehand so that
+    the workers do not share the sockets of the parent. Daemonic processes cannot have children,
+    threads are used instead.
+    """
+    if jobs == 1 or multiprocessing.current_process().daemon:
+        return ThreadPoolExecutor(max_workers=jobs)
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("fork"))
+# End def _executor
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Clustering service module for the `map_templates` application.
+
+Groups the points of a layer into a hierarchy of clusters indexed by zoom level, in the spirit of
+supercluster: the points are projected to Web Mercator, then merged zoom level by zoom level,
+from the highest to the lowest, each level clustering the clusters of the level above.
+The points of a cluster are those falling in the same cell of a grid whose cells span the
+clustering radius in pixels at that zoom level, which keeps the computation vectorised.
+"""
+from __future__ import annotations
+
+import logging
+from array import array
+from typing import Iterable
+
+import numpy as np
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+logger = logging.getLogger(__name__)
+
+# Radius of a cluster, in pixels
+CLUSTER_RADIUS = 60
+# Size of a tile, in pixels
+TILE_SIZE = 256
+# Highest zoom level at which the points are clustered, the points are drawn as they are above it
+CLUSTER_MAX_ZOOM = 15
+# Number of decimals of the coordinates of the clusters (~10 cm)
+COORDINATES_PRECISION = 6
+
+# ======================================================================================================================
+# Projection
+# ======================================================================================================================
+
+def project(lonlat: np.ndarray) -> np.ndarray:
+    """Project (longitude, latitude) coordinates to Web Mercator, normalized to [0, 1]."""
+    x = lonlat[:, 0] / 360.0 + 0.5
+    sin = np.sin(np.radians(lonlat[:, 1]))
+    with np.errstate(divide="ignore"):
+        y = 0.5 - 0.25 * np.log((1 + sin) / (1 - sin)) / np.pi
+    return np.column_stack((x, np.clip(y, 0.0, 1.0)))
+# End def project
+
+
+def unproject(xy: np.ndarray) -> np.ndarray:
+    """Convert normalized Web Mercator coordinates back to (longitude, latitude)."""
+    lon = (xy[:, 0] - 0.5) * 360.0
+    lat = np.degrees(2 * np.arctan(np.exp((1 - 2 * xy[:, 1]) * np.pi))) - 90.0
+    return np.column_stack((lon, lat))
+# End def unproject
+
+# ======================================================================================================================
+# Clustering
+# ======================================================================================================================
+
+def build_clusters(lonlat: np.ndarray,
+                   *,
+                   min_zoom: int,
+                   max_zoom: int = CLUSTER_MAX_ZOOM,
+                   radius: float = CLUSTER_RADIUS) -> dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Build the hierarchy of clusters of some points.
+
+    Args:
+        lonlat (np.ndarray): The (longitude, latitude) of the points, of shape (n, 2).
+        min_zoom (int): The lowest zoom level to cluster the points at.
+        max_zoom (int): The highest zoom level to cluster the points at.
+        radius (float): The radius of a cluster, in pixels.
+
+    Returns:
+        dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]]: For each zoom level, the (longitude, latitude)
+            of the clusters, the number of points of each cluster, and the index of a point of each cluster
+            (the point itself for the clusters of a single point).
+    """
+    if min_zoom > max_zoom:
+        raise ValueError(f"Expected 'min_zoom' to be lower than 'max_zoom', got {min_zoom} and {max_zoom}")
+
+    xy = project(np.asarray(lonlat, dtype=float).reshape(-1, 2))
+    counts = np.ones(len(xy))
+    members = np.arange(len(xy))
+
+    levels = {}
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        if len(xy) == 0:
+            levels[zoom] = (np.empty((0, 2)), np.empty(0, dtype=int), np.empty(0, dtype=int))
+            continue
+
+        # 1. Find the cell of the grid of the zoom level containing each cluster of the level above
+        cell_size = radius / (TILE_SIZE * 2 ** zoom)
+        cells = np.floor(xy / cell_size).astype(np.int64)
+        _, inverse = np.unique(cells, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+
+        # 2. Merge the clusters of each cell at their weighted center
+        weights = np.bincount(inverse, weights=counts)
+        xy = np.column_stack((
+            np.bincount(inverse, weights=xy[:, 0] * counts) / weights,
+            np.bincount(inverse, weights=xy[:, 1] * counts) / weights,
+        ))
+        representatives = np.full(len(weights), len(lonlat))
+        np.minimum.at(representatives, inverse, members)
+        counts, members = weights, representatives
+
+        levels[zoom] = (unproject(xy), counts.astype(int), members)
+    return levels
+# End def build_clusters
+
+
+def point_clusters(features: Iterable[dict],
+                   *,
+                   min_zoom: int,
+                   max_zoom: int = CLUSTER_MAX_ZOOM,
+                   radius: float = CLUSTER_RADIUS) -> dict | None:
+    """Cluster the points among some GeoJSON features.
+
+    The features are referenced by their index among the features having a geometry,
+    i.e. in the order they are drawn on the map. They are consumed one at a time, only the
+    coordinates of the points being kept.
+
+    Returns:
+        dict | None: The clusters, or None if there are no points. Holds:
+            - `min_zoom` and `max_zoom`: the zoom levels the points are clustered at;
+            - `always`: the features which are not points, always drawn;
+            - `levels`: for each zoom level, the `points` drawn as they are (the clusters of a single point),
+              and the `clusters` as [longitude, latitude, number of points].
+    """
+    points = array("q")
+    coordinates = array("d")
+    always = []
+    index = 0
+    for feature in features:
+        geometry = feature.get("geometry")
+        if not geometry:
+            continue
+        if geometry.get("type") == "Point":
+            points.append(index)
+            coordinates.extend(geometry["coordinates"][:2])
+        else:
+            always.append(index)
+        index += 1
+    if not points:
+        return None
+
+    lonlat = np.frombuffer(coordinates, dtype=float).reshape(-1, 2)
+    points = np.frombuffer(points, dtype=np.int64)
+    levels = build_clusters(lonlat, min_zoom=min_zoom, max_zoom=max_zoom, radius=radius)
+
+    clusters = {
+        "min_zoom": min_zoom,
+        "max_zoom": max_zoom,
+        "always": always,
+        "levels": {},
+    }
+    for zoom, (centers, counts, members) in levels.items():
+        single = counts == 1
+        centers = np.round(centers[~single], COORDINATES_PRECISION)
+        clusters["levels"][str(zoom)] = {
+            "points": points[members[single]].tolist(),
+            "clusters": [[lon, lat, int(count)] for (lon, lat), count in zip(centers.tolist(), counts[~single])],
+        }
+    logger.debug(f"{len(points)} points clustered from zoom {min_zoom} to {max_zoom}.")
+    return clusters
+# End def point_clusters
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Degradation service module for the `map_templates` application.
+
+When the data of a render exceeds the budget of its template, the layers are degraded one level of the
+ladder at a time, the heaviest layers first, until the budget is met. From the lightest to the most
+aggressive, the levels of the ladder are:
+- `PRUNE`: only the properties styled are kept, the tooltip of the layer being dropped;
+- `QUANTIZE`: the coordinates are rounded to `QUANTIZE_PRECISION` decimals;
+- `SIMPLIFY`: the geometries are simplified, within `SIMPLIFY_TOLERANCE`;
+- `TILES`: the layer is served as vector tiles, its data no longer being part of the render.
+Each level includes the levels below it.
+"""
+from __future__ import annotations
+
+import copy
+import enum
+
+from django.conf import settings
+
+from map_templates.services.features import Layer as LayerObject, SourceType
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+# Number of decimals of the coordinates of the quantized layers (~1 m in degrees)
+QUANTIZE_PRECISION = getattr(settings, "MAP_RENDER_QUANTIZE_PRECISION", 5)
+# Tolerance of the simplification of the geometries of the simplified layers, in the units of the geometries
+SIMPLIFY_TOLERANCE = getattr(settings, "MAP_RENDER_SIMPLIFY_TOLERANCE", 0.0001)
+
+# ======================================================================================================================
+# Ladder
+# ======================================================================================================================
+
+class Degradation(enum.IntEnum):
+    """The levels of the degradation ladder, from the lightest to the most aggressive."""
+    NONE = 0
+    PRUNE = 1
+    QUANTIZE = 2
+    SIMPLIFY = 3
+    TILES = 4
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+    # End def label
+# End class Degradation
+
+
+def next_degradation(layer: LayerObject, level: Degradation) -> Degradation | None:
+    """Get the level of the ladder following the current level of a layer, None if it cannot be degraded further.
+
+    Only the layers bound to a saved layer can be served as vector tiles.
+    """
+    if level >= Degradation.TILES:
+        return None
+    level = Degradation(level + 1)
+    if level == Degradation.TILES and layer.layer_id is None:
+        return None
+    return level
+# End def next_degradation
+
+
+def degrade_layer(layer: LayerObject, level: Degradation) -> LayerObject:
+    """Get a copy of a layer degraded to the given level.
+
+    Only the levels changing the definition of the layer are applied here, the others being applied to the
+    geometries of its features as they are generated, see `degrade_geometry` and `quantize`.
+    """
+    if level == Degradation.NONE:
+        return layer
+    degraded = copy.copy(layer)
+    if level >= Degradation.PRUNE:
+        degraded.tooltip = None
+    if level >= Degradation.TILES:
+        degraded.source_type = SourceType.VECTOR_TILES
+    return degraded
+# End def degrade_layer
+
+# ======================================================================================================================
+# Geometries
+# ======================================================================================================================
+
+def degrade_geometry(geometry, level: Degradation):
+    """Simplify a GEOS geometry if required by the level, preserving its topology."""
+    if level >= Degradation.SIMPLIFY and geometry.geom_type != "Point":
+        return geometry.simplify(SIMPLIFY_TOLERANCE, preserve_topology=True)
+    return geometry
+# End def degrade_geometry
+
+
+def quantize(geometry: dict, precision: int = QUANTIZE_PRECISION) -> dict:
+    """Round the coordinates of a GeoJSON geometry to `precision` decimals, in place."""
+    if geometry.get("type") == "GeometryCollection":
+        for sub_geometry in geometry.get("geometries", []):
+            quantize(sub_geometry, precision)
+    elif "coordinates" in geometry:
+        geometry["coordinates"] = round_coordinates(geometry["coordinates"], precision)
+    return geometry
+# End def quantize
+
+
+def round_coordinates(coordinates: list, precision: int) -> list:
+    """Round nested lists of coordinates to `precision` decimals."""
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [round(value, precision) for value in coordinates]
+    return [round_coordinates(item, precision) for item in coordinates]
+# End def round_coordinates
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Dependencies service module for the `map_templates` application.
+
+Resolves the map templates depending on dataset layers, i.e. `DatasetLayer` -> `Layer` -> `MapTemplate`,
+whether the layers are owned by the template itself or by one of its feature groups.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Iterable
+
+from django.apps import apps
+from django.db.models import Q
+
+from map_templates.services.scheduler import schedule_render
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+logger = logging.getLogger(__name__)
+
+# ======================================================================================================================
+# Dependencies
+# ======================================================================================================================
+
+# noinspection PyPep8Naming
+def dependent_templates(dataset_layer_ids: Iterable[int]) -> list[int]:
+    """Get the ids of the map templates displaying some dataset layers, in a single query."""
+    # Uses apps.get_model to avoid circular imports.
+    MapTemplate = apps.get_model("map_templates", "MapTemplate")
+
+    dataset_layer_ids = set(dataset_layer_ids)
+    if not dataset_layer_ids:
+        return []
+    return list(
+        MapTemplate.objects
+        .filter(
+            Q(layers__dataset_layer_id__in=dataset_layer_ids) |
+            Q(feature_groups__layers__dataset_layer_id__in=dataset_layer_ids)
+        )
+        .distinct()
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+# End def dependent_templates
+
+
+def schedule_dependent_renders(dataset_layer_ids: Iterable[int]) -> list[int]:
+    """Schedule the render of the map templates displaying some dataset layers.
+
+    Triggers are coalesced by the scheduler: the renders scheduled for a template within its
+    debounce window are superseded by the last one, which reads the latest data once it starts.
+
+    Returns:
+        list[int]: The ids of the templates whose render was scheduled.
+    """
+    template_ids = dependent_templates(dataset_layer_ids)
+    for template_id in template_ids:
+        schedule_render(template_id)
+    logger.info(f"Renders of the map templates {template_ids} scheduled.")
+    return template_ids
+# End def schedule_dependent_renders
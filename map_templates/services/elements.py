@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Custom folium elements for the `map_templates` application.
+"""
+from __future__ import annotations
+
+import json
+from typing import Iterable
+
+from branca.element import Element, MacroElement
+from folium.plugins import VectorGridProtobuf
+from jinja2 import Template
+
+from map_templates.services.styles import DEFAULT_STYLE, LEAFLET_STYLE_ATTRIBUTES, Style
+from map_templates.services.vector_tiles import TILE_LAYER_NAME, MAX_TILE_ZOOM
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+# Builds a function styling the properties of a feature from a table compiled by `Style.compile`.
+# Takes the table and an object mapping the names of the fill patterns to the patterns.
+STYLE_LOOKUP_JS = """(function(table, patterns) {
+    return function(properties) {
+        properties = properties || {};
+        var style = Object.assign({}, table.base);
+        for (var i = 0; i < table.keys.length; i++) {
+            var value = properties[table.keys[i]];
+            if (value === undefined || value === null) { continue; }
+            var rule = table.rules[table.keys[i]][String(value)];
+            if (rule !== undefined) { Object.assign(style, rule); }
+        }
+        if (style.fillPattern !== undefined) { style.fillPattern = patterns[style.fillPattern]; }
+        return style;
+    };
+})"""
+
+# Color of the clusters of points, when the style of the layer does not define one
+DEFAULT_CLUSTER_COLOR = "#3388ff"
+
+# ======================================================================================================================
+# Styles
+# ======================================================================================================================
+
+class CompiledStyle(MacroElement):
+    """Styles the features of a `folium.GeoJson` on the client side from compiled styles.
+
+    Replaces the `style_function` and `highlight_function` of the layer, which embed a style per feature.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var layer = {{ this._parent.get_name() }};
+            var patterns = {
+                {%- for pattern in this.patterns %}
+                {{ pattern.get_name()|tojson }}: {{ pattern.get_name() }},
+                {%- endfor %}
+            };
+            {%- if this.style is not none %}
+            var style = {{ this.lookup_js }}({{ this.style|tojson }}, patterns);
+            layer.options.style = function(feature) { return style(feature.properties); };
+            layer.setStyle(layer.options.style);
+            {%- endif %}
+            {%- if this.highlight is not none %}
+            var highlight = {{ this.lookup_js }}({{ this.highlight|tojson }}, patterns);
+            layer.on('mouseover', function(e) {
+                var target = e.propagatedFrom || e.layer;
+                if (typeof target.setStyle === 'function') { target.setStyle(highlight(target.feature.properties)); }
+            });
+            layer.on('mouseout', function(e) {
+                var target = e.propagatedFrom || e.layer;
+                if (typeof target.setStyle === 'function') { layer.resetStyle(target); }
+            });
+            {%- endif %}
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, style: Style | None = None, highlight: Style | None = None) -> None:
+        super().__init__()
+        self._name = "CompiledStyle"
+        self.lookup_js = STYLE_LOOKUP_JS
+        self.source_style = style
+        self.source_highlight = highlight
+        # Compiled on render, as they reference the fill patterns by name (see `services.writer.stabilize_ids`)
+        self.style = None
+        self.highlight = None
+        self.patterns = []
+        for style_ in (style, highlight):
+            for pattern in style_.patterns() if style_ is not None else []:
+                if pattern not in self.patterns:
+                    self.patterns.append(pattern)
+                    self.add_child(pattern)
+    # End def __init__
+
+    def render(self, **kwargs):
+        """Render the fill patterns before the style, as the style references them."""
+        self.style = self.source_style.compile() if self.source_style is not None else None
+        self.highlight = self.source_highlight.compile() if self.source_highlight is not None else None
+        for child in self._children.values():
+            child.render(**kwargs)
+        script = self._template.module.__dict__["script"]
+        self.get_root().script.add_child(Element(script(self, kwargs)), name=self.get_name())
+    # End def render
+# End class CompiledStyle
+
+# ======================================================================================================================
+# Clusters
+# ======================================================================================================================
+
+class PointClusters(MacroElement):
+    """Draws the clusters of the points of a `folium.GeoJson` built by `services.clustering.point_clusters`.
+
+    At each zoom level up to the highest clustered one, the layer only draws the points which are not
+    part of a cluster and a marker per cluster. Above it, the layer draws all its features.
+    Clicking a cluster zooms in on it.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var layer = {{ this._parent.get_name() }};
+            var clusters = {{ this.clusters|tojson }};
+            var color = {{ this.color|tojson }};
+            var features = layer.getLayers().map(function(l) { return l.feature; });
+            var markers = L.layerGroup();
+            var current = null;
+            function icon(count) {
+                var size = count < 10 ? 30 : count < 100 ? 36 : count < 1000 ? 42 : 48;
+                return L.divIcon({
+                    html: '<div style="width:' + size + 'px;height:' + size + 'px;line-height:' + size + 'px;'
+                        + 'border-radius:50%;text-align:center;font-weight:bold;color:#fff;'
+                        + 'background:' + color + ';opacity:0.85;">' + count + '</div>',
+                    className: 'point-cluster',
+                    iconSize: L.point(size, size)
+                });
+            }
+            function update() {
+                var map = layer._map;
+                if (!map) { return; }
+                var zoom = Math.max(Math.floor(map.getZoom()), clusters.min_zoom);
+                var key = zoom > clusters.max_zoom ? 'points' : String(zoom);
+                if (key === current) { return; }
+                current = key;
+                layer.clearLayers();
+                markers.clearLayers();
+                if (key === 'points') {
+                    layer.addData(features);
+                    return;
+                }
+                var level = clusters.levels[key];
+                layer.addData(clusters.always.concat(level.points).map(function(i) { return features[i]; }));
+                level.clusters.forEach(function(cluster) {
+                    L.marker([cluster[1], cluster[0]], {icon: icon(cluster[2])})
+                        .on('click', function(e) { map.setView(e.latlng, Math.min(zoom + 2, clusters.max_zoom + 1)); })
+                        .addTo(markers);
+                });
+            }
+            function show() {
+                markers.addTo(layer._map);
+                layer._map.on('zoomend', update);
+                current = null;
+                update();
+            }
+            layer.on('add', show);
+            layer.on('remove', function() {
+                layer._map.off('zoomend', update);
+                markers.remove();
+            });
+            if (layer._map) { show(); }
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, clusters: dict, color: str | None = None) -> None:
+        super().__init__()
+        self._name = "PointClusters"
+        self.clusters = clusters
+        self.color = color or DEFAULT_CLUSTER_COLOR
+    # End def __init__
+# End class PointClusters
+
+# ======================================================================================================================
+# Vector tiles
+# ======================================================================================================================
+
+class VectorTileLayer(VectorGridProtobuf):
+    """Layer loading its features as Mapbox Vector Tiles and styling them with a `Style`.
+
+    Fill patterns are not supported as the tiles are drawn on a canvas.
+    """
+
+    def __init__(self, url: str, style: Style | None = None, *, name: str | None = None, show: bool = True) -> None:
+        super().__init__(url, name=name, options=self.__options(style), show=show)
+    # End def __init__
+
+    @staticmethod
+    def __options(style: Style | None) -> str:
+        """Build the options of the layer as a JavaScript object (the style is a function)."""
+        table = style.compile() if style is not None else {"base": {}, "keys": [], "rules": {}}
+        defaults = {
+            LEAFLET_STYLE_ATTRIBUTES[attr]: value for attr, value in DEFAULT_STYLE.items() if value is not None
+        }
+        table["base"] = {**defaults, **table["base"]}
+
+        # Drop the fill patterns, which cannot be drawn on a canvas
+        table["base"].pop("fillPattern", None)
+        for rules in table["rules"].values():
+            for rule in rules.values():
+                rule.pop("fillPattern", None)
+
+        return (
+            "{"
+            "rendererFactory: L.canvas.tile, "
+            "interactive: true, "
+            f"maxNativeZoom: {MAX_TILE_ZOOM}, "
+            f"vectorTileLayerStyles: {{{json.dumps(TILE_LAYER_NAME)}: {STYLE_LOOKUP_JS}({json.dumps(table)}, {{}})}}"
+            "}"
+        )
+    # End def __options
+# End class VectorTileLayer
+
+
+class VectorTileTooltip(MacroElement):
+    """Tooltip displaying the properties of the feature hovered on a `VectorTileLayer`."""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var layer = {{ this._parent.get_name() }};
+            var fields = {{ this.fields|tojson }};
+            var aliases = {{ this.aliases|tojson }};
+            var tooltip = L.tooltip({sticky: {{ this.sticky|tojson }}});
+            function escape(value) {
+                return String(value).replace(/[&<>"']/g, function(c) {
+                    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                });
+            }
+            function content(properties) {
+                var rows = fields.map(function(field, i) {
+                    var value = properties[field] === undefined || properties[field] === null ? '' : properties[field];
+                    return '<tr><th>' + escape(aliases[i]) + '</th><td>' + escape(value) + '</td></tr>';
+                });
+                return '<table>' + rows.join('') + '</table>';
+            }
+            layer.on('mouseover', function(e) {
+                tooltip.setContent(content(e.layer.properties || {})).setLatLng(e.latlng);
+                layer._map.openTooltip(tooltip);
+            });
+            {% if this.sticky %}
+            layer.on('mousemove', function(e) { tooltip.setLatLng(e.latlng); });
+            {% endif %}
+            layer.on('mouseout', function() { layer._map.closeTooltip(tooltip); });
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, fields: Iterable[str], aliases: Iterable[str], sticky: bool = True) -> None:
+        super().__init__()
+        self._name = "VectorTileTooltip"
+        self.fields = list(fields)
+        self.aliases = list(aliases)
+        self.sticky = sticky
+    # End def __init__
+# End class VectorTileTooltip
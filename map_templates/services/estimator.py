@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Render estimator service module for the `map_templates` application.
+
+Estimates the size of the render of a map template without building the map (dry run), to catch the
+templates producing unusable pages before rendering them:
+- The layers displaying all the features of their dataset layer are estimated from the statistics
+  of the dataset layer, and from the average size of the properties of a sample of its features.
+- The other layers are estimated from a single SQL aggregate over the features they display,
+  which counts the features and their vertices, without serializing them.
+The size of the GeoJSON of a layer is then estimated from its number of features and vertices,
+and from the size of the properties it displays.
+The size of the render is checked against the budget of its template if set, against `RENDER_BUDGET_BYTES`
+otherwise, reporting the layers the degradation ladder would degrade (see `services.degradation`).
+"""
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+from datasets.models import DatasetLayer, Feature
+from map_templates.services.features import (BoundaryType, FeatureGroup as FeatureGroupObject, Layer as LayerObject,
+                                             SourceType)
+from map_templates.services.templates import MapTemplate as MapTemplateObject
+from map_templates.services.vector_tiles import filter_to_sql
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+logger = logging.getLogger(__name__)
+
+# Budgets of a render, above which the estimate warns. The size budget applies to the templates without budget.
+RENDER_BUDGET_BYTES = getattr(settings, "MAP_RENDER_BUDGET_BYTES", 20 * 1024 * 1024)
+RENDER_BUDGET_FEATURES = getattr(settings, "MAP_RENDER_BUDGET_FEATURES", 100_000)
+RENDER_BUDGET_VERTICES = getattr(settings, "MAP_RENDER_BUDGET_VERTICES", 2_000_000)
+
+# Average size in bytes of a vertex in GeoJSON, e.g. '[6.175715123456789,49.11930812345678],'
+VERTEX_BYTES = 38
+# Average size in bytes of a GeoJSON feature without its coordinates and properties
+FEATURE_BYTES = 90
+# Number of features sampled to estimate the average size of the properties of a layer
+SAMPLE_SIZE = 1000
+
+# Subset of the fields of a feature `f` to the keys given as parameter
+PROPERTIES_SQL = """
+    COALESCE(
+        (SELECT jsonb_object_agg(p.key, p.value) FROM jsonb_each(f.fields) AS p WHERE p.key = ANY(%s)),
+        '{}'::jsonb
+    )
+"""
+
+# ======================================================================================================================
+# Estimates
+# ======================================================================================================================
+
+class LayerEstimate:
+    """Estimate of the data of a layer."""
+
+    def __init__(self, name: str, source: str) -> None:
+        self.name : str = name
+        # How the layer was estimated: "statistics", "aggregate" or "tiles"
+        self.source : str = source
+        self.features : int = 0
+        self.vertices : int = 0
+        self.bytes : int = 0
+    # End def __init__
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "source": self.source,
+            "features": self.features,
+            "vertices": self.vertices,
+            "bytes": self.bytes,
+        }
+    # End def to_dict
+# End class LayerEstimate
+
+
+class RenderEstimate:
+    """Estimate of the render of a map template."""
+
+    def __init__(self, layers: list[LayerEstimate] | None = None, render_budget: int | None = None) -> None:
+        self.layers : list[LayerEstimate] = layers if layers is not None else []
+        # The budget of the template in bytes, which the degradation ladder meets, None if it has none
+        self.render_budget : int | None = render_budget
+    # End def __init__
+
+    @property
+    def features(self) -> int:
+        return sum(layer.features for layer in self.layers)
+    # End def features
+
+    @property
+    def vertices(self) -> int:
+        return sum(layer.vertices for layer in self.layers)
+    # End def vertices
+
+    @property
+    def bytes(self) -> int:
+        return sum(layer.bytes for layer in self.layers)
+    # End def bytes
+
+    @property
+    def budget(self) -> int:
+        """The size budget of the render in bytes: the budget of the template, or `RENDER_BUDGET_BYTES`."""
+        return self.render_budget if self.render_budget is not None else RENDER_BUDGET_BYTES
+    # End def budget
+
+    def degraded_layers(self) -> list[LayerEstimate]:
+        """Get the layers the degradation ladder would degrade to meet the budget of the template, heaviest first.
+
+        The ladder degrades the heaviest layers first: these are the heaviest layers whose data must shrink for
+        the render to meet the budget. How far each one is degraded is only known once its data is generated.
+        """
+        if self.render_budget is None:
+            return []
+        degraded = []
+        remaining = self.bytes
+        for layer in sorted(self.layers, key=lambda l: l.bytes, reverse=True):
+            if remaining <= self.render_budget or layer.bytes == 0:
+                break
+            degraded.append(layer)
+            remaining -= layer.bytes
+        return degraded
+    # End def degraded_layers
+
+    def warnings(self) -> list[str]:
+        """Get the warnings of the budgets exceeded by the render."""
+        warnings = []
+        if self.bytes > self.budget:
+            size = f"The map would weigh about {self.bytes / 1024 / 1024:.1f} MB, above the budget of "
+            if self.render_budget is not None:
+                names = ", ".join(f"'{layer.name}'" for layer in self.degraded_layers())
+                warnings.append(f"{size}its template of {self.budget / 1024 / 1024:.1f} MB "
+                                f"(layers to degrade: {names}).")
+            else:
+                heaviest = max(self.layers, key=lambda l: l.bytes).name
+                warnings.append(f"{size}{self.budget / 1024 / 1024:.1f} MB (heaviest layer: '{heaviest}').")
+        if self.features > RENDER_BUDGET_FEATURES:
+            warnings.append(f"The map would display {self.features} features, above the budget of "
+                            f"{RENDER_BUDGET_FEATURES} features.")
+        if self.vertices > RENDER_BUDGET_VERTICES:
+            warnings.append(f"The map would display {self.vertices} vertices, above the budget of "
+                            f"{RENDER_BUDGET_VERTICES} vertices.")
+        return warnings
+    # End def warnings
+
+    def to_dict(self) -> dict:
+        """Convert the estimate to a dictionary, the heaviest layers first."""
+        return {
+            "features": self.features,
+            "vertices": self.vertices,
+            "bytes": self.bytes,
+            "budget": self.budget,
+            "degraded_layers": [layer.name for layer in self.degraded_layers()],
+            "warnings": self.warnings(),
+            "layers": [layer.to_dict() for layer in sorted(self.layers, key=lambda l: l.bytes, reverse=True)],
+        }
+    # End def to_dict
+# End class RenderEstimate
+
+# ======================================================================================================================
+# Estimation
+# ======================================================================================================================
+
+def layer_conditions(layer: LayerObject) -> tuple[list[str], list]:
+    """Get the SQL conditions selecting the features `f` displayed by a layer."""
+    srid = Feature._meta.get_field("geometry").srid
+    conditions = ["f.layer_id = %s"]
+    params : list = [layer.dataset_layer_id]
+
+    # 1. Apply the boundaries of the layer
+    if layer.boundaries is not None:
+        boundaries = f"ST_Transform(ST_GeomFromEWKT(%s), {srid})"
+        if layer.boundary_type in (BoundaryType.INTERSECT, BoundaryType.CROP):
+            conditions.append(f"ST_Intersects(f.geometry, {boundaries})")
+        elif layer.boundary_type == BoundaryType.STRICT:
+            conditions.append(f"ST_Within(f.geometry, {boundaries})")
+        else:
+            raise ValueError(f"Invalid boundary type for layer {layer}")
+        params.append(layer.boundaries.ewkt)
+
+    # 2. Apply the filters of the layer
+    for filter_ in layer.filters:
+        condition, filter_params = filter_to_sql(filter_)
+        conditions.append(condition)
+        params.extend(filter_params)
+    return conditions, params
+# End def layer_conditions
+
+
+def estimate_layer(layer: LayerObject) -> LayerEstimate:
+    """Estimate the data of a layer.
+
+    The vertices of the layers cropping their features to their boundaries are counted before cropping,
+    which over-estimates them.
+    """
+    # 1. The data of the layers served as vector tiles is not part of the render
+    if layer.source_type == SourceType.VECTOR_TILES:
+        return LayerEstimate(layer.name, "tiles")
+
+    table = Feature._meta.db_table
+    properties = layer.required_properties()
+    statistics = DatasetLayer.objects.filter(id=layer.dataset_layer_id).values('feature_count', 'vertex_count').first()
+    if statistics is None:
+        raise ValueError(f"Dataset layer with id '{layer.dataset_layer_id}' does not exist")
+
+    # 2. Estimate the layers displaying all the features of their dataset layer from its statistics,
+    #    and the size of their properties from a sample of the features
+    if (layer.boundaries is None and not layer.filters
+            and statistics['feature_count'] is not None and statistics['vertex_count'] is not None):
+        estimate = LayerEstimate(layer.name, "statistics")
+        estimate.features = statistics['feature_count']
+        estimate.vertices = statistics['vertex_count']
+        query = f"""
+            SELECT count(*), COALESCE(sum(octet_length(sample.properties::text)), 0)
+            FROM (SELECT {PROPERTIES_SQL} AS properties FROM {table} AS f WHERE f.layer_id = %s LIMIT %s) AS sample
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(query, [properties, layer.dataset_layer_id, SAMPLE_SIZE])
+            sampled, sampled_bytes = cursor.fetchone()
+        properties_bytes = int(sampled_bytes / sampled * estimate.features) if sampled else 0
+
+    # 3. Otherwise, aggregate the features displayed by the layer
+    else:
+        estimate = LayerEstimate(layer.name, "aggregate")
+        conditions, params = layer_conditions(layer)
+        query = f"""
+            SELECT count(*),
+                   COALESCE(sum(ST_NPoints(f.geometry)), 0),
+                   COALESCE(sum(octet_length(({PROPERTIES_SQL})::text)), 0)
+            FROM {table} AS f
+            WHERE {" AND ".join(conditions)}
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(query, [properties, *params])
+            estimate.features, estimate.vertices, properties_bytes = (int(value) for value in cursor.fetchone())
+
+    # 4. Estimate the size of the GeoJSON of the layer
+    estimate.bytes = estimate.features * FEATURE_BYTES + estimate.vertices * VERTEX_BYTES + properties_bytes
+    logger.debug(f"Layer '{layer.name}' estimated to {estimate.features} features, {estimate.vertices} vertices "
+                 f"and {estimate.bytes} bytes ({estimate.source}).")
+    return estimate
+# End def estimate_layer
+
+
+def estimate_template(template: MapTemplateObject) -> RenderEstimate:
+    """Estimate the render of a map template, from the layers it displays, against its budget."""
+    layers = []
+    for feature in template.features:
+        if feature.display is False:
+            continue
+        if isinstance(feature, LayerObject):
+            layers.append(feature)
+        elif isinstance(feature, FeatureGroupObject):
+            layers.extend(f for f in feature if isinstance(f, LayerObject) and f.display is not False)
+    return RenderEstimate([estimate_layer(layer) for layer in layers], template.render_budget)
+# End def estimate_template
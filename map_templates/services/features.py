@@ -15,7 +15,7 @@ from datasets.models import DatasetLayer
 from map_templates import models
 from map_templates.services.filters import Filter
 from map_templates.services.styles import Style
-from map_templates.utils import repr_str
+from map_templates.utils import repr_str, sorted_dicts
 
 
 # ======================================================================================================================
@@ -36,6 +36,12 @@ class BoundaryType(enum.Enum):
     CROP = "crop"
 # End class BoundaryType
 
+class SourceType(enum.Enum):
+    """How the data of a layer is delivered to the map."""
+    GEOJSON = "geojson"
+    VECTOR_TILES = "vector_tiles"
+# End class SourceType
+
 # ======================================================================================================================
 # ToolTip and Popup Class
 # ======================================================================================================================
@@ -101,7 +107,8 @@ class ToolTip:
             raise ValueError(f"Invalid type '{data.get('__type__', None)}'")
         return ToolTip(
             fields=data["fields"],
-            aliases=data["aliases"]
+            aliases=data["aliases"],
+            sticky=data.get("sticky", False)
         )
     # End def from_dict
 
@@ -117,7 +124,8 @@ class ToolTip:
 
         fields = []
         aliases = []
-        for field in model.fields.all().order_by('index'):
+        # Sorted in Python rather than by the database, so that prefetched fields are reused
+        for field in sorted(model.fields.all(), key=lambda f: f.index):
             fields.append(field.field.name)
             aliases.append(field.alias)
 
@@ -219,10 +227,14 @@ class Layer(Feature):
             highlight : Style | None = None,
             filters : Filter | Collection[Filter] | Iterable[Filter] | None = None,
             show_on_startup : bool = True,
-            display : bool = True
-
+            display : bool = True,
+            source_type : SourceType = SourceType.GEOJSON,
+            layer_id : int | None = None,
+            clustering : bool = False,
+            check_dataset_layer : bool = True
     ) -> None:
         super().__init__(name, FeatureType.LAYER, z_index=z_index)
+        self.layer_id         : int | None          = layer_id
         self.dataset_layer_id : int                 = dataset_layer_id
         self.tooltip          : ToolTip | None      = tooltip
         self.boundaries       : GEOSGeometry | None = boundaries
@@ -232,9 +244,11 @@ class Layer(Feature):
         self.highlight        : Style | None        = highlight
         self.show_on_startup  : bool                = show_on_startup
         self.display          : bool                = display
+        self.source_type      : SourceType          = source_type
+        self.clustering       : bool                = clustering
 
-        # Ensure that the dataset layer exists
-        if not DatasetLayer.objects.filter(id=dataset_layer_id).exists():
+        # Ensure that the dataset layer exists, unless the caller checked it already
+        if check_dataset_layer and not DatasetLayer.objects.filter(id=dataset_layer_id).exists():
             raise ValueError(f"Dataset layer with id '{dataset_layer_id}' does not exist")
 
         # add filters
@@ -261,7 +275,9 @@ class Layer(Feature):
             self.style            == other.style,
             self.highlight        == other.highlight,
             self.filters          == other.filters,
-            self.show_on_startup  == other.show_on_startup])
+            self.show_on_startup  == other.show_on_startup,
+            self.source_type      == other.source_type,
+            self.clustering       == other.clustering])
     # End def __eq__
 
     def __hash__(self):
@@ -272,7 +288,9 @@ class Layer(Feature):
                      self.style,
                      self.highlight,
                      frozenset(self.filters),
-                     self.show_on_startup))
+                     self.show_on_startup,
+                     self.source_type,
+                     self.clustering))
     # End def __hash__
 
     def __repr__(self):
@@ -288,6 +306,27 @@ class Layer(Feature):
         self.filters.append(filter_)
     # End def add_filter
 
+    # ------------------------------------------------------------------------------------------------------------------
+    # Properties of the features
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def displayed_properties(self) -> list[str]:
+        """Get the properties of the features needed on the client side, i.e. by the tooltip and the styles."""
+        properties = []
+        if self.tooltip is not None:
+            properties.extend(self.tooltip.fields)
+        for style in (self.style, self.highlight):
+            if style is not None:
+                properties.extend(property_style.key for property_style in style.property_styles)
+        # Remove the duplicates while keeping the order
+        return list(dict.fromkeys(properties))
+    # End def displayed_properties
+
+    def required_properties(self) -> list[str]:
+        """Get the properties of the features needed to render the layer, i.e. displayed or filtered on."""
+        return list(dict.fromkeys([*self.displayed_properties(), *(filter_.key for filter_ in self.filters)]))
+    # End def required_properties
+
     # ------------------------------------------------------------------------------------------------------------------
     # Methods
     # ------------------------------------------------------------------------------------------------------------------
@@ -306,6 +345,11 @@ class Layer(Feature):
         if not isinstance(self.boundary_type, BoundaryType):
             raise ValueError(f"Invalid boundary type '{self.boundary_type}'")
 
+        if not isinstance(self.source_type, SourceType):
+            raise ValueError(f"Invalid source type '{self.source_type}'")
+        if self.source_type == SourceType.VECTOR_TILES and self.layer_id is None:
+            raise ValueError("A layer served as vector tiles must be bound to a saved layer ('layer_id' is None)")
+
         for idx, filter_ in enumerate(self.filters):
             if not isinstance(filter_, Filter):
                 raise ValueError(f"Expected 'filters@{idx}' to be of type 'Filter', not '{type(filter_)}'")
@@ -320,25 +364,40 @@ class Layer(Feature):
     # ------------------------------------------------------------------------------------------------------------------
 
     @staticmethod
-    def from_model(layer: models.Layer) -> Layer:
-        """Convert a model to a Layer object"""
+    def from_model(layer: models.Layer, *, check_dataset_layer: bool = True) -> Layer:
+        """Convert a model to a Layer object
+
+        Args:
+            layer (models.Layer): The layer model. Its relations are best fetched beforehand,
+                see `map_templates.services.loader.layer_queryset`.
+            check_dataset_layer (bool): Whether to check that the dataset layer exists.
+                Default is True.
+        """
         if not isinstance(layer, models.Layer):
             raise ValueError(f"Expected 'model' to be of a 'Layer' model, not '{type(layer)}'")
 
         boundary_type = BoundaryType(layer.boundary_type) if layer.boundary_type else BoundaryType.INTERSECT
+        source_type = SourceType(layer.source_type) if layer.source_type else SourceType.GEOJSON
 
         return Layer(
+            layer_id=layer.id,
             name=layer.name,
-            dataset_layer_id=layer.dataset_layer.id,
+            dataset_layer_id=layer.dataset_layer_id,
             z_index=layer.z_index,
             tooltip=ToolTip.from_model(layer.tooltip) if layer.has_tooltip() is True else None,
             boundaries=GEOSGeometry(layer.boundaries) if layer.boundaries else None,
             boundary_type=boundary_type,
             style=Style.from_model(layer.style) if layer.style else None,
             highlight=Style.from_model(layer.highlight) if layer.highlight else None,
-            filters=[Filter(key=f.key, operator=f.operator, value=f.value) for f in layer.filters.all()],
+            filters=[
+                Filter(key=f.key, operator=f.operator, value=f.value, value_type=f.value_type)
+                for f in layer.filters.all()
+            ],
             show_on_startup=layer.show,
-            display=layer.display
+            display=layer.display,
+            source_type=source_type,
+            clustering=layer.clustering,
+            check_dataset_layer=check_dataset_layer
         )
 
     def to_model(self) -> models.Layer:
@@ -365,18 +424,27 @@ class Layer(Feature):
     # End def serialize
 
     @staticmethod
-    def deserialize(data: str | dict, method: Literal['json', 'dict'] = 'json', **kwargs) -> Layer:
-        """Deserialize the layer."""
+    def deserialize(data: str | dict,
+                    method: Literal['json', 'dict'] = 'json',
+                    *,
+                    check_dataset_layer: bool = True,
+                    **kwargs) -> Layer:
+        """Deserialize the layer.
+
+        Args:
+            check_dataset_layer (bool): Whether to check that the dataset layer exists, querying the database.
+        """
         if method == 'json':
-            return Layer._from_dict(json.loads(data, **kwargs))
+            return Layer._from_dict(json.loads(data, **kwargs), check_dataset_layer=check_dataset_layer)
         if method == 'dict':
-            return Layer._from_dict(data)
+            return Layer._from_dict(data, check_dataset_layer=check_dataset_layer)
         raise ValueError(f"Invalid method '{method}'")
     # End def deserialize
 
     def _to_dict(self) -> dict:
         return {
             "__type__"         : "__Layer__",
+            "layer_id"         : self.layer_id,
             "name"             : self.name,
             "dataset_layer_id" : self.dataset_layer_id,
             "z_index"          : self.z_index,
@@ -385,15 +453,20 @@ class Layer(Feature):
             "highlight"        : self.highlight.serialize('dict') if self.highlight else None,
             "filters"          : [f.serialize('dict') for f in self.filters],
             "show"             : self.show_on_startup,
-            "display"          : self.display
+            "display"          : self.display,
+            "source_type"      : self.source_type.value,
+            "boundaries"       : self.boundaries.ewkt if self.boundaries is not None else None,
+            "boundary_type"    : self.boundary_type.value,
+            "clustering"       : self.clustering
         }
     # End def to_dict
 
     @staticmethod
-    def _from_dict(data: dict) -> Layer:
+    def _from_dict(data: dict, *, check_dataset_layer: bool = True) -> Layer:
         if data.get("__type__", None) != "__Layer__":
             raise ValueError(f"Invalid type '{data.get('__type__', None)}'")
         return Layer(
+            layer_id=data.get("layer_id", None),
             name=data["name"],
             dataset_layer_id=data["dataset_layer_id"],
             z_index=data["z_index"],
@@ -402,7 +475,12 @@ class Layer(Feature):
             highlight=Style.deserialize(data["highlight"], 'dict') if data["highlight"] else None,
             filters=[Filter.deserialize(f, 'dict') for f in data["filters"]],
             show_on_startup=data["show"],
-            display=data["display"] if "display" in data else True
+            display=data["display"] if "display" in data else True,
+            source_type=SourceType(data.get("source_type", SourceType.GEOJSON.value)),
+            boundaries=GEOSGeometry(data["boundaries"]) if data.get("boundaries", None) else None,
+            boundary_type=BoundaryType(data.get("boundary_type", BoundaryType.INTERSECT.value)),
+            clustering=data.get("clustering", False),
+            check_dataset_layer=check_dataset_layer
         )
     # End def from_dict
 # End class Layer
@@ -519,7 +597,7 @@ class FeatureGroup(MutableSet, Feature):
     # ------------------------------------------------------------------------------------------------------------------
 
     @staticmethod
-    def from_model(feature_group: models.FeatureGroup) -> FeatureGroup:
+    def from_model(feature_group: models.FeatureGroup, *, check_dataset_layer: bool = True) -> FeatureGroup:
         """Convert a model to a FeatureGroup object"""
         if not isinstance(feature_group, models.FeatureGroup):
             raise ValueError(f"Expected 'model' to be of a 'FeatureGroup' model, not '{type(feature_group)}'")
@@ -528,7 +606,10 @@ class FeatureGroup(MutableSet, Feature):
             name=feature_group.name,
             z_index=feature_group.z_index,
             show_on_startup=feature_group.show_on_startup,
-            features=[Layer.from_model(layer) for layer in feature_group.layers.all()],
+            features=[
+                Layer.from_model(layer, check_dataset_layer=check_dataset_layer)
+                for layer in feature_group.layers.all()
+            ],
             display=feature_group.display
         )
     # End def from_model
@@ -556,13 +637,23 @@ class FeatureGroup(MutableSet, Feature):
         raise ValueError(f"Invalid method '{method}'")
     # End def serialize
 
-    def deserialize(self, data: str | dict, method: Literal['json', 'dict'] = 'json', **kwargs) -> FeatureGroup:
-        """Deserialize the feature group."""
+    @staticmethod
+    def deserialize(data: str | dict,
+                    method: Literal['json', 'dict'] = 'json',
+                    *,
+                    check_dataset_layer: bool = True,
+                    **kwargs) -> FeatureGroup:
+        """Deserialize the feature group.
+
+        Args:
+            check_dataset_layer (bool): Whether to check that the dataset layers exist, querying the database.
+        """
         if method == 'json':
-            return FeatureGroup.__from_dict(json.loads(data, **kwargs))
+            return FeatureGroup.__from_dict(json.loads(data, **kwargs), check_dataset_layer=check_dataset_layer)
         if method == 'dict':
-            return FeatureGroup.__from_dict(data)
+            return FeatureGroup.__from_dict(data, check_dataset_layer=check_dataset_layer)
         raise ValueError(f"Invalid method '{method}'")
+    # End def deserialize
 
     def __to_dict(self) -> dict:
         return {
@@ -570,25 +661,19 @@ class FeatureGroup(MutableSet, Feature):
             "name" : self.name,
             "z_index" : self.z_index,
             "show_on_startup" : self.show_on_startup,
-            "features" : [feature.serialize('dict') for feature in self.__features],
+            "features" : sorted_dicts(feature.serialize('dict') for feature in self.__features),
             "display" : self.display
         }
     # End def to_dict
 
     @staticmethod
-    def __from_dict(data: dict) -> FeatureGroup:
+    def __from_dict(data: dict, *, check_dataset_layer: bool = True) -> FeatureGroup:
         if data.get("__type__", None) != "__FeatureGroup__":
             raise ValueError(f"Expected '__type__' to be '__FeatureGroup__', not '{data.get('__type__', None)}'")
 
-        features = []
-        for feature in data["features"]:
-            if feature.get("__type__", None) == "__Layer__":
-                features.append(Layer.deserialize(feature, 'dict'))
-            elif feature.get("__type__", None) == "__FeatureGroup__":
-                features.append(FeatureGroup.deserialize(feature, 'dict'))
-            else:
-                raise ValueError(f"Invalid type '{feature.get('__type__', None)}'")
-
+        features = [
+            deserialize_feature(feature, check_dataset_layer=check_dataset_layer) for feature in data["features"]
+        ]
 
         return FeatureGroup(
             name=data["name"],
@@ -598,4 +683,25 @@ class FeatureGroup(MutableSet, Feature):
             display=data["display"] if "display" in data else True
         )
     # End def from_dict
-# End class FeatureGroup
\ No newline at end of file
+# End class FeatureGroup
+
+# ======================================================================================================================
+# Functions
+# ======================================================================================================================
+
+def deserialize_feature(data: dict, *, check_dataset_layer: bool = True) -> Feature:
+    """Deserialize a feature from its dictionary, whatever its type.
+
+    Args:
+        data (dict): The serialized feature, see `Feature.serialize`.
+        check_dataset_layer (bool): Whether to check that the dataset layers exist, querying the database.
+
+    Raises:
+        ValueError: If the type of the feature is unknown.
+    """
+    if data.get("__type__", None) == "__Layer__":
+        return Layer.deserialize(data, 'dict', check_dataset_layer=check_dataset_layer)
+    if data.get("__type__", None) == "__FeatureGroup__":
+        return FeatureGroup.deserialize(data, 'dict', check_dataset_layer=check_dataset_layer)
+    raise ValueError(f"Invalid type '{data.get('__type__', None)}'")
+# End def deserialize_feature
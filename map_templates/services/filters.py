@@ -20,14 +20,18 @@ class Filter:
         "<=": operator.le
     }
 
+    value_types = ("string", "number", "boolean")
+
     def __init__(
             self,
             key: str,
             operator: Literal['==', '!=', '>', '>=', '<', '<='] | Callable[[str, str], bool],
             value: str,
+            value_type: Literal['string', 'number', 'boolean'] = "string",
     ) -> None:
-        self.value    : str = value
-        self.key      : str = key
+        self.value      : str = value
+        self.key        : str = key
+        self.value_type : str = value_type
         self.operator = operator
     # End def __init__
 
@@ -54,13 +58,20 @@ class Filter:
             raise TypeError(f"Expected 'operator' to be of type 'str' or 'Callable', not '{type(operator_)}'")
     # End def op
 
+    @property
+    def symbol(self) -> str:
+        """Get the symbol of the operator (e.g. '==')."""
+        return next(symbol for symbol, op in Filter.operator_map.items() if op is self.__op)
+    # End def symbol
+
     # ------------------------------------------------------------------------------------------------------------------
     # Methods
     # ------------------------------------------------------------------------------------------------------------------
 
     def validate(self):
         """Validate the filter."""
-        pass
+        if self.value_type not in Filter.value_types:
+            raise ValueError(f"Invalid value type '{self.value_type}'")
     # End def validate
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -90,8 +101,9 @@ class Filter:
         return {
             "__type__" : "__Filter__",
             "key" : self.key,
-            "op" : list(Filter.operator_map.keys())[list(Filter.operator_map.values()).index(self.op)],
-            "value" : self.value
+            "op" : self.symbol,
+            "value" : self.value,
+            "value_type" : self.value_type
         }
     # End def _to_dict
 
@@ -103,6 +115,7 @@ class Filter:
         return Filter(
             key=data["key"],
             operator=data["op"],
-            value=data["value"]
+            value=data["value"],
+            value_type=data.get("value_type", "string")
         )
     # End def _from_dict
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Fingerprint service module for the `map_templates` application.
+
+The fingerprint of a map template identifies everything a render of the template is made of:
+the definition of the template, the features of the dataset layers it displays, and the
+pre-rendered tiles it references. A render whose fingerprint matches the current one is up to date.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Iterable
+
+from datasets.models import DatasetLayer
+from map_templates.services.features import SourceType
+from map_templates.services.mbtiles import prebuilt_tile_url
+from map_templates.services.templates import MapTemplate as MapTemplateObject
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+# Bump when the output of the processor changes for an unchanged template, to invalidate all the renders
+FINGERPRINT_VERSION = 1
+
+# ======================================================================================================================
+# Fingerprint
+# ======================================================================================================================
+
+def dataset_checksums(dataset_layer_ids: Iterable[int]) -> dict[int, str | None]:
+    """Get the checksums of the features of some dataset layers, in a single query."""
+    return dict(DatasetLayer.objects.filter(id__in=set(dataset_layer_ids)).values_list("id", "checksum"))
+# End def dataset_checksums
+
+
+def template_fingerprint(template: MapTemplateObject, template_id: int | None = None) -> str | None:
+    """Compute the fingerprint of a map template.
+
+    Args:
+        template (MapTemplateObject): The template.
+        template_id (int | None): The id of the template model, used to find its pre-rendered tiles.
+
+    Returns:
+        str | None: The hexadecimal SHA-256 of the template and of the checksums of its data,
+            or None if the checksum of some data is unknown (e.g. its features were never generated).
+    """
+    layers = list(template.layers())
+
+    # 1. Get the checksums of the features of the dataset layers
+    dataset_layer_ids = {layer.dataset_layer_id for layer in layers}
+    checksums = dataset_checksums(dataset_layer_ids)
+    if any(checksums.get(id_, None) is None for id_ in dataset_layer_ids):
+        return None
+
+    # 2. Get the pre-rendered tiles referenced by the vector tile layers
+    tile_urls = {}
+    if template_id is not None:
+        for layer in layers:
+            if layer.source_type == SourceType.VECTOR_TILES:
+                tile_urls[str(layer.layer_id)] = prebuilt_tile_url(template_id, layer)
+
+    payload = {
+        "version": FINGERPRINT_VERSION,
+        "template": template.serialize(method='dict'),
+        "data": sorted([id_, checksums[id_]] for id_ in dataset_layer_ids),
+        "tiles": tile_urls,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+# End def template_fingerprint
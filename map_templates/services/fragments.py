@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Layer fragments service module for the `map_templates` application.
+
+A fragment is the GeoJSON data of a layer, i.e. the features of its dataset layer once bounded and filtered.
+Fragments are cached on disk under a key identifying the definition of the data of the layer and the
+checksum of the features it is made of, so that a template is re-rendered without querying and
+serializing the layers that did not change. The styles are not part of the fragments as they are
+compiled on each render, which is cheap, so iterating on the style of a layer reuses its data
+as long as it styles the same properties, the features holding only the properties the layer displays.
+
+The fragments are GeoJSON feature collections holding a feature per line, so that they are written
+and read feature by feature, without holding all the features of a layer in memory.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from django.conf import settings
+
+from map_templates.services.features import Layer as LayerObject
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+logger = logging.getLogger(__name__)
+
+FRAGMENTS_ROOT = Path(getattr(settings, "FRAGMENTS_ROOT", Path(settings.MEDIA_ROOT) / "fragments"))
+# Bump when the content of the fragments changes for an unchanged layer, to invalidate all the fragments
+FRAGMENT_VERSION = 3
+# Length of the prefix of the checksum of the data in the name of the fragments
+CHECKSUM_PREFIX_LENGTH = 16
+# Lines opening and closing the feature collection of a fragment, the features being on the lines in between
+COLLECTION_HEADER = '{"type":"FeatureCollection","features":[\n'
+COLLECTION_FOOTER = ']}\n'
+
+# ======================================================================================================================
+# Feature files
+# ======================================================================================================================
+
+def write_features(path: Path, features: Iterable[dict]) -> int:
+    """Write features to a GeoJSON file, a feature per line.
+
+    The file is written aside and moved in place, so that it is never read half-written.
+
+    Returns:
+        int: The number of features written.
+    """
+    count = 0
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(COLLECTION_HEADER)
+            for feature in features:
+                if count > 0:
+                    file.write(",\n")
+                # The serialized features never hold a line break, as they are escaped in the strings
+                file.write(json.dumps(feature, separators=(",", ":")))
+                count += 1
+            file.write(("\n" if count > 0 else "") + COLLECTION_FOOTER)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return count
+# End def write_features
+
+
+def iter_features(path: Path) -> Iterator[dict]:
+    """Read the features of a GeoJSON file written by `write_features`, one at a time."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.rstrip("\n").rstrip(",")
+            if line and line != COLLECTION_HEADER.rstrip("\n") and line != COLLECTION_FOOTER.rstrip("\n"):
+                yield json.loads(line)
+# End def iter_features
+
+
+def count_features(path: Path) -> int:
+    """Count the features of a GeoJSON file written by `write_features`, without parsing them."""
+    with open(path, "rb") as file:
+        lines = sum(1 for _ in file)
+    # The features are between the header and the footer
+    return lines - 2
+# End def count_features
+
+# ======================================================================================================================
+# Fragments
+# ======================================================================================================================
+
+def fragment_key(layer: LayerObject, checksum: str | None, degradation: int = 0) -> str | None:
+    """Get the key of the fragment of a layer.
+
+    Args:
+        layer (LayerObject): The layer.
+        checksum (str | None): The checksum of the features of its dataset layer.
+        degradation (int): The level of degradation of the geometries of the features,
+            see `map_templates.services.degradation`.
+
+    Returns:
+        str | None: The key, or None if the checksum is unknown, in which case the data cannot be cached.
+    """
+    if checksum is None:
+        return None
+    definition = {
+        "version": FRAGMENT_VERSION,
+        "dataset_layer_id": layer.dataset_layer_id,
+        "checksum": checksum,
+        "boundaries": layer.boundaries.ewkt if layer.boundaries is not None else None,
+        "boundary_type": layer.boundary_type.value,
+        "filters": [[f.key, f.symbol, str(f.value), f.value_type] for f in layer.filters],
+        "properties": sorted(layer.displayed_properties()),
+        "degradation": int(degradation),
+    }
+    return hashlib.sha256(json.dumps(definition, sort_keys=True).encode("utf-8")).hexdigest()
+# End def fragment_key
+
+
+def fragment_path(layer: LayerObject, checksum: str, key: str) -> Path:
+    """Get the path of the fragment of a layer.
+
+    The fragments are grouped by dataset layer and prefixed by the checksum of the data,
+    so that the fragments built from outdated data can be found and removed.
+    """
+    return FRAGMENTS_ROOT / str(layer.dataset_layer_id) / f"{checksum[:CHECKSUM_PREFIX_LENGTH]}-{key}.json"
+# End def fragment_path
+
+
+def cached_fragment(layer: LayerObject, checksum: str | None, degradation: int = 0) -> Path | None:
+    """Get the path of the cached fragment of a layer, None if it is not cached."""
+    key = fragment_key(layer, checksum, degradation)
+    if key is None:
+        return None
+    path = fragment_path(layer, checksum, key)
+    return path if path.is_file() else None
+# End def cached_fragment
+
+
+def write_fragment(layer: LayerObject,
+                   checksum: str | None,
+                   features: Iterable[dict],
+                   degradation: int = 0) -> Path | None:
+    """Cache the fragment of a layer and remove its fragments built from outdated data.
+
+    The features are consumed one at a time, see `write_features`.
+
+    Returns:
+        Path | None: The path of the fragment, or None if it cannot be cached.
+    """
+    key = fragment_key(layer, checksum, degradation)
+    if key is None:
+        return None
+    path = fragment_path(layer, checksum, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # 1. Remove the fragments of the dataset layer built from other data
+    prefix = f"{checksum[:CHECKSUM_PREFIX_LENGTH]}-"
+    for stale in path.parent.glob("*.json"):
+        if not stale.name.startswith(prefix):
+            stale.unlink(missing_ok=True)
+
+    # 2. Write the fragment
+    count = write_features(path, features)
+    logger.debug(f"Fragment of layer '{layer.name}' saved to '{path.name}' ({count} features).")
+    return path
+# End def write_fragment
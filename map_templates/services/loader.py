@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Template loader service module for the `map_templates` application.
+
+Builds the template objects from the models with a fixed number of queries, whatever the number of layers:
+the one-to-one relations of the layers (styles, highlights, patterns, tooltips) are joined, their one-to-many
+relations (filters, tooltip fields, property styles) are prefetched in bulk, and the dataset layers are
+checked at once by `MapTemplate.from_model`.
+"""
+from __future__ import annotations
+
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
+
+from map_templates import models
+from map_templates.services.features import Layer as LayerObject
+from map_templates.services.templates import MapTemplate as MapTemplateObject
+
+# ======================================================================================================================
+# Querysets
+# ======================================================================================================================
+
+def style_queryset(model) -> QuerySet:
+    """Get the styles of a model (`Style` or `PropertyStyle`) along with their fill patterns."""
+    return model.objects.select_related('circle_pattern', 'stripe_pattern')
+# End def style_queryset
+
+
+def layer_queryset() -> QuerySet:
+    """Get the layers along with all the relations needed to convert them to layer objects.
+
+    Evaluating the queryset takes 5 queries at most: the layers, their filters, their tooltip fields,
+    and the property styles of their styles and highlights.
+    """
+    return models.Layer.objects.select_related(
+        'tooltip',
+        'style__circle_pattern',
+        'style__stripe_pattern',
+        'highlight__circle_pattern',
+        'highlight__stripe_pattern',
+    ).prefetch_related(
+        'filters',
+        Prefetch('tooltip__fields', queryset=models.TooltipField.objects.select_related('field')),
+        Prefetch('style__property_styles', queryset=style_queryset(models.PropertyStyle)),
+        Prefetch('highlight__property_styles', queryset=style_queryset(models.PropertyStyle)),
+    )
+# End def layer_queryset
+
+
+def template_prefetches() -> list[str | Prefetch]:
+    """Get the lookups prefetching all the relations needed to convert a map template to a template object."""
+    return [
+        'tiles',
+        Prefetch('layers', queryset=layer_queryset()),
+        'feature_groups',
+        Prefetch('feature_groups__layers', queryset=layer_queryset()),
+    ]
+# End def template_prefetches
+
+# ======================================================================================================================
+# Loaders
+# ======================================================================================================================
+
+def load_layer(layer_id: int) -> LayerObject:
+    """Load a layer object from the id of its model.
+
+    Raises:
+        models.Layer.DoesNotExist: If the layer does not exist.
+    """
+    return LayerObject.from_model(layer_queryset().get(id=layer_id))
+# End def load_layer
+
+
+def load_template(template: models.MapTemplate | int) -> MapTemplateObject:
+    """Load a template object from a map template model or its id.
+
+    The relations of the template are fetched with a fixed number of queries, see `template_prefetches`.
+
+    Raises:
+        models.MapTemplate.DoesNotExist: If the map template does not exist.
+        ValueError: If the template is invalid, e.g. the dataset layer of a layer does not exist.
+    """
+    if isinstance(template, models.MapTemplate):
+        prefetch_related_objects([template], *template_prefetches())
+    else:
+        template = models.MapTemplate.objects.prefetch_related(*template_prefetches()).get(id=template)
+    return MapTemplateObject.from_model(template)
+# End def load_template
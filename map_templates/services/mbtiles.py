@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+MBTiles service module for the `map_templates` application.
+
+Pre-renders the vector tiles of the layers of a map template into an MBTiles-style SQLite file,
+so that the tiles can be served without hitting the database.
+The file follows the MBTiles schema, extended with a `layer_id` column as a single file holds all
+the layers of a template, and a `layers` table recording the definition the tiles were built from.
+Whether the map of the template is published is recorded in the metadata of the file, refreshed once
+a map is saved, so that the visibility of the tiles is checked without hitting the database either.
+"""
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sqlite3
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from common.choices import PublicationStatus
+from map_templates import models
+from map_templates.services.features import FeatureGroup as FeatureGroupObject, Layer as LayerObject, SourceType
+from map_templates.services.loader import load_layer
+from map_templates.services.templates import MAX_ZOOM, MIN_ZOOM, MapTemplate as MapTemplateObject
+from map_templates.services.vector_tiles import TILE_LAYER_NAME, dataset_layer_checksum, render_layer_tile, \
+    tile_definition_key
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+logger = logging.getLogger(__name__)
+
+MBTILES_ROOT = Path(getattr(settings, "MBTILES_ROOT", Path(settings.MEDIA_ROOT) / "tiles"))
+# URL of the pre-rendered tiles of a layer. The placeholders '{z}', '{x}' and '{y}' are filled by Leaflet.
+PREBUILT_TILE_URL_TEMPLATE = "/tiles/templates/{template_id}/{layer_id}/{{z}}/{{x}}/{{y}}.pbf"
+# Margin around the center of a template, in degrees, matching the maximum bounds of the rendered map
+BOUNDS_MARGIN = 1.5
+# Number of tiles rendered by a worker at once
+CHUNK_SIZE = 256
+# Latitude limits of the Web Mercator projection
+MAX_LATITUDE = 85.0511287798
+
+SCHEMA = """
+    CREATE TABLE metadata (name TEXT, value TEXT);
+    CREATE UNIQUE INDEX metadata_index ON metadata (name);
+    CREATE TABLE layers (layer_id INTEGER PRIMARY KEY, name TEXT, definition TEXT);
+    CREATE TABLE tiles (layer_id INTEGER, zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+    CREATE UNIQUE INDEX tile_index ON tiles (layer_id, zoom_level, tile_column, tile_row);
+"""
+
+# ======================================================================================================================
+# Tile grid
+# ======================================================================================================================
+
+def template_bounds(template: MapTemplateObject) -> tuple[float, float, float, float]:
+    """Get the bounds (west, south, east, north) of a template."""
+    return (
+        template.center.x - BOUNDS_MARGIN,
+        template.center.y - BOUNDS_MARGIN,
+        template.center.x + BOUNDS_MARGIN,
+        template.center.y + BOUNDS_MARGIN,
+    )
+# End def template_bounds
+
+
+def lonlat_to_tile(lon: float, lat: float, z: int) -> tuple[int, int]:
+    """Get the tile (x, y) containing a point at a given zoom level."""
+    n = 2 ** z
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+# End def lonlat_to_tile
+
+
+def tile_range(bounds: tuple[float, float, float, float], z: int) -> tuple[range, range]:
+    """Get the ranges of the tiles (x, y) covering some bounds at a given zoom level."""
+    west, south, east, north = bounds
+    min_x, min_y = lonlat_to_tile(west, north, z)
+    max_x, max_y = lonlat_to_tile(east, south, z)
+    return range(min_x, max_x + 1), range(min_y, max_y + 1)
+# End def tile_range
+
+
+def tile_children(tiles: Iterable[tuple[int, int]], bounds: tuple[float, float, float, float],
+                  z: int) -> list[tuple[int, int]]:
+    """Get the tiles of the zoom level `z + 1` covering the tiles of the zoom level `z`, within some bounds."""
+    xs, ys = tile_range(bounds, z + 1)
+    return [
+        (cx, cy)
+        for x, y in tiles
+        for cx in (2 * x, 2 * x + 1) if cx in xs
+        for cy in (2 * y, 2 * y + 1) if cy in ys
+    ]
+# End def tile_children
+
+
+def tile_layers(template: MapTemplateObject) -> list[LayerObject]:
+    """Get the displayed layers of a template served as vector tiles."""
+    layers = []
+    for feature in template.features:
+        if feature.display is False:
+            continue
+        sub_features = feature if isinstance(feature, FeatureGroupObject) else [feature]
+        for layer in sub_features:
+            if isinstance(layer, LayerObject) and layer.display and layer.source_type == SourceType.VECTOR_TILES:
+                layers.append(layer)
+    return sorted(layers, key=lambda l: l.layer_id)
+# End def tile_layers
+
+# ======================================================================================================================
+# Build
+# ======================================================================================================================
+
+def mbtiles_path(template_id: int) -> Path:
+    """Get the path of the MBTiles file of a template."""
+    return MBTILES_ROOT / f"{template_id}.mbtiles"
+# End def mbtiles_path
+
+
+def published_template_ids() -> set[int]:
+    """Get the ids of the templates of the published maps, whose tiles are served to everyone."""
+    return set(models.MapTemplate.objects
+               .filter(render__map__publication_status=PublicationStatus.PUBLISHED)
+               .values_list("id", flat=True))
+# End def published_template_ids
+
+
+def build_mbtiles(template: models.MapTemplate,
+                  *,
+                  min_zoom: int = MIN_ZOOM,
+                  max_zoom: int = MAX_ZOOM,
+                  jobs: int | None = None) -> Path:
+    """Pre-render the vector tile layers of a template into its MBTiles file.
+
+    The tiles are rendered zoom level by zoom level. A tile is only subdivided if some features
+    intersect it, so that the empty parts of the template bounds are skipped.
+    The file is written aside and moved in place once complete, so that it is never served half-built.
+
+    Args:
+        template (models.MapTemplate): The template to pre-render.
+        min_zoom (int): The lowest zoom level to render.
+        max_zoom (int): The highest zoom level to render.
+        jobs (int | None): The number of workers. Defaults to the number of CPUs.
+
+    Returns:
+        Path: The path of the MBTiles file.
+    """
+    if not MIN_ZOOM <= min_zoom <= max_zoom <= MAX_ZOOM:
+        raise ValueError(f"Expected {MIN_ZOOM} <= min_zoom <= max_zoom <= {MAX_ZOOM}, got {min_zoom} and {max_zoom}")
+
+    template_object = template.as_template_object()
+    layers = tile_layers(template_object)
+    bounds = template_bounds(template_object)
+    logger.info(f"Building the tiles of '{template.name}' ({len(layers)} layers, zoom {min_zoom} to {max_zoom})...")
+
+    # 1. Create the file aside
+    path = mbtiles_path(template.id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    db = sqlite3.connect(tmp_path)
+    try:
+        db.executescript(SCHEMA)
+        db.executemany("INSERT INTO metadata (name, value) VALUES (?, ?)", [
+            ("name", template.name),
+            ("format", "pbf"),
+            ("type", "overlay"),
+            ("minzoom", str(min_zoom)),
+            ("maxzoom", str(max_zoom)),
+            ("bounds", ",".join(str(b) for b in bounds)),
+            ("json", json.dumps({"vector_layers": [{"id": TILE_LAYER_NAME}]})),
+            ("generated_at", timezone.now().isoformat()),
+        ])
+
+        # 2. Render the tiles of each layer
+        _load_layer.cache_clear()
+        with _executor(jobs) as executor:
+            for layer in layers:
+                db.execute("INSERT INTO layers (layer_id, name, definition) VALUES (?, ?, ?)",
+                           (layer.layer_id, layer.name, tile_definition_key(layer, dataset_layer_checksum(layer))))
+                count = _build_layer(db, executor, layer, bounds, min_zoom, max_zoom)
+                logger.info(f"Layer '{layer.name}': {count} tiles rendered.")
+        # Read last, so that a map published during the build is taken into account
+        _write_published(db, template.id in published_template_ids())
+        db.commit()
+    except Exception:
+        db.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    db.close()
+
+    # 3. Move the file in place
+    os.replace(tmp_path, path)
+    logger.info(f"Tiles of '{template.name}' saved to '{path}'.")
+    return path
+# End def build_mbtiles
+
+
+def refresh_published() -> None:
+    """Record whether the maps of the templates are published in their MBTiles files, e.g. once a map is saved."""
+    published = published_template_ids()
+    for path in MBTILES_ROOT.glob("*.mbtiles"):
+        try:
+            template_id = int(path.stem)
+        except ValueError:
+            continue
+        try:
+            db = sqlite3.connect(path)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open the tiles '{path}': {e}")
+            continue
+        try:
+            _write_published(db, template_id in published)
+            db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not refresh the publication of the tiles '{path}': {e}")
+        finally:
+            db.close()
+# End def refresh_published
+
+
+def _write_published(db: sqlite3.Connection, published: bool) -> None:
+    """Record whether the map of the template of an MBTiles file is published, in its metadata."""
+    db.execute("INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)", ("published", "1" if published else "0"))
+# End def _write_published
+
+
+def _build_layer(db: sqlite3.Connection, executor: Executor, layer: LayerObject,
+                 bounds: tuple[float, float, float, float], min_zoom: int, max_zoom: int) -> int:
+    """Render the tiles of a layer into the MBTiles file, returns the number of tiles stored."""
+    xs, ys = tile_range(bounds, min_zoom)
+    candidates = [(x, y) for x in xs for y in ys]
+    stored = 0
+    for z in range(min_zoom, max_zoom + 1):
+        chunks = [candidates[i:i + CHUNK_SIZE] for i in range(0, len(candidates), CHUNK_SIZE)]
+        non_empty = []
+        rows = []
+        for results in executor.map(_render_tiles, repeat(layer.layer_id), repeat(z), chunks):
+            for x, y, tile, count in results:
+                if count > 0:
+                    non_empty.append((x, y))
+                if len(tile) > 0:
+                    # MBTiles uses the TMS scheme, where the rows are numbered from the bottom
+                    rows.append((layer.layer_id, z, x, 2 ** z - 1 - y, sqlite3.Binary(tile)))
+        db.executemany(
+            "INSERT INTO tiles (layer_id, zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        stored += len(rows)
+        logger.debug(f"Layer '{layer.name}', zoom {z}: {len(rows)}/{len(candidates)} tiles stored.")
+        if z < max_zoom:
+            candidates = tile_children(non_empty, bounds, z)
+    return stored
+# End def _build_layer
+
+
+def _executor(jobs: int | None) -> Executor:
+    """Get the pool rendering the tiles.
+
+    Processes are used when possible. The connections to the database are closed beforehand so that
+    the workers do not share the sockets of the parent, each worker opening its own connection.
+    Daemonic processes (e.g. Celery workers) cannot have children, threads are used instead.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or multiprocessing.current_process().daemon:
+        return ThreadPoolExecutor(max_workers=jobs)
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("fork"))
+# End def _executor
+
+
+@functools.lru_cache(maxsize=None)
+def _load_layer(layer_id: int) -> LayerObject:
+    """Load a layer in a worker."""
+    return load_layer(layer_id)
+# End def _load_layer
+
+
+def _render_tiles(layer_id: int, z: int, tiles: list[tuple[int, int]]) -> list[tuple[int, int, bytes, int]]:
+    """Render some tiles of a layer in a worker, closing the connection to the database of the worker once done.
+
+    The workers are threads in the daemonic processes, e.g. Celery workers, whose connections are not closed
+    by Django as they do not serve requests.
+    """
+    try:
+        layer = _load_layer(layer_id)
+        return [(x, y, *render_layer_tile(layer, z, x, y)) for x, y in tiles]
+    finally:
+        connections.close_all()
+# End def _render_tiles
+
+# ======================================================================================================================
+# Read
+# ======================================================================================================================
+
+def read_tile(template_id: int, layer_id: int, z: int, x: int, y: int, *,
+              published_only: bool = False) -> bytes | None:
+    """Read a pre-rendered tile (z, x, y) of a layer.
+
+    Args:
+        published_only (bool): Whether to only read the tiles of a template whose map is published.
+
+    Returns:
+        bytes | None: The tile, or None if it is empty.
+
+    Raises:
+        FileNotFoundError: If the tiles of the template have not been built.
+        PermissionError: If `published_only` is set and the map of the template is not published.
+    """
+    path = mbtiles_path(template_id)
+    if not path.exists():
+        raise FileNotFoundError(f"The tiles of the template '{template_id}' have not been built")
+
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        if published_only:
+            published = db.execute("SELECT value FROM metadata WHERE name = 'published'").fetchone()
+            if published is None or published[0] != "1":
+                raise PermissionError(f"The map of the template '{template_id}' is not published")
+        row = db.execute(
+            "SELECT tile_data FROM tiles WHERE layer_id = ? AND zoom_level = ? AND tile_column = ? AND tile_row = ?",
+            (layer_id, z, x, 2 ** z - 1 - y)
+        ).fetchone()
+    finally:
+        db.close()
+    return bytes(row[0]) if row is not None else None
+# End def read_tile
+
+
+def prebuilt_tile_url(template_id: int, layer: LayerObject) -> str | None:
+    """Get the URL of the pre-rendered tiles of a layer.
+
+    Returns:
+        str | None: The URL, or None if the tiles of the layer have not been built
+            or were built from another definition of the layer or from other data.
+    """
+    path = mbtiles_path(template_id)
+    if layer.layer_id is None or not path.exists():
+        return None
+
+    db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        row = db.execute("SELECT definition FROM layers WHERE layer_id = ?", (layer.layer_id,)).fetchone()
+    finally:
+        db.close()
+    if row is None or row[0] != tile_definition_key(layer, dataset_layer_checksum(layer)):
+        return None
+    return PREBUILT_TILE_URL_TEMPLATE.format(template_id=template_id, layer_id=layer.layer_id)
+# End def prebuilt_tile_url
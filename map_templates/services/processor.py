@@ -4,26 +4,46 @@ Processor service module for the `map_templates` application.
 """
 from __future__ import annotations
 
+import itertools
 import json
 import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Iterable, Iterator
 
 import folium
-import geojson
 import xyzservices
 from django.apps import apps
+from django.conf import settings
 from django.contrib.gis.geos import GEOSGeometry
-from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models import JSONField
+from django.db.models.expressions import RawSQL
 from django.templatetags.static import static
 from django.utils.text import slugify
 from folium.plugins import CirclePattern, StripePattern
 
 from datasets.models import DatasetLayer, Feature
-from interactive_maps.models import MapRender
-from map_templates.services.features import BoundaryType, FeatureGroup as FeatureGroupObject, Layer as LayerObject
+from interactive_maps.models import LayerAsset, MapRender, MapRenderProfile
+from map_templates.services.clustering import CLUSTER_MAX_ZOOM, point_clusters
+from map_templates.services.degradation import (Degradation, degrade_geometry, degrade_layer, next_degradation,
+                                                quantize)
+from map_templates.services.elements import CompiledStyle, PointClusters, VectorTileLayer, VectorTileTooltip
+from map_templates.services.estimator import RenderEstimate, estimate_template
+from map_templates.services.features import (BoundaryType, FeatureGroup as FeatureGroupObject, Layer as LayerObject,
+                                             SourceType)
 from map_templates.services.filters import Filter
+from map_templates.services.fingerprint import dataset_checksums, template_fingerprint
+from map_templates.services.fragments import (cached_fragment, count_features, iter_features, write_features,
+                                              write_fragment)
+from map_templates.services.mbtiles import prebuilt_tile_url
+from map_templates.services.profiling import LayerProfile, RenderProfiler
 from map_templates.services.styles import Style
 from map_templates.services.templates import MapTemplate as MapTemplateObject
+from map_templates.services.vector_tiles import TILE_URL_TEMPLATE
+from map_templates.services.writer import RenderWriter
 
 # ======================================================================================================================
 # Constants
@@ -32,6 +52,19 @@ from map_templates.services.templates import MapTemplate as MapTemplateObject
 logger = logging.getLogger(__name__)
 MAX_ZOOM = 18
 MIN_ZOOM = 1
+# Subset of the fields of a feature to the keys given as parameter
+PROPERTIES_SQL = """
+    COALESCE(
+        (SELECT jsonb_object_agg(p.key, p.value) FROM jsonb_each("{table}"."fields") AS p WHERE p.key = ANY(%s)),
+        '{{}}'::jsonb
+    )
+"""
+# Number of features fetched at once from the server-side cursor of the query of a layer
+FEATURES_CHUNK_SIZE = getattr(settings, "MAP_RENDER_CHUNK_SIZE", 2000)
+# Maximum number of layers whose data is generated concurrently
+RENDER_JOBS = getattr(settings, "MAP_RENDER_JOBS", min(8, os.cpu_count() or 1))
+# Whether the data of the layers is loaded from shared assets rather than embedded in each map
+SHARED_ASSETS = getattr(settings, "MAP_SHARED_ASSETS", True)
 
 # ======================================================================================================================
 # Map Generator
@@ -40,12 +73,23 @@ MIN_ZOOM = 1
 class TemplateProcessor:
     """Class that generates a map from a MapTemplate object or model."""
 
-    def __init__(self, template) -> None:
+    def __init__(self, template, *, model=None) -> None:
+        """Create the processor of a map template model, or of a template object and of the model it was taken
+        from (e.g. by a snapshot, see `services.snapshot`), to which the render belongs."""
         self.map: folium.Map | None = None
         self.__template_model = None
         self.__template : MapTemplateObject | None = None
+        self.__fingerprint : str | None = None
+        self.__checksums : dict[int, str | None] = {}
+        self.__layers_data : dict[LayerObject, Path] = {}
+        self.__tmp_dir : tempfile.TemporaryDirectory | None = None
+        self.__assets : list[LayerAsset] = []
+        self.__degradations : dict[LayerObject, Degradation] = {}
+        self.profiler : RenderProfiler = RenderProfiler()
         if template is not None:
             self.template = template
+        if model is not None:
+            self.__template_model = model
     # End def __init__
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -79,15 +123,51 @@ class TemplateProcessor:
         # 3. Set the template
         self.__template_model = value if store_model is True else None
         self.__template = obj
+        self.__fingerprint = None
     # End def template
 
+    @property
+    def fingerprint(self) -> str | None:
+        """Get the fingerprint of the template and of the data it displays (None if it cannot be computed)."""
+        if self.__fingerprint is None and self.__template is not None:
+            template_id = self.__template_model.id if self.__template_model is not None else None
+            self.__fingerprint = template_fingerprint(self.__template, template_id)
+        return self.__fingerprint
+    # End def fingerprint
+
     # ------------------------------------------------------------------------------------------------------------------
     # Methods
     # ------------------------------------------------------------------------------------------------------------------
 
+    def is_up_to_date(self) -> bool:
+        """Check whether the current render of the template was generated from the same template and data."""
+        if self.__template_model is None or self.fingerprint is None:
+            return False
+        try:
+            map_render = self.__template_model.render
+        except MapRender.DoesNotExist:
+            return False
+        if not map_render.embed_html or not map_render.full_html:
+            return False
+        return map_render.fingerprint == self.fingerprint
+    # End def is_up_to_date
+
+    def estimate(self) -> RenderEstimate:
+        """Estimate the size of the render of the template, without building the map (dry run).
+
+        See `RenderEstimate.warnings` for the budgets exceeded by the render.
+        """
+        estimate = estimate_template(self.template)
+        for warning in estimate.warnings():
+            logger.warning(f"Map '{self.template.name}': {warning}")
+        return estimate
+    # End def estimate
+
     def build(self) -> None:
         """Generate the map data from the template."""
         logger.info(f"Generating map '{self.template.name}'...")
+        self.profiler = RenderProfiler()
+        self.__assets = []
 
         # 0. Create the folium map object
         map_ = folium.Map(
@@ -107,74 +187,98 @@ class TemplateProcessor:
             zoom_control=self.template.zoom_control,
         )
 
-        # 1. Add the tiles
-        for tile in self.__generate_tile_layers():
-            logger.debug(f"Adding tile '{tile.tile_name}' to the map...")
-            tile.add_to(map_)
-
-        # 2. Build the feature of the map
-        # 2.1. Sort the features by their z-index.
-        #      Lower z-index means the features are added first.
-        #      If two features have the same z_index, then the order is undefined.
-        sorted_features = sorted(self.template.features, key=lambda f: f.z_index)
-        keep_in_front = []
-        legend_entries = []
-        # 2.2. Add the features to the map
-        for feature in sorted_features:
-            # 2.2.1. If the feature is a layer, add it to the map
-            if isinstance(feature, LayerObject):
-                if feature.display is False:
-                    logger.debug(f"Skipping layer '{feature.name}' as it is not displayed.")
-                    continue
-                logger.debug(f"Adding layer '{feature.name}' to the map...")
-                legend_entries.append((feature.name, feature.style))
-                feature = self.__generate_layer(feature)
-                keep_in_front.append(feature)
-                feature.add_to(map_)
+        # 0.1. Get the checksums of the data of the layers, to reuse their cached fragments
+        self.__checksums = dataset_checksums(layer.dataset_layer_id for layer in self.template.layers())
+        self.profiler.lap("checksums")
 
-            # 2.2.2. If the feature is a feature group, process its sub-features
-            elif isinstance(feature, FeatureGroupObject):
-                # 2.2.2.1. Create a feature group
-                if feature.display is False:
-                    logger.debug(f"Skipping feature group '{feature.name}' as it is not displayed.")
-                    continue
-                # Check also if all sub-features are not displayed
-                if not any(sub_feature.display for sub_feature in feature):
-                    logger.debug(f"Skipping feature group '{feature.name}' as all sub-features are not displayed.")
-                    continue
-                logger.debug(f"Adding feature group '{feature.name}' to the map...")
-                feature_group = folium.FeatureGroup(
-                    name=feature.name,
-                    show=feature.show_on_startup
-                )
-
-                # 2.2.2.2. Process the sub-features by their z-index
-                sorted_sub_features = sorted(feature, key=lambda f: f.z_index)
-                for sub_feature in sorted_sub_features:
-                    if sub_feature.display is False:
-                        logger.debug(f"Skipping sub-feature '{sub_feature.name}' as it is not displayed.")
+        # 0.2. Generate the data of the displayed layers concurrently, as GeoJSON files.
+        #      The layers are then attached to the map in z-index order below.
+        #      The data of the layers which cannot be cached as fragments is written to a temporary directory.
+        self.__tmp_dir = tempfile.TemporaryDirectory(prefix="map-render-")
+        try:
+            self.__layers_data = self.__generate_layers_data(self.__displayed_layers())
+            self.profiler.lap("layers_data")
+
+            # 0.3. Degrade the heaviest layers until their data meets the budget of the template
+            self.__degradations = {}
+            if self.template.render_budget is not None:
+                self.__meet_budget(self.template.render_budget)
+                self.profiler.lap("degradation")
+
+            # 1. Add the tiles
+            for tile in self.__generate_tile_layers():
+                logger.debug(f"Adding tile '{tile.tile_name}' to the map...")
+                tile.add_to(map_)
+
+            # 2. Build the feature of the map
+            # 2.1. Sort the features by their z-index.
+            #      Lower z-index means the features are added first.
+            #      Features with the same z-index are sorted by name, so that the renders are reproducible.
+            sorted_features = sorted(self.template.features, key=lambda f: (f.z_index, f.name))
+            keep_in_front = []
+            legend_entries = []
+            # 2.2. Add the features to the map
+            for feature in sorted_features:
+                # 2.2.1. If the feature is a layer, add it to the map
+                if isinstance(feature, LayerObject):
+                    if feature.display is False:
+                        logger.debug(f"Skipping layer '{feature.name}' as it is not displayed.")
                         continue
-                    legend_entries.append((sub_feature.name, sub_feature.style))
-                    sub_feature = self.__generate_layer(sub_feature)
-                    keep_in_front.append(sub_feature)
-                    sub_feature.add_to(feature_group)
-
-                # 2.2.2.3. Add the feature group to the map
-                feature_group.add_to(map_)
-
-        # 3. Create a layer control
-        logger.debug(f"Setting the layer control to {self.template.layer_control}...")
-        if self.template.layer_control:
-            folium.LayerControl().add_to(map_)
-
-        # 4. Set the layer order
-        map_.keep_in_front(*keep_in_front)
-
-        # 5. Generate the legend
-        #    Reverse the legend entries to have the lowest z-index at the bottom
-        generate_legend(map_, reversed(legend_entries))
-
-        # 5. Return the folium map object
+                    logger.debug(f"Adding layer '{feature.name}' to the map...")
+                    legend_entries.append((feature.name, feature.style))
+                    feature = self.__generate_layer(feature)
+                    keep_in_front.append(feature)
+                    feature.add_to(map_)
+
+                # 2.2.2. If the feature is a feature group, process its sub-features
+                elif isinstance(feature, FeatureGroupObject):
+                    # 2.2.2.1. Create a feature group
+                    if feature.display is False:
+                        logger.debug(f"Skipping feature group '{feature.name}' as it is not displayed.")
+                        continue
+                    # Check also if all sub-features are not displayed
+                    if not any(sub_feature.display for sub_feature in feature):
+                        logger.debug(f"Skipping feature group '{feature.name}' as all sub-features are not displayed.")
+                        continue
+                    logger.debug(f"Adding feature group '{feature.name}' to the map...")
+                    feature_group = folium.FeatureGroup(
+                        name=feature.name,
+                        show=feature.show_on_startup
+                    )
+
+                    # 2.2.2.2. Process the sub-features by their z-index
+                    sorted_sub_features = sorted(feature, key=lambda f: (f.z_index, f.name))
+                    for sub_feature in sorted_sub_features:
+                        if sub_feature.display is False:
+                            logger.debug(f"Skipping sub-feature '{sub_feature.name}' as it is not displayed.")
+                            continue
+                        legend_entries.append((sub_feature.name, sub_feature.style))
+                        sub_feature = self.__generate_layer(sub_feature)
+                        keep_in_front.append(sub_feature)
+                        sub_feature.add_to(feature_group)
+
+                    # 2.2.2.3. Add the feature group to the map
+                    feature_group.add_to(map_)
+            self.profiler.lap("layers")
+
+            # 3. Create a layer control
+            logger.debug(f"Setting the layer control to {self.template.layer_control}...")
+            if self.template.layer_control:
+                folium.LayerControl().add_to(map_)
+
+            # 4. Set the layer order
+            map_.keep_in_front(*keep_in_front)
+
+            # 5. Generate the legend
+            #    Reverse the legend entries to have the lowest z-index at the bottom
+            generate_legend(map_, reversed(legend_entries))
+            self.profiler.lap("legend")
+        finally:
+            # The data of the layers is embedded in the map or stored as assets by now, or the build failed
+            self.__layers_data = {}
+            self.__tmp_dir.cleanup()
+
+        # 6. Return the folium map object
         self.map = map_
         logger.info(f"Map '{self.template.name}' generated successfully.")
     # End def build
@@ -210,16 +314,40 @@ class TemplateProcessor:
             logger.debug(f"Creating new map render '{render_name}'...")
 
         # 3. Save the map data
-        # The content is unescaped to as it is meant to be displayed in a browser
-        embed_content = ContentFile(name=f"{slugify(self.template.name)}.html", content=self.map._repr_html_())
-        full_content  = ContentFile(name=f"{slugify(self.template.name)}.html", content=self.map.get_root().render())
-        map_render.embed_html.save(embed_content.name, embed_content, save=False)
-        map_render.full_html.save(full_content.name, full_content, save=False)
+        #    The map is rendered once, the embedded document being derived from the full one,
+        #    and both are streamed to the storage, along with their compressed variants
+        self.profiler.restart()
+        with RenderWriter(self.map) as writer:
+            writer.write()
+            self.profiler.lap("render")
+            self.profiler.sizes["embed_html"] = writer.embed_size
+            self.profiler.sizes["full_html"] = writer.full_size
+            file_name = f"{slugify(self.template.name)}.html"
+            map_render.embed_html.save(file_name, writer.embed, save=False)
+            map_render.full_html.save(file_name, writer.full, save=False)
+            # Store the precompressed documents next to them, to be served as they are
+            for encoding in writer.encodings:
+                map_render.save_encoded(map_render.embed_html, encoding, writer.embed_encoded[encoding])
+                map_render.save_encoded(map_render.full_html, encoding, writer.full_encoded[encoding])
+            map_render.encodings = list(writer.encodings)
+            map_render.digest = writer.full_digest
         if self.__template_model:
             map_render.template = self.__template_model
+        map_render.fingerprint = self.fingerprint
+        map_render.degradations = [
+            {"layer_id": layer.layer_id, "name": layer.name, "level": level.label}
+            for layer, level in self.__degradations.items()
+        ]
         map_render.clean()
         map_render.save()
-        logger.info(f"Map '{self.template.name}' saved successfully.")
+        # Reference the assets of the layers, and delete those no longer used by any render
+        map_render.assets.set(self.__assets)
+        LayerAsset.prune()
+        self.profiler.lap("write")
+
+        # 4. Record the profile of the render
+        MapRenderProfile.record(map_render, self.profiler.to_dict())
+        logger.info(f"Map '{self.template.name}' saved successfully ({self.profiler.duration:.2f}s).")
     # End def save
 
 
@@ -228,7 +356,7 @@ class TemplateProcessor:
     # ------------------------------------------------------------------------------------------------------------------
 
     def __generate_tile_layers(self) -> Iterator[folium.TileLayer]:
-        for tile in self.template.tiles:
+        for tile in sorted(self.template.tiles, key=lambda t: t.name):
             if tile.type == 'builtin':
                 yield folium.TileLayer(
                     name=tile.display_name,
@@ -252,17 +380,31 @@ class TemplateProcessor:
                 )
     # End def __generate_tile_layers
 
-    def __generate_layer(self, map_layer : LayerObject) -> folium.GeoJson:
+    def __generate_layer(self, map_layer : LayerObject) -> folium.GeoJson | VectorTileLayer:
         """Generate a layer from a MapLayer object."""
+        # Apply the degradation chosen for the layer to meet the budget of the template
+        path = self.__layers_data.get(map_layer, None)
+        level = self.__degradations.get(map_layer, Degradation.NONE)
+        map_layer = degrade_layer(map_layer, level)
 
-        # 2.2.1 Fetch the data from the MapLayer model and add it to the feature group
-        feature_collection = self.__layer_to_geojson(map_layer)
-        logger.debug(f"Layer '{map_layer.name}' contains {len(feature_collection.get('features'))} features.")
+        # Layers served as vector tiles only reference the tiles, their data is never embedded
+        if map_layer.source_type == SourceType.VECTOR_TILES:
+            return self.__generate_vector_tile_layer(map_layer)
 
-        if map_layer.filters is not None and len(map_layer.filters) > 0:
-            feature_collection = self.__filter_geojson(feature_collection, map_layer.filters)
+        # 2.2.1 Fetch the data from the MapLayer model and add it to the feature group
+        if path is None:
+            path = self.__layer_data(map_layer, level)
+
+        # 2.2.2. Only load the data in memory if it is embedded in the map.
+        #        Otherwise, folium only needs a feature to check the fields of the tooltip against.
+        if SHARED_ASSETS:
+            first_features = list(itertools.islice(iter_features(path), 1))
+            feature_collection = {"type": "FeatureCollection", "features": first_features}
+        else:
+            with open(path, "r", encoding="utf-8") as file:
+                feature_collection = json.load(file)
 
-        # 2.2.2. Create a tooltip for the layer if it exists
+        # 2.2.3. Create a tooltip for the layer if it exists
         tooltip = None
         if map_layer.tooltip is not None:
             tooltip = folium.GeoJsonTooltip(
@@ -272,95 +414,289 @@ class TemplateProcessor:
                 sticky=map_layer.tooltip.sticky,
             )
 
-        # 2.2.3. Create the layer
-        return folium.GeoJson(
-            feature_collection.__geo_interface__,
+        # 2.2.4. Create the layer
+        layer = folium.GeoJson(
+            feature_collection,
             name=map_layer.name,
-            style_function=map_layer.style.function if map_layer.style is not None else None,
-            highlight_function=map_layer.highlight.function if map_layer.highlight is not None else None,
             # TODO: Add the popup once the template class for a popup is implemented
             tooltip=tooltip,
             show=map_layer.show_on_startup,
         )
+
+        # 2.2.5. Load the data from the shared asset holding it, rather than embedding it in the map.
+        #        The data is fetched synchronously, before the scripts styling the layer are run.
+        if SHARED_ASSETS:
+            asset = LayerAsset.store_file(path)
+            self.__assets.append(asset)
+            self.profiler.sizes["assets"] = self.profiler.sizes.get("assets", 0) + asset.size
+            layer.embed = False
+            layer.embed_link = asset.file.url
+
+        # 2.2.6. Style the layer on the client side, rather than embedding the style of each feature
+        if map_layer.style is not None or map_layer.highlight is not None:
+            CompiledStyle(map_layer.style, map_layer.highlight).add_to(layer)
+
+        # 2.2.7. Only draw the clusters of the points at the low zoom levels
+        if map_layer.clustering:
+            clusters = point_clusters(iter_features(path), min_zoom=MIN_ZOOM, max_zoom=CLUSTER_MAX_ZOOM)
+            if clusters is not None:
+                color = (map_layer.style.fill_color or map_layer.style.color) if map_layer.style is not None else None
+                PointClusters(clusters, color).add_to(layer)
+        return layer
     # End def __generate_layer
 
+    def __generate_vector_tile_layer(self, map_layer : LayerObject) -> VectorTileLayer:
+        """Generate a layer loading its features from the vector tiles endpoint.
+
+        The pre-rendered tiles of the template are used if they are up-to-date with the layer.
+        """
+        url = None
+        if self.__template_model is not None:
+            url = prebuilt_tile_url(self.__template_model.id, map_layer)
+        if url is None:
+            url = TILE_URL_TEMPLATE.format(layer_id=map_layer.layer_id)
+        logger.debug(f"Layer '{map_layer.name}' loads its tiles from '{url}'.")
+
+        layer = VectorTileLayer(
+            url,
+            map_layer.style,
+            name=map_layer.name,
+            show=map_layer.show_on_startup,
+        )
+        if map_layer.tooltip is not None:
+            VectorTileTooltip(
+                fields=map_layer.tooltip.fields,
+                aliases=map_layer.tooltip.aliases,
+                sticky=map_layer.tooltip.sticky,
+            ).add_to(layer)
+        return layer
+    # End def __generate_vector_tile_layer
+
+    def __displayed_layers(self) -> list[LayerObject]:
+        """Get the layers of the template displayed on the map and embedding their data."""
+        layers = []
+        for feature in self.template.features:
+            if feature.display is False:
+                continue
+            if isinstance(feature, LayerObject):
+                layers.append(feature)
+            elif isinstance(feature, FeatureGroupObject):
+                layers.extend(f for f in feature if isinstance(f, LayerObject) and f.display is not False)
+        return [layer for layer in layers if layer.source_type == SourceType.GEOJSON]
+    # End def __displayed_layers
+
+    def __generate_layers_data(self, layers : list[LayerObject]) -> dict[LayerObject, Path]:
+        """Generate the data of the layers on a bounded pool of threads.
+
+        Each layer is a query followed by its serialization, independent of the others.
+        Django opens a connection to the database per thread, which is closed once the layer is generated.
+        Each layer is profiled on a profiler of its own, merged into the profiler of the render by this thread.
+        """
+        jobs = min(RENDER_JOBS, len(layers))
+        if jobs <= 1:
+            return {layer: self.__layer_data(layer) for layer in layers}
+
+        def generate(layer : LayerObject) -> tuple[Path, RenderProfiler]:
+            profiler = RenderProfiler()
+            try:
+                return self.__layer_data(layer, profiler=profiler), profiler
+            finally:
+                connection.close()
+
+        logger.debug(f"Generating the data of {len(layers)} layers on {jobs} threads...")
+        layers_data = {}
+        with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="layer") as executor:
+            futures = {layer: executor.submit(generate, layer) for layer in layers}
+            for layer, future in futures.items():
+                layers_data[layer], profiler = future.result()
+                self.profiler.merge(profiler)
+        return layers_data
+    # End def __generate_layers_data
+
+    def __meet_budget(self, budget : int) -> None:
+        """Degrade the layers until the size of their data meets the budget, in bytes.
+
+        The layers are degraded one level of the ladder at a time: each level is applied to the heaviest layers
+        first, until the budget is met, before moving to the next level.
+        See `map_templates.services.degradation` for the levels of the ladder.
+        """
+        sizes = {layer: path.stat().st_size for layer, path in self.__layers_data.items()}
+        for level in Degradation:
+            if sum(sizes.values()) <= budget:
+                break
+            for layer in sorted(sizes, key=sizes.get, reverse=True):
+                if sum(sizes.values()) <= budget:
+                    break
+                current = self.__degradations.get(layer, Degradation.NONE)
+                if sizes[layer] == 0 or next_degradation(layer, current) != level:
+                    continue
+
+                # The data of the layers served as vector tiles is not part of the render,
+                # and pruning the layers without tooltip leaves their data unchanged
+                self.__degradations[layer] = level
+                if level == Degradation.PRUNE and layer.tooltip is None:
+                    continue
+                if level == Degradation.TILES:
+                    del self.__layers_data[layer]
+                    sizes[layer] = 0
+                else:
+                    path = self.__layer_data(degrade_layer(layer, level), level)
+                    self.__layers_data[layer] = path
+                    sizes[layer] = path.stat().st_size
+                logger.debug(f"Layer '{layer.name}' degraded to '{level.label}' ({sizes[layer]} bytes).")
+
+        total = sum(sizes.values())
+        if total > budget:
+            logger.warning(f"Map '{self.template.name}': the data of the layers weighs {total} bytes once degraded, "
+                           f"above the budget of {budget} bytes.")
+    # End def __meet_budget
+
+    def __layer_data(self,
+                     map_layer : LayerObject,
+                     degradation : Degradation = Degradation.NONE,
+                     *,
+                     profiler : RenderProfiler | None = None) -> Path:
+        """Get the GeoJSON file of the data of a layer.
+
+        The cached fragment of the layer is used if its definition and data are unchanged. Otherwise, the features
+        are streamed from the database to the file, so that they are never all held in memory.
+        The layer is profiled on the given profiler, on the profiler of the render by default.
+        """
+        checksum = self.__checksums.get(map_layer.dataset_layer_id, None)
+        profiler = profiler if profiler is not None else self.profiler
+        with profiler.layer(map_layer.name) as profile:
+            with profile.stage("fragment"):
+                path = cached_fragment(map_layer, checksum, degradation)
+            if path is not None:
+                profile.source = "fragment"
+                profile.features = count_features(path)
+            else:
+                profile.source = "database"
+                features = self.__layer_features(map_layer, profile, degradation)
+                if map_layer.filters is not None and len(map_layer.filters) > 0:
+                    # Drop the properties only used by the filters
+                    filtered_only = set(map_layer.required_properties()) - set(map_layer.displayed_properties())
+                    features = self.__filter_features(features, map_layer.filters, profile, drop=filtered_only)
+
+                features = self.__count(features, profile)
+                path = write_fragment(map_layer, checksum, features, degradation)
+                if path is None:
+                    path = Path(self.__tmp_dir.name) / f"layer-{id(map_layer)}-{degradation}.geojson"
+                    write_features(path, features)
+                logger.debug(f"Layer '{map_layer.name}' contains {profile.features} features.")
+
+            profile.bytes = path.stat().st_size
+        return path
+    # End def __layer_data
+
     @staticmethod
-    def __layer_to_geojson(layer: LayerObject) -> geojson.FeatureCollection:
-        """Fetch the geojson features from the MapLayer model."""
+    def __count(features : Iterable[dict], profile : LayerProfile) -> Iterator[dict]:
+        """Count the features of a layer as they are consumed."""
+        profile.features = 0
+        for feature in features:
+            profile.features += 1
+            yield feature
+    # End def __count
+
+    @staticmethod
+    def __layer_features(layer: LayerObject,
+                         profile: LayerProfile,
+                         degradation: Degradation = Degradation.NONE) -> Iterator[dict]:
+        """Fetch the features of a layer from the database, as GeoJSON features.
+
+        The features are fetched by chunks from a server-side cursor, and converted one at a time.
+        Their geometries are simplified and quantized as required by the degradation of the layer.
+        """
         # 1. Check if the layer exists in the database
         if not DatasetLayer.objects.filter(id=layer.dataset_layer_id).exists():
             raise ValueError(f"Layer {layer} does not exist in the database.")
 
-        # 2. Fetch the data from the database
-        dataset_layer: DatasetLayer = DatasetLayer.objects.filter(id=layer.dataset_layer_id).first()
-
-        # 3.1. If the layer has no boundaries, fetch all the features
+        # 2. Select the features of the dataset layer
+        # 2.1. If the layer has no boundaries, fetch all the features
         if layer.boundaries is None:
-            features_query = Feature.objects.filter(layer=dataset_layer)
-        # 3.2. Otherwise, fetch the features that intersect the boundaries
+            features_query = Feature.objects.filter(layer_id=layer.dataset_layer_id)
+        # 2.2. Otherwise, fetch the features that intersect the boundaries
         elif layer.boundary_type == BoundaryType.INTERSECT or layer.boundary_type == BoundaryType.CROP:
-            features_query = Feature.objects.filter(layer=dataset_layer, geometry__intersects=layer.boundaries)
-        # 3.3. Otherwise, fetch the features that are within the boundaries
+            features_query = Feature.objects.filter(layer_id=layer.dataset_layer_id,
+                                                    geometry__intersects=layer.boundaries)
+        # 2.3. Otherwise, fetch the features that are within the boundaries
         elif layer.boundary_type == BoundaryType.STRICT:
-            features_query = Feature.objects.filter(layer=dataset_layer, geometry__within=layer.boundaries)
+            features_query = Feature.objects.filter(layer_id=layer.dataset_layer_id,
+                                                    geometry__within=layer.boundaries)
         else:
             raise ValueError(f"Invalid boundary type for layer {layer}")
 
-        # 4. Convert the data into a geojson object
-        features = []
-        for feature in features_query:
-            if layer.boundary_type == BoundaryType.CROP:
-                geometry = GEOSGeometry(feature.geometry.intersection(layer.boundaries))
-            else:
-                geometry = feature.geometry
-            properties = feature.fields
-            features.append(
-                geojson.Feature(
-                    geometry=json.loads(str(geometry.geojson)),
-                    properties=properties,
-                )
-            )
+        # 2.4. Only fetch the properties of the features used by the layer, projected in the database.
+        #      The features are ordered, so that the renders are reproducible.
+        features_query = features_query.only("geometry").order_by("id").annotate(
+            properties=RawSQL(PROPERTIES_SQL.format(table=Feature._meta.db_table),
+                              (layer.required_properties(),),
+                              output_field=JSONField())
+        )
 
-        return geojson.FeatureCollection(features)
-    # End def __fetch_layer_geojson
+        # 3. Convert the features into GeoJSON features as they are fetched
+        rows = features_query.iterator(chunk_size=FEATURES_CHUNK_SIZE)
+        while True:
+            with profile.stage("query"):
+                feature = next(rows, None)
+            if feature is None:
+                break
+            with profile.stage("geojson"):
+                if layer.boundary_type == BoundaryType.CROP:
+                    geometry = GEOSGeometry(feature.geometry.intersection(layer.boundaries))
+                else:
+                    geometry = feature.geometry
+                geometry = degrade_geometry(geometry, degradation)
+                geojson_geometry = json.loads(geometry.geojson)
+                if degradation >= Degradation.QUANTIZE:
+                    quantize(geojson_geometry)
+                geojson_feature = {
+                    "type": "Feature",
+                    "geometry": geojson_geometry,
+                    "properties": feature.properties,
+                }
+            yield geojson_feature
+    # End def __layer_features
 
     @staticmethod
-    def __filter_geojson(feature_collection: geojson.FeatureCollection,
-                         filters: Iterable[Filter],
-                         *,
-                         strict: bool = False) -> geojson.FeatureCollection:
-        """Filter the geojson features based on the filters provided."""
-
-        # 2. Filter the geojson
-        filtered_features : list[geojson.Feature] = feature_collection.get('features')
-        initial_length = len(filtered_features)
-        for filter_ in filters:
-            logger.debug(f"Applying filter '{filter_!r}' to the layer...")
-            temp_features = []
-            for feature in filtered_features:
+    def __filter_features(features: Iterable[dict],
+                          filters: Iterable[Filter],
+                          profile: LayerProfile,
+                          *,
+                          drop: set[str] | None = None,
+                          strict: bool = False) -> Iterator[dict]:
+        """Filter GeoJSON features based on the filters provided, one feature at a time.
+
+        Args:
+            drop (set[str] | None): The properties to remove from the features kept, once filtered.
+            strict (bool): Whether to discard the features which do not have the key of a filter.
+        """
+        filters = list(filters)
+        kept, total = 0, 0
+        for feature in features:
+            with profile.stage("filter"):
+                total += 1
                 properties = feature.get('properties')
-
-                # If the key is not in the properties, the feature is kept
-                # unless `strict` is set to True. In that case, the feature
-                # is discarded.
-                if filter_.key not in properties.keys():
-                    if strict is False:
-                        temp_features.append(feature)
+                keep = True
+                for filter_ in filters:
+                    # If the key is not in the properties, the feature is kept
+                    # unless `strict` is set to True. In that case, the feature
+                    # is discarded.
+                    if filter_.key not in properties.keys():
+                        keep = not strict
                     else:
-                        logger.debug(f"Discarding feature {feature!r} (strict mode).")
-                    continue
-
-                if filter_.operator(properties[filter_.key], filter_.value) is True:
-                    logger.debug(f"Keeping feature {feature!r} (match filter)")
-                    temp_features.append(feature)
-                else:
-                    logger.debug(f"Discarding feature {feature!r} (does not match filter)")
-
-            filtered_features = temp_features
-
-        logger.debug(f"Filtering done: kept {len(filtered_features)}/{initial_length} features")
-        return geojson.FeatureCollection(features=filtered_features)
-    # End def __filter_geojson
+                        keep = filter_.operator(properties[filter_.key], filter_.value) is True
+                    if not keep:
+                        break
+                if keep:
+                    kept += 1
+                    for key in drop or ():
+                        properties.pop(key, None)
+            if keep:
+                yield feature
+
+        logger.debug(f"Filtering done: kept {kept}/{total} features")
+    # End def __filter_features
 # End class MapBuilder
 
 
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Profiling service module for the `map_templates` application.
+
+Times the stages of the render of a map template, and of the generation of each of its layers,
+along with their feature counts and output sizes, to find where the time of a render goes.
+"""
+from __future__ import annotations
+
+import contextlib
+import time
+from typing import Iterator
+
+# ======================================================================================================================
+# Profiles
+# ======================================================================================================================
+
+class LayerProfile:
+    """Profile of the generation of a layer."""
+
+    def __init__(self, name: str) -> None:
+        self.name : str = name
+        self.source : str | None = None
+        self.features : int | None = None
+        self.bytes : int | None = None
+        self.duration : float = 0.0
+        self.stages : dict[str, float] = {}
+    # End def __init__
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a stage of the generation of the layer. Stages sharing a name are summed."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+    # End def stage
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "source": self.source,
+            "features": self.features,
+            "bytes": self.bytes,
+            "duration": self.duration,
+            "stages": self.stages,
+        }
+    # End def to_dict
+# End class LayerProfile
+
+
+class RenderProfiler:
+    """Profile of the render of a map template.
+
+    A profiler is not thread-safe: the layers generated by other threads are profiled on a profiler
+    of their own, merged into the profiler of the render once they are done (see `merge`).
+    """
+
+    def __init__(self) -> None:
+        self.stages : dict[str, float] = {}
+        self.sizes : dict[str, int] = {}
+        self.layers : list[LayerProfile] = []
+        self.__last_lap : float = time.perf_counter()
+    # End def __init__
+
+    @property
+    def duration(self) -> float:
+        """Get the total duration of the stages of the render."""
+        return sum(self.stages.values())
+    # End def duration
+
+    def lap(self, name: str) -> None:
+        """Record the time elapsed since the previous lap as a stage of the render.
+
+        Suited to sequential code, where each stage ends where the next one begins.
+        """
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self.__last_lap
+        self.__last_lap = now
+    # End def lap
+
+    def restart(self) -> None:
+        """Start the next lap now, e.g. to exclude some time from the profile."""
+        self.__last_lap = time.perf_counter()
+    # End def restart
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a stage of the render. Stages sharing a name are summed."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+    # End def stage
+
+    @contextlib.contextmanager
+    def layer(self, name: str) -> Iterator[LayerProfile]:
+        """Time the generation of a layer."""
+        profile = LayerProfile(name)
+        start = time.perf_counter()
+        try:
+            yield profile
+        finally:
+            profile.duration = time.perf_counter() - start
+            self.layers.append(profile)
+    # End def layer
+
+    def merge(self, other: RenderProfiler) -> None:
+        """Add the layers, stages and sizes profiled by another profiler, e.g. in another thread."""
+        self.layers.extend(other.layers)
+        for name, duration in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + duration
+        for name, size in other.sizes.items():
+            self.sizes[name] = self.sizes.get(name, 0) + size
+    # End def merge
+
+    def to_dict(self) -> dict:
+        """Convert the profile to a dictionary, the slowest layers first."""
+        return {
+            "duration": self.duration,
+            "stages": self.stages,
+            "sizes": self.sizes,
+            "layers": [layer.to_dict() for layer in sorted(self.layers, key=lambda l: l.duration, reverse=True)],
+        }
+    # End def to_dict
+# End class RenderProfiler
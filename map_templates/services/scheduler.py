@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Render scheduler service module for the `map_templates` application.
+
+Renders are debounced and coalesced per map template with a row version:
+- Scheduling a render increments the `render_version` of the template and enqueues a task
+  for that version, delayed by a debounce window.
+- A task whose version is no longer the latest when it starts is dropped, so a burst of edits
+  results in a single render of the latest version ("latest wins").
+- A PostgreSQL advisory lock ensures that a single render of a template runs at a time.
+  A task finding the lock taken is retried once the debounce window has elapsed.
+- A snapshot of the template is taken once the version is committed and sent along with the task
+  (see `services.snapshot`), so that the worker does not load the template from the database.
+"""
+from __future__ import annotations
+
+import contextlib
+import logging
+from typing import Iterator
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+
+from common.utils.tasks import TaskStatus
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+logger = logging.getLogger(__name__)
+
+# Delay in seconds before a scheduled render starts, during which further edits supersede it
+RENDER_DEBOUNCE = getattr(settings, "MAP_RENDER_DEBOUNCE", 5)
+# Namespace of the advisory locks taken on the map templates being rendered
+RENDER_LOCK_NAMESPACE = 0x4D50
+
+# ======================================================================================================================
+# Scheduling
+# ======================================================================================================================
+
+# noinspection PyPep8Naming
+def schedule_render(map_template_id: int, *, countdown: float | None = None, force: bool = False) -> int:
+    """Schedule the render of a map template, superseding the renders scheduled before.
+
+    Args:
+        map_template_id (int): The id of the map template.
+        countdown (float | None): The debounce window in seconds. Defaults to `RENDER_DEBOUNCE`.
+        force (bool): Whether to render even if the current render is up to date.
+
+    Returns:
+        int: The version of the scheduled render.
+    """
+    # Imported here as the tasks depend on this module
+    from map_templates import tasks
+
+    MapTemplate = apps.get_model("map_templates", "MapTemplate")
+    countdown = RENDER_DEBOUNCE if countdown is None else countdown
+
+    with transaction.atomic():
+        # The update locks the row, so that concurrent schedules get distinct versions
+        updated = MapTemplate.objects.filter(id=map_template_id).update(
+            render_version=F("render_version") + 1,
+            task_status=TaskStatus.PENDING,
+        )
+        if updated == 0:
+            raise ValueError(f"MapTemplate with ID '{map_template_id}' does not exist.")
+        version = MapTemplate.objects.values_list("render_version", flat=True).get(id=map_template_id)
+
+        # Enqueue the task once the version is visible to the workers.
+        # The snapshot is only taken then, so that it includes the changes committed along with the version.
+        transaction.on_commit(lambda: tasks.generate_maprender_from_maptemplate_task.apply_async(
+            args=(map_template_id,),
+            kwargs={"version": version, "force": force, "snapshot": template_snapshot(map_template_id)},
+            countdown=countdown,
+        ))
+
+    logger.debug(f"Render v{version} of map template {map_template_id} scheduled in {countdown}s.")
+    return version
+# End def schedule_render
+
+
+def template_snapshot(map_template_id: int) -> str | None:
+    """Take the snapshot of a map template sent along with its render task.
+
+    Returns:
+        str | None: The snapshot, or None if it cannot be taken, in which case the worker loads the template
+            from the database and reports its errors.
+    """
+    # Imported here as the snapshots depend on the models
+    from map_templates.services.snapshot import take_snapshot
+
+    try:
+        return take_snapshot(map_template_id)
+    except Exception as e:
+        logger.warning(f"Could not take a snapshot of map template {map_template_id}: {e}")
+        return None
+# End def template_snapshot
+
+
+# noinspection PyPep8Naming
+def is_latest_version(map_template_id: int, version: int | None) -> bool:
+    """Check whether a render is the latest scheduled for a map template (renders without version always are)."""
+    if version is None:
+        return True
+    MapTemplate = apps.get_model("map_templates", "MapTemplate")
+    return MapTemplate.objects.filter(id=map_template_id, render_version=version).exists()
+# End def is_latest_version
+
+
+@contextlib.contextmanager
+def render_lock(map_template_id: int) -> Iterator[bool]:
+    """Try to take the lock of the render of a map template for the duration of the block.
+
+    The lock is a session-level advisory lock, released on exit or if the connection is lost.
+
+    Yields:
+        bool: Whether the lock was acquired. If not, another render of the template is running.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [RENDER_LOCK_NAMESPACE, map_template_id])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s, %s)", [RENDER_LOCK_NAMESPACE, map_template_id])
+# End def render_lock
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Template snapshot service module for the `map_templates` application.
+
+A snapshot is the serialized template object of a map template, taken when its render is scheduled and sent
+along with the render task, so that the worker builds the map without traversing the relations of the template
+(layers, styles, tooltips, filters, tiles...) again. The data of the layers is still read by the worker.
+
+Snapshots are compact JSON strings, with sorted keys so that the same template always gives the same snapshot.
+They are versioned: a snapshot of another version, e.g. enqueued before a deployment, is rejected, the worker
+then loading the template from the database. `orjson` is used to encode and decode them if it is installed.
+"""
+from __future__ import annotations
+
+import json
+
+from map_templates import models
+from map_templates.services.loader import load_template
+from map_templates.services.templates import MapTemplate as MapTemplateObject
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+# Version of the format of the snapshots, to increment whenever the serialization of the templates changes
+SNAPSHOT_VERSION = 1
+
+# ======================================================================================================================
+# Snapshots
+# ======================================================================================================================
+
+def take_snapshot(template: models.MapTemplate | int) -> str:
+    """Take a snapshot of a map template, from its model or its id.
+
+    Raises:
+        models.MapTemplate.DoesNotExist: If the map template does not exist.
+        ValueError: If the template is invalid, e.g. the dataset layer of a layer does not exist.
+    """
+    return dump_snapshot(load_template(template))
+# End def take_snapshot
+
+
+def dump_snapshot(template: MapTemplateObject) -> str:
+    """Serialize a template object into a snapshot."""
+    payload = {"version": SNAPSHOT_VERSION, "template": template.serialize('dict')}
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+    return json.dumps(payload, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+# End def dump_snapshot
+
+
+def load_snapshot(snapshot: str) -> MapTemplateObject:
+    """Deserialize a snapshot into a template object, without querying the database.
+
+    The dataset layers of the layers were checked when the snapshot was taken, and are not checked again.
+
+    Raises:
+        ValueError: If the snapshot is malformed or of another version.
+    """
+    payload = orjson.loads(snapshot) if orjson is not None else json.loads(snapshot)
+    if not isinstance(payload, dict) or payload.get("version", None) != SNAPSHOT_VERSION:
+        raise ValueError(f"Expected a snapshot of version {SNAPSHOT_VERSION}")
+    return MapTemplateObject.deserialize(payload["template"], 'dict', check_dataset_layer=False)
+# End def load_snapshot
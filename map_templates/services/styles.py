@@ -10,7 +10,7 @@ from typing import Literal
 from folium.plugins import CirclePattern, StripePattern
 
 from map_templates import models
-from map_templates.utils import repr_str, snake_to_camel
+from map_templates.utils import camel_to_snake, repr_str, snake_to_camel
 
 # ======================================================================================================================
 # Constants
@@ -48,6 +48,9 @@ STYLE_ATTRIBUTES = [
     "fill_pattern"
 ]
 
+# Name of the style attributes in Leaflet, computed once
+LEAFLET_STYLE_ATTRIBUTES = {attr: snake_to_camel(attr, capitalize_first=False) for attr in STYLE_ATTRIBUTES}
+
 
 # ======================================================================================================================
 # Style
@@ -116,26 +119,56 @@ class Style:
 
         rstyle = {}
         # Get the style for the layer
-        for attr in STYLE_ATTRIBUTES:
+        for attr, leaflet_attr in LEAFLET_STYLE_ATTRIBUTES.items():
             value = getattr(self, attr)
             if value is not None:
-                rstyle[snake_to_camel(attr, capitalize_first=False)] = value
+                rstyle[leaflet_attr] = value
 
         # For each property style, check if the property value matches the value of the property in the data
         # If it does, add the style to the style
         for property_style in self.property_styles:
             try:
                 if x["properties"].get(property_style.key, None) == property_style.value:
-                    for attr in STYLE_ATTRIBUTES:
+                    for attr, leaflet_attr in LEAFLET_STYLE_ATTRIBUTES.items():
                         value = getattr(property_style, attr)
                         if value is not None:
-                            rstyle[snake_to_camel(attr, capitalize_first=False)] = value
+                            rstyle[leaflet_attr] = value
             except Exception:
                 pass
 
         return rstyle
     # End def function_style
 
+    def compile(self) -> dict:
+        """Compile the style into a lookup table, used on the client side to style the features.
+
+        The table holds the base style of the layer and, for each property key, the style to apply
+        for each value of the property. Styling a feature then only takes one lookup per key,
+        whatever the number of property styles. The keys are applied in their order of first appearance
+        and the fill patterns are referenced by the name of their folium element.
+
+        Returns:
+            dict: The table, of the form `{"base": {...}, "keys": [key, ...], "rules": {key: {value: {...}}}}`.
+        """
+        table = {"base": _leaflet_attributes(self), "keys": [], "rules": {}}
+        for property_style in self.property_styles:
+            if property_style.key not in table["rules"]:
+                table["keys"].append(property_style.key)
+                table["rules"][property_style.key] = {}
+            rule = table["rules"][property_style.key].setdefault(str(property_style.value), {})
+            rule.update(_leaflet_attributes(property_style))
+        return table
+    # End def compile
+
+    def patterns(self) -> list[StripePattern | CirclePattern]:
+        """Get the fill patterns used by the style and its property styles."""
+        patterns = []
+        for style in (self, *self.property_styles):
+            if style.fill_pattern is not None and style.fill_pattern not in patterns:
+                patterns.append(style.fill_pattern)
+        return patterns
+    # End def patterns
+
     # ------------------------------------------------------------------------------------------------------------------
     # Private methods
     # ------------------------------------------------------------------------------------------------------------------
@@ -253,7 +286,7 @@ class Style:
         for attr in STYLE_ATTRIBUTES:
             value = getattr(self, attr)
             if value is not None:
-                dict_[attr] = value
+                dict_[attr] = pattern_to_dict(value) if attr == "fill_pattern" else value
 
         if self.property_styles:
             dict_["property_styles"] = [PropertyStyle.serialize(ps, 'dict') for ps in self.property_styles]
@@ -271,6 +304,8 @@ class Style:
             if attr == "property_styles":
                 for ps in value:
                     style.property_styles.append(PropertyStyle.deserialize(ps, 'dict'))
+            elif attr == "fill_pattern":
+                style.fill_pattern = pattern_from_dict(value)
             else:
                 setattr(style, attr, value)
         return style
@@ -440,7 +475,7 @@ class PropertyStyle:
         for attr in STYLE_ATTRIBUTES:
             value = getattr(self, attr)
             if value is not None:
-                dict_[attr] = value
+                dict_[attr] = pattern_to_dict(value) if attr == "fill_pattern" else value
         return dict_
     # End def to_dict
 
@@ -449,6 +484,9 @@ class PropertyStyle:
         if data.get("__type__", None) != "__PropertyStyle__":
             raise ValueError(f"Invalid type '{data.get('__type__', None)}'")
 
+        data = {k: v for k, v in data.items() if k != "__type__"}
+        if data.get("fill_pattern", None) is not None:
+            data["fill_pattern"] = pattern_from_dict(data["fill_pattern"])
         return PropertyStyle(key=data.pop("key"), value=data.pop("value"), **data)
     # End def from_dict
 # End class PropertyStyle
@@ -457,6 +495,47 @@ class PropertyStyle:
 # Methods
 # ======================================================================================================================
 
+def pattern_to_dict(pattern: StripePattern | CirclePattern) -> dict:
+    """Convert a fill pattern to a dictionary."""
+    if isinstance(pattern, StripePattern):
+        return {
+            "__type__": "__StripePattern__",
+            **{camel_to_snake(k): v for k, v in sorted(pattern.options.items())}
+        }
+    if isinstance(pattern, CirclePattern):
+        circle = {k: v for k, v in pattern.options_pattern_circle.items() if k not in ("x", "y", "fill")}
+        return {
+            "__type__": "__CirclePattern__",
+            **{camel_to_snake(k): v for k, v in sorted({**circle, **pattern.options_pattern}.items())}
+        }
+    raise ValueError(f"Invalid pattern type '{pattern.__class__.__name__}'")
+# End def pattern_to_dict
+
+
+def pattern_from_dict(data: dict) -> StripePattern | CirclePattern:
+    """Convert a dictionary to a fill pattern."""
+    kwargs = {k: v for k, v in data.items() if k != "__type__"}
+    match data.get("__type__", None):
+        case "__StripePattern__":
+            return StripePattern(**kwargs)
+        case "__CirclePattern__":
+            return CirclePattern(**kwargs)
+    raise ValueError(f"Invalid type '{data.get('__type__', None)}'")
+# End def pattern_from_dict
+
+
+def _leaflet_attributes(style: Style | PropertyStyle) -> dict:
+    """Get the attributes set on a style, named as in Leaflet. Fill patterns are referenced by name."""
+    attributes = {}
+    for attr, leaflet_attr in LEAFLET_STYLE_ATTRIBUTES.items():
+        value = getattr(style, attr)
+        if value is None:
+            continue
+        attributes[leaflet_attr] = value.get_name() if attr == "fill_pattern" else value
+    return attributes
+# End def _leaflet_attributes
+
+
 def validate_style_attributes(attributes: dict):
     """Validate the style attributes."""
     # 1. Ensure that there is no attribute that do not belong to the style
@@ -6,14 +6,15 @@ from __future__ import annotations
 
 import builtins
 import json
-from typing import Collection, Iterable, Literal
+from typing import Collection, Iterable, Iterator, Literal
 
 from django.contrib.gis.geos import Point
 
+from datasets.models import DatasetLayer
 from map_templates import models
-from map_templates.services.features import Feature, FeatureGroup, FeatureType, Layer
+from map_templates.services.features import Feature, FeatureGroup, FeatureType, Layer, deserialize_feature
 from map_templates.services.tiles import TileLayer
-from map_templates.utils import repr_str
+from map_templates.utils import repr_str, sorted_dicts
 
 # ======================================================================================================================
 # Constants
@@ -38,13 +39,16 @@ class MapTemplate:
                  layer_control : bool = True,
                  zoom_control : bool = True,
                  tiles : Collection[TileLayer] = None,
-                 features : Collection[Feature] | None = None) -> None:
+                 features : Collection[Feature] | None = None,
+                 render_budget : int | None = None) -> None:
 
         self.name          : str = name
         self.center        : Point = center
         self.zoom_start    : int = zoom_start if zoom_start is not None else MIN_ZOOM + (MAX_ZOOM - MIN_ZOOM)*(2/3)
         self.layer_control : bool = layer_control
         self.zoom_control  : bool = zoom_control
+        # Maximum size in bytes of the data of the layers, see `map_templates.services.degradation`
+        self.render_budget : int | None = render_budget
 
         # Private properties
         self.__tiles   : set[TileLayer] = set()
@@ -111,6 +115,17 @@ class MapTemplate:
             raise ValueError(f"Feature '{name}' does not exist in the template")
     # End def feature
 
+    def layers(self) -> Iterator[Layer]:
+        """Iterate over the layers of the template, including those nested in feature groups."""
+        stack = list(self.__features)
+        while stack:
+            feature = stack.pop()
+            if isinstance(feature, Layer):
+                yield feature
+            elif isinstance(feature, FeatureGroup):
+                stack.extend(feature)
+    # End def layers
+
     def tile(self, name) -> TileLayer:
         """Get the tiles of the template."""
         try:
@@ -168,6 +183,8 @@ class MapTemplate:
         # Validate that the zoom start is valid
         if self.zoom_start is not None and (self.zoom_start < MIN_ZOOM or self.zoom_start > MAX_ZOOM):
             raise ValueError(f"Zoom start must be between {MIN_ZOOM} and {MAX_ZOOM} (got {self.zoom_start})")
+        if self.render_budget is not None and self.render_budget <= 0:
+            raise ValueError(f"Render budget must be positive (got {self.render_budget})")
         for tile in self.__tiles:
             tile.validate()
         for feature in self.__features:
@@ -180,13 +197,30 @@ class MapTemplate:
 
     @staticmethod
     def from_model(model: models.MapTemplate) -> MapTemplate:
-        """Convert a model to a MapTemplate object"""
+        """Convert a model to a MapTemplate object
+
+        The dataset layers of all the layers are checked at once. The relations of the model are best
+        fetched beforehand, see `map_templates.services.loader.load_template`.
+
+        Raises:
+            ValueError: If the dataset layer of a layer does not exist.
+        """
+        # 1. Check that the dataset layers of the layers exist, in a single query
+        layers = [*model.layers.all(), *(layer for group in model.feature_groups.all() for layer in group.layers.all())]
+        dataset_layer_ids = {layer.dataset_layer_id for layer in layers}
+        existing_ids = set(DatasetLayer.objects.filter(id__in=dataset_layer_ids).values_list('id', flat=True))
+        for layer in layers:
+            if layer.dataset_layer_id not in existing_ids:
+                raise ValueError(
+                    f"Dataset layer with id '{layer.dataset_layer_id}' of layer '{layer.name}' does not exist"
+                )
 
+        # 2. Convert the features
         features = []
         for feature in model.layers.all():
-            features.append(Layer.from_model(feature))
+            features.append(Layer.from_model(feature, check_dataset_layer=False))
         for feature in model.feature_groups.all():
-            features.append(FeatureGroup.from_model(feature))
+            features.append(FeatureGroup.from_model(feature, check_dataset_layer=False))
 
 
         template = MapTemplate(
@@ -198,7 +232,8 @@ class MapTemplate:
             tiles=[
                 TileLayer.from_model(tile) for tile in model.tiles.all()
             ],
-            features=features
+            features=features,
+            render_budget=model.render_budget * 1024 if model.render_budget else None
         )
 
         # Validate the template
@@ -233,12 +268,20 @@ class MapTemplate:
     # End def serialize
 
     @staticmethod
-    def deserialize(data: str | dict, method: Literal['json', 'kwargs'] = 'json', **kwargs) -> MapTemplate:
-        """Deserialize the template."""
+    def deserialize(data: str | dict,
+                    method: Literal['json', 'dict'] = 'json',
+                    *,
+                    check_dataset_layer: bool = True,
+                    **kwargs) -> MapTemplate:
+        """Deserialize the template.
+
+        Args:
+            check_dataset_layer (bool): Whether to check that the dataset layers exist, querying the database.
+        """
         if method == 'json':
-            return MapTemplate._from_dict(json.loads(data, **kwargs))
+            return MapTemplate._from_dict(json.loads(data, **kwargs), check_dataset_layer=check_dataset_layer)
         if method == 'dict':
-            return MapTemplate._from_dict(data)
+            return MapTemplate._from_dict(data, check_dataset_layer=check_dataset_layer)
         raise ValueError(f"Invalid method '{method}'")
     # End def deserialize
 
@@ -251,13 +294,14 @@ class MapTemplate:
             "zoom_start" : self.zoom_start,
             "layer_control" : self.layer_control,
             "zoom_control" : self.zoom_control,
-            "tiles" : [tile.serialize(method='dict') for tile in self.__tiles],
-            "features" : [feature.serialize(method='dict') for feature in self.__features]
+            "render_budget" : self.render_budget,
+            "tiles" : sorted_dicts(tile.serialize(method='dict') for tile in self.__tiles),
+            "features" : sorted_dicts(feature.serialize(method='dict') for feature in self.__features)
         }
     # End def to_json
 
     @staticmethod
-    def _from_dict(data: dict) -> MapTemplate:
+    def _from_dict(data: dict, *, check_dataset_layer: bool = True) -> MapTemplate:
         """Convert the template to a JSON string."""
         if data.get("__type__", None) != "__MapTemplate__":
             raise ValueError(f"Invalid type '{data.get('__type__', None)}'")
@@ -269,5 +313,8 @@ class MapTemplate:
             layer_control=data["layer_control"],
             zoom_control=data["zoom_control"],
             tiles=[TileLayer.deserialize(tile, method='dict') for tile in data["tiles"]],
-            features=[Layer.deserialize(feature, method='dict') for feature in data["features"]])
+            features=[
+                deserialize_feature(feature, check_dataset_layer=check_dataset_layer) for feature in data["features"]
+            ],
+            render_budget=data.get("render_budget", None))
     # End def to_json
@@ -129,8 +129,7 @@ class TileLayer:
             overlay=data["overlay"],
             control=data["control"],
             url=data["url"],
-            fmt=data["format"],
-            layers=data["layers"],
+            access_token=data.get("access_token", None),
             attribution=data["attribution"]
         )
     # End def from_dict
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Vector tiles service module for the `map_templates` application.
+
+Generates Mapbox Vector Tiles (MVT) for the layers of a map template directly in PostGIS
+with `ST_AsMVT` and `ST_AsMVTGeom`.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+
+from django.db import connection
+
+from datasets.models import DatasetLayer, Feature
+from map_templates.services.features import BoundaryType, Layer as LayerObject
+from map_templates.services.filters import Filter
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+logger = logging.getLogger(__name__)
+
+MAX_TILE_ZOOM = 18
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+TILE_CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+# Name of the layer inside each tile, used by the client to style the features
+TILE_LAYER_NAME = "features"
+# URL of the tiles of a layer. The placeholders '{z}', '{x}' and '{y}' are filled by Leaflet.
+TILE_URL_TEMPLATE = "/tiles/{layer_id}/{{z}}/{{x}}/{{y}}.pbf"
+
+SQL_OPERATORS = {
+    "==": "=",
+    "!=": "<>",
+    ">" : ">",
+    ">=": ">=",
+    "<" : "<",
+    "<=": "<="
+}
+
+SQL_CASTS = {
+    "string" : "text",
+    "number" : "numeric",
+    "boolean": "boolean"
+}
+
+# Values that can be cast by PostgreSQL, matched case-insensitively (in Python and by the `~*` operator)
+SQL_CAST_PATTERNS = {
+    "number" : re.compile(r"^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)(e[-+]?[0-9]+)?\s*$", re.IGNORECASE),
+    "boolean": re.compile(r"^\s*(t|true|y|yes|on|1|f|false|n|no|off|0)\s*$", re.IGNORECASE)
+}
+
+# ======================================================================================================================
+# Tile generation
+# ======================================================================================================================
+
+def tile_properties(layer: LayerObject) -> list[str]:
+    """Get the properties of the features needed on the client side, i.e. by the tooltip and the styles."""
+    return layer.displayed_properties()
+# End def tile_properties
+
+
+def dataset_layer_checksum(layer: LayerObject) -> str | None:
+    """Get the checksum of the features of the dataset layer of a layer, None if it is unknown."""
+    return DatasetLayer.objects.filter(id=layer.dataset_layer_id).values_list("checksum", flat=True).first()
+# End def dataset_layer_checksum
+
+
+def tile_definition_key(layer: LayerObject, checksum: str | None = None) -> str:
+    """Get a key identifying the definition of the tiles of a layer.
+
+    Two layers sharing the same key produce the same tiles: the key covers the data of the layer through
+    the checksum of its dataset layer (see `dataset_layer_checksum`), so that it changes once re-ingested.
+    """
+    definition = {
+        "dataset_layer_id": layer.dataset_layer_id,
+        "checksum": checksum,
+        "boundaries": layer.boundaries.ewkt if layer.boundaries is not None else None,
+        "boundary_type": layer.boundary_type.value,
+        "filters": [[f.key, f.symbol, str(f.value), f.value_type] for f in layer.filters],
+        "properties": tile_properties(layer),
+    }
+    return hashlib.sha256(json.dumps(definition, sort_keys=True).encode("utf-8")).hexdigest()
+# End def tile_definition_key
+
+
+def validate_tile_coordinates(z: int, x: int, y: int) -> None:
+    """Validate the coordinates of a tile.
+
+    Raises:
+        ValueError: If the coordinates do not match any tile.
+    """
+    if not 0 <= z <= MAX_TILE_ZOOM:
+        raise ValueError(f"Expected 'z' to be between 0 and {MAX_TILE_ZOOM}, not '{z}'")
+    if not 0 <= x < 2 ** z:
+        raise ValueError(f"Expected 'x' to be between 0 and {2 ** z - 1} at zoom {z}, not '{x}'")
+    if not 0 <= y < 2 ** z:
+        raise ValueError(f"Expected 'y' to be between 0 and {2 ** z - 1} at zoom {z}, not '{y}'")
+# End def validate_tile_coordinates
+
+
+def generate_layer_tile(layer: LayerObject, z: int, x: int, y: int) -> bytes:
+    """Generate the vector tile (z, x, y) of a layer.
+
+    The features are filtered on the boundaries and the filters of the layer,
+    and only carry the properties used by its tooltip and styles.
+
+    Returns:
+        bytes: The tile encoded as a Mapbox Vector Tile (may be empty).
+    """
+    return render_layer_tile(layer, z, x, y)[0]
+# End def generate_layer_tile
+
+
+def render_layer_tile(layer: LayerObject, z: int, x: int, y: int) -> tuple[bytes, int]:
+    """Generate the vector tile (z, x, y) of a layer.
+
+    Returns:
+        tuple[bytes, int]: The tile and the number of features intersecting it.
+            A tile may be empty while some features intersect it (e.g. features too small to be drawn),
+            in which case the tiles of the upper zoom levels may not be.
+    """
+    validate_tile_coordinates(z, x, y)
+    query, params = build_tile_query(layer, z, x, y)
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        row = cursor.fetchone()
+
+    tile = bytes(row[0]) if row is not None and row[0] is not None else b""
+    count = row[1] if row is not None else 0
+    logger.debug(f"Tile {z}/{x}/{y} of layer '{layer.name}' generated ({len(tile)} bytes, {count} features).")
+    return tile, count
+# End def render_layer_tile
+
+
+def build_tile_query(layer: LayerObject, z: int, x: int, y: int) -> tuple[str, list]:
+    """Build the SQL query generating the vector tile (z, x, y) of a layer."""
+    srid = Feature._meta.get_field("geometry").srid
+
+    # 1. Select the features of the layer intersecting the tile
+    geometry = "f.geometry"
+    geometry_params : list = []
+    conditions = ["f.layer_id = %s", "ST_Intersects(f.geometry, tile.envelope)"]
+    condition_params : list = [layer.dataset_layer_id]
+
+    # 2. Apply the boundaries of the layer
+    if layer.boundaries is not None:
+        boundaries = f"ST_Transform(ST_GeomFromEWKT(%s), {srid})"
+        if layer.boundary_type in (BoundaryType.INTERSECT, BoundaryType.CROP):
+            conditions.append(f"ST_Intersects(f.geometry, {boundaries})")
+        elif layer.boundary_type == BoundaryType.STRICT:
+            conditions.append(f"ST_Within(f.geometry, {boundaries})")
+        else:
+            raise ValueError(f"Invalid boundary type for layer {layer}")
+        condition_params.append(layer.boundaries.ewkt)
+
+        if layer.boundary_type == BoundaryType.CROP:
+            geometry = f"ST_Intersection(f.geometry, {boundaries})"
+            geometry_params.append(layer.boundaries.ewkt)
+
+    # 3. Apply the filters of the layer
+    for filter_ in layer.filters:
+        condition, params = filter_to_sql(filter_)
+        conditions.append(condition)
+        condition_params.extend(params)
+
+    query = f"""
+        WITH tile AS (
+            SELECT ST_TileEnvelope(%s, %s, %s) AS bounds,
+                   ST_Transform(ST_TileEnvelope(%s, %s, %s), {srid}) AS envelope
+        ),
+        mvt AS (
+            SELECT ST_AsMVTGeom(
+                       ST_Transform({geometry}, 3857), tile.bounds, {TILE_EXTENT}, {TILE_BUFFER}, true
+                   ) AS geom,
+                   COALESCE(
+                       (SELECT jsonb_object_agg(p.key, p.value) FROM jsonb_each(f.fields) AS p WHERE p.key = ANY(%s)),
+                       '{{}}'::jsonb
+                   ) AS properties
+            FROM {Feature._meta.db_table} AS f, tile
+            WHERE {" AND ".join(conditions)}
+        )
+        SELECT ST_AsMVT(mvt.*, %s, {TILE_EXTENT}, 'geom') FILTER (WHERE mvt.geom IS NOT NULL), count(*) FROM mvt
+    """
+    params = [z, x, y, z, x, y, *geometry_params, tile_properties(layer), *condition_params, TILE_LAYER_NAME]
+    return query, params
+# End def build_tile_query
+
+
+def filter_to_sql(filter_: Filter) -> tuple[str, list]:
+    """Translate a filter into a SQL condition on the fields of a feature.
+
+    As for the GeoJSON layers, a feature lacking the key of the filter is kept.
+    """
+    if filter_.value_type not in SQL_CASTS:
+        raise ValueError(f"Invalid value type '{filter_.value_type}'")
+    operator = SQL_OPERATORS[filter_.symbol]
+    cast = SQL_CASTS[filter_.value_type]
+    value = str(filter_.value)
+    if filter_.value_type == "string":
+        return (
+            f"(NOT (f.fields ? %s) OR (f.fields ->> %s)::text {operator} %s::text)",
+            [filter_.key, filter_.key, value]
+        )
+
+    # The values of the features that cannot be cast (e.g. '', 'n/a') do not match, rather than failing the query
+    if not SQL_CAST_PATTERNS[filter_.value_type].match(value):
+        raise ValueError(f"Invalid {filter_.value_type} value '{value}' for the filter on '{filter_.key}'")
+    return (
+        f"(NOT (f.fields ? %s) OR "
+        f"CASE WHEN (f.fields ->> %s) ~* %s THEN (f.fields ->> %s)::{cast} END {operator} %s::{cast})",
+        [filter_.key, filter_.key, SQL_CAST_PATTERNS[filter_.value_type].pattern, filter_.key, value]
+    )
+# End def filter_to_sql
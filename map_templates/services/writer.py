@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Render writer service module for the `map_templates` application.
+
+Renders a map once and streams the output to temporary files, from which the storage backend copies it:
+- The full document is written chunk by chunk, a chunk per element of the map, rather than being built
+  as a single string.
+- The embedded document is the full document, escaped and wrapped in an iframe, as done by
+  `Figure._repr_html_`. It is derived from the same chunks, so the map is rendered only once.
+The temporary files are kept in memory while small, and moved to disk once they outgrow `RENDER_SPOOL_SIZE`.
+Both documents are also compressed as they are written, with each of the content codings of `ENCODINGS`,
+so that they are served precompressed.
+The random ids of the elements of the map are replaced beforehand by ids derived from their position in the map,
+so that the same map always gives the same documents, and the same digest.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import tempfile
+import zlib
+from collections import OrderedDict
+from html import escape
+from typing import Iterator
+
+import folium
+from branca.element import Element, Figure
+from django.conf import settings
+from django.core.files import File
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# ======================================================================================================================
+# Constants
+# ======================================================================================================================
+
+logger = logging.getLogger(__name__)
+
+# Size in bytes above which the rendered documents are spooled to disk rather than kept in memory
+RENDER_SPOOL_SIZE = getattr(settings, "MAP_RENDER_SPOOL_SIZE", 8 * 1024 * 1024)
+# Compression levels of the precompressed documents
+GZIP_LEVEL = getattr(settings, "MAP_RENDER_GZIP_LEVEL", 9)
+BROTLI_QUALITY = getattr(settings, "MAP_RENDER_BROTLI_QUALITY", 9)
+# Content codings the documents are precompressed with, by order of preference.
+# Brotli is only used if the `brotli` package is installed.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# ======================================================================================================================
+# Rendering
+# ======================================================================================================================
+
+def element_chunks(element: Element) -> Iterator[str]:
+    """Render an element of a figure (its header, body or script) child by child."""
+    yield from element._template.generate(this=element, kwargs={})
+# End def element_chunks
+
+
+def stabilize_ids(element: Element, path: str = "0") -> None:
+    """Replace the random ids of an element and of its descendants by ids derived from their position.
+
+    The children named after their id are renamed accordingly, the others keeping their name.
+    """
+    element._id = hashlib.sha256(path.encode("utf-8")).hexdigest()[:32]
+    children = []
+    for index, (name, child) in enumerate(element._children.items()):
+        named_after_id = name == child.get_name()
+        stabilize_ids(child, f"{path}.{index}")
+        children.append((child.get_name() if named_after_id else name, child))
+    element._children = OrderedDict(children)
+# End def stabilize_ids
+
+
+def render_chunks(figure: Figure) -> Iterator[str]:
+    """Render a figure chunk by chunk.
+
+    Mirrors `Figure.render`, whose template renders the header, body and script of the figure
+    as single strings, while they are rendered here child by child.
+    """
+    # 1. Render the children, which fill the header, body and script of the figure
+    for child in figure._children.values():
+        child.render()
+
+    # 2. Render the document
+    yield "<!DOCTYPE html>\n<html>\n<head>\n"
+    if figure.title:
+        yield f"<title>{figure.title}</title>"
+    yield "    "
+    yield from element_chunks(figure.header)
+    yield "\n</head>\n<body>\n    "
+    yield from element_chunks(figure.html)
+    yield "\n</body>\n<script>\n    "
+    yield from element_chunks(figure.script)
+    # The trailing newline of the template is dropped by Jinja
+    yield "\n</script>\n</html>"
+# End def render_chunks
+
+
+def embed_wrapper(figure: Figure) -> tuple[str, str]:
+    """Get the HTML surrounding the escaped document in the embedded map, as built by `Figure._repr_html_`."""
+    if figure.height is None:
+        return (
+            f'<div style="width:{figure.width};">'
+            f'<div style="position:relative;width:100%;height:0;padding-bottom:{figure.ratio};">'
+            '<span style="color:#565656">Make this Notebook Trusted to load map: File -> Trust Notebook</span>'
+            '<iframe srcdoc="',
+            '" style="position:absolute;width:100%;height:100%;left:0;top:0;'
+            'border:none !important;" '
+            "allowfullscreen webkitallowfullscreen mozallowfullscreen>"
+            "</iframe>"
+            "</div></div>"
+        )
+    return (
+        '<iframe srcdoc="',
+        f'" width="{figure.width}" height="{figure.height}"'
+        'style="border:none !important;" '
+        '"allowfullscreen" "webkitallowfullscreen" "mozallowfullscreen">'
+        "</iframe>"
+    )
+# End def embed_wrapper
+
+# ======================================================================================================================
+# Compression
+# ======================================================================================================================
+
+class Encoder:
+    """Compresses a document with a content coding as it is written, to a temporary file."""
+
+    def __init__(self, encoding: str) -> None:
+        if encoding == "gzip":
+            # The gzip header holds no timestamp, so that a document is always compressed the same way
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.__compress, self.__finish = compressor.compress, compressor.flush
+        elif encoding == "br" and brotli is not None:
+            compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self.__compress, self.__finish = compressor.process, compressor.finish
+        else:
+            raise ValueError(f"Unsupported encoding '{encoding}'")
+        self.encoding : str = encoding
+        self.file = tempfile.SpooledTemporaryFile(max_size=RENDER_SPOOL_SIZE)
+        self.size : int = 0
+    # End def __init__
+
+    def write(self, data: bytes) -> None:
+        self.size += self.file.write(self.__compress(data))
+    # End def write
+
+    def finish(self) -> None:
+        """Flush the compressor, and rewind the file."""
+        self.size += self.file.write(self.__finish())
+        self.file.seek(0)
+    # End def finish
+# End class Encoder
+
+# ======================================================================================================================
+# Writer
+# ======================================================================================================================
+
+class RenderWriter:
+    """Renders a map once into its full and embedded documents, held by temporary files.
+
+    Usage:
+        with RenderWriter(map_) as writer:
+            writer.write()
+            model.full_html.save(name, writer.full, save=False)
+            model.embed_html.save(name, writer.embed, save=False)
+            for encoding, file in writer.full_encoded.items():
+                model.save_encoded(model.full_html, encoding, file)
+
+    Args:
+        map_ (folium.Map): The map to render.
+        encodings (tuple[str, ...]): The content codings to compress the documents with. Defaults to `ENCODINGS`.
+    """
+
+    def __init__(self, map_: folium.Map, encodings: tuple[str, ...] = ENCODINGS) -> None:
+        self.map : folium.Map = map_
+        self.encodings : tuple[str, ...] = encodings
+        self.full : File | None = None
+        self.embed : File | None = None
+        self.full_size : int = 0
+        self.embed_size : int = 0
+        # SHA-256 digest of the full document, identifying the version of the render
+        self.full_digest : str | None = None
+        # Compressed documents, by content coding
+        self.full_encoded : dict[str, File] = {}
+        self.embed_encoded : dict[str, File] = {}
+    # End def __init__
+
+    def __enter__(self) -> RenderWriter:
+        return self
+    # End def __enter__
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    # End def __exit__
+
+    def write(self) -> None:
+        """Render the map, and write its full and embedded documents."""
+        self.close()
+        full = tempfile.SpooledTemporaryFile(max_size=RENDER_SPOOL_SIZE)
+        embed = tempfile.SpooledTemporaryFile(max_size=RENDER_SPOOL_SIZE)
+        self.full, self.embed = File(full, name="full.html"), File(embed, name="embed.html")
+        self.full_size, self.embed_size = 0, 0
+        full_encoders = [Encoder(encoding) for encoding in self.encodings]
+        embed_encoders = [Encoder(encoding) for encoding in self.encodings]
+        digest = hashlib.sha256()
+
+        def write_full(data: bytes) -> None:
+            self.full_size += full.write(data)
+            digest.update(data)
+            for encoder in full_encoders:
+                encoder.write(data)
+
+        def write_embed(data: bytes) -> None:
+            self.embed_size += embed.write(data)
+            for encoder in embed_encoders:
+                encoder.write(data)
+
+        figure = self.map.get_root()
+        stabilize_ids(figure)
+        prefix, suffix = embed_wrapper(figure)
+        write_embed(prefix.encode("utf-8"))
+        for chunk in render_chunks(figure):
+            # Escaping is done character by character, so the chunks can be escaped independently
+            write_full(chunk.encode("utf-8"))
+            write_embed(escape(chunk).encode("utf-8"))
+        write_embed(suffix.encode("utf-8"))
+
+        full.seek(0)
+        embed.seek(0)
+        self.full_digest = digest.hexdigest()
+        for encoder in (*full_encoders, *embed_encoders):
+            encoder.finish()
+        self.full_encoded = {e.encoding: File(e.file, name=f"full.html.{e.encoding}") for e in full_encoders}
+        self.embed_encoded = {e.encoding: File(e.file, name=f"embed.html.{e.encoding}") for e in embed_encoders}
+        logger.debug(f"Map rendered ({self.full_size} bytes, {self.embed_size} bytes embedded).")
+    # End def write
+
+    def close(self) -> None:
+        """Discard the rendered documents."""
+        for file in (self.full, self.embed, *self.full_encoded.values(), *self.embed_encoded.values()):
+            if file is not None:
+                file.close()
+        self.full, self.embed = None, None
+        self.full_encoded, self.embed_encoded = {}, {}
+    # End def close
+# End class RenderWriter
@@ -4,64 +4,125 @@ Tasks for the `map_templates` application.
 """
 from __future__ import annotations
 
+import logging
+
 from celery import shared_task
 from django.apps import apps
 
 from common.utils.tasks import TaskStatus
+from map_templates.services.mbtiles import build_mbtiles
 from map_templates.services.processor import TemplateProcessor
+from map_templates.services.scheduler import RENDER_DEBOUNCE, is_latest_version, render_lock
+from map_templates.services.snapshot import load_snapshot
+from map_templates.services.templates import MAX_ZOOM, MIN_ZOOM
+
+logger = logging.getLogger(__name__)
 
 
 # noinspection PyPep8Naming
 @shared_task(bind=True)
-def generate_maprender_from_maptemplate_task(self, map_template_id: int):
-    """Generate geometries for a map layer."""
+def generate_maprender_from_maptemplate_task(self, map_template_id: int, version: int | None = None,
+                                             force: bool = False, snapshot: str | None = None):
+    """Generate the render of a map template.
+
+    The render is dropped if a newer version was scheduled since (see `services.scheduler`),
+    and retried later if another render of the template is running.
+    It is skipped if it was generated from the same template and data, unless `force` is set.
+    The template is rendered from its `snapshot` if given (see `services.snapshot`), from the database otherwise.
+    """
     # Get the models.
     # Uses apps.get_model to avoid circular imports.
     MapTemplate = apps.get_model("map_templates", "MapTemplate")
 
-    try:
-        map_template = MapTemplate.objects.get(id=map_template_id)
-    except MapTemplate.DoesNotExist:
-        raise ValueError(f"MapTemplate with ID '{MapTemplate}' does not exist.")
+    # 1. Drop the render if it has been superseded before starting
+    if not is_latest_version(map_template_id, version):
+        logger.info(f"Render v{version} of map template {map_template_id} superseded, dropping it.")
+        return
 
-    # Update the status of the template and its task ID
-    MapTemplate.objects.filter(id=map_template_id).update(task_status=TaskStatus.STARTED,
-                                                          task_id=self.request.id,
-                                                          regenerate=False)
+    with render_lock(map_template_id) as acquired:
+        # 2. Only one render of a template may run at a time, wait for the running one to finish
+        if not acquired:
+            logger.info(f"A render of map template {map_template_id} is running, retrying in {RENDER_DEBOUNCE}s.")
+            raise self.retry(countdown=RENDER_DEBOUNCE, max_retries=None)
+        # The render may have been superseded while waiting for the lock
+        if not is_latest_version(map_template_id, version):
+            logger.info(f"Render v{version} of map template {map_template_id} superseded, dropping it.")
+            return
 
-    request_id = self.request.id
-    task_status = TaskStatus.STARTED
-    try:
-        # 1. Create the processor
         try:
-            processor = TemplateProcessor(map_template)
-        except Exception as e:
-            # Print the whole trace back
-            import traceback
-            print(e, traceback.format_exc())
-            raise e
-        print("Processor created")
-        # 2. Generate the template
-        print("Generating the template")
-        processor.build()
-        print("Template generated")
-        print("Saving the processor")
-        processor.save()
-        print("Processor saved")
-
-    except Exception:
-        # Mark the task as failed and keep the task ID for debugging
-        task_status = TaskStatus.FAILURE
-        raise
-    else:
-        # Remove the task ID
-        task_status = TaskStatus.SUCCESS
-        request_id = None
-    finally:
-        MapTemplate.objects.filter(id=map_template_id).update(task_status=task_status,
-                                                              task_id=request_id,
-                                                              regenerate=False)
+            map_template = MapTemplate.objects.get(id=map_template_id)
+        except MapTemplate.DoesNotExist:
+            raise ValueError(f"MapTemplate with ID '{map_template_id}' does not exist.")
+
+        # The status is only updated while this render is the latest, otherwise it belongs to the newer one
+        template_query = MapTemplate.objects.filter(id=map_template_id)
+        if version is not None:
+            template_query = template_query.filter(render_version=version)
+
+        # Update the status of the template and its task ID
+        template_query.update(task_status=TaskStatus.STARTED, task_id=self.request.id, regenerate=False)
+
+        request_id = self.request.id
+        task_status = TaskStatus.STARTED
+        try:
+            # 3. Create the processor, from the snapshot of the template taken when the render was scheduled
+            template = map_template
+            if snapshot is not None:
+                try:
+                    template = load_snapshot(snapshot)
+                except ValueError as e:
+                    logger.warning(f"Invalid snapshot of map template {map_template_id}, loading it instead: {e}")
+            try:
+                processor = TemplateProcessor(template, model=map_template)
+            except Exception as e:
+                # Print the whole trace back
+                import traceback
+                print(e, traceback.format_exc())
+                raise e
+            print("Processor created")
+            if not force and processor.is_up_to_date():
+                logger.info(f"Render of '{map_template.name}' is up to date, skipping.")
+                task_status = TaskStatus.SUCCESS
+                request_id = None
+                return
+            # 4. Generate the template
+            print("Generating the template")
+            processor.build()
+            print("Template generated")
+            print("Saving the processor")
+            processor.save()
+            print("Processor saved")
+
+        except Exception:
+            # Mark the task as failed and keep the task ID for debugging
+            task_status = TaskStatus.FAILURE
+            raise
+        else:
+            # Remove the task ID
+            task_status = TaskStatus.SUCCESS
+            request_id = None
+        finally:
+            template_query.update(task_status=task_status, task_id=request_id, regenerate=False)
 # End def generate_map_render_from_map_template_task
 
 
+# noinspection PyPep8Naming
+@shared_task(bind=True)
+def build_map_template_tiles_task(self,
+                                  map_template_id: int,
+                                  min_zoom: int = MIN_ZOOM,
+                                  max_zoom: int = MAX_ZOOM,
+                                  jobs: int | None = None) -> str:
+    """Pre-render the vector tile layers of a map template into its MBTiles file.
+
+    The tiles are rendered by `jobs` threads, the workers being daemonic processes.
+    """
+    MapTemplate = apps.get_model("map_templates", "MapTemplate")
+
+    try:
+        map_template = MapTemplate.objects.get(id=map_template_id)
+    except MapTemplate.DoesNotExist:
+        raise ValueError(f"MapTemplate with ID '{map_template_id}' does not exist.")
 
+    return str(build_mbtiles(map_template, min_zoom=min_zoom, max_zoom=max_zoom, jobs=jobs))
+# End def build_map_template_tiles_task
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `batch` module of the `map_templates.services` package.
+"""
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from map_templates.services import batch
+from map_templates.services.batch import RenderOutcome
+
+
+class TestRenderTemplates(SimpleTestCase):
+    def test_renderTemplates_shouldYieldOutcomeOfEachTemplate(self):
+        def render(map_template_id, force=False):
+            status = RenderOutcome.FAILED if map_template_id == 2 else RenderOutcome.RENDERED
+            return RenderOutcome(map_template_id, f"Template{map_template_id}", status)
+
+        with mock.patch.object(batch, "render_template", side_effect=render) as render_template:
+            outcomes = list(batch.render_templates([1, 2, 3], jobs=1, force=True))
+        self.assertEqual(sorted(outcome.template_id for outcome in outcomes), [1, 2, 3])
+        self.assertEqual([outcome.template_id for outcome in outcomes if outcome.failed], [2])
+        render_template.assert_any_call(1, force=True)
+    # End def test_renderTemplates_shouldYieldOutcomeOfEachTemplate
+
+    def test_renderTemplates_shouldYieldNothing_givenNoTemplates(self):
+        self.assertEqual(list(batch.render_templates([])), [])
+    # End def test_renderTemplates_shouldYieldNothing_givenNoTemplates
+# End class TestRenderTemplates
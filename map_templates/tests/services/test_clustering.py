@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `clustering` module of the `map_templates.services` package.
+"""
+import numpy as np
+from django.test import TestCase
+
+from map_templates.services.clustering import build_clusters, point_clusters, project, unproject
+
+
+def point(lon, lat, **properties):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": [lon, lat]}, "properties": properties}
+
+
+class TestClustering(TestCase):
+
+    def test_unproject_shouldInvertProject(self):
+        lonlat = np.array([[6.175715, 49.119308], [-73.98, 40.75], [0.0, 0.0]])
+        np.testing.assert_allclose(unproject(project(lonlat)), lonlat, atol=1e-9)
+    # End def test_unproject_shouldInvertProject
+
+    def test_buildClusters_shouldKeepAllPointsAtEachZoom(self):
+        rng = np.random.default_rng(0)
+        lonlat = np.column_stack((rng.uniform(6.0, 6.3, 500), rng.uniform(49.0, 49.2, 500)))
+        levels = build_clusters(lonlat, min_zoom=1, max_zoom=15)
+        self.assertEqual(sorted(levels), list(range(1, 16)))
+        for centers, counts, members in levels.values():
+            self.assertEqual(counts.sum(), 500)
+            self.assertEqual(len(centers), len(counts))
+        # The lower the zoom, the fewer the clusters
+        self.assertEqual(len(levels[1][1]), 1)
+        self.assertGreater(len(levels[15][1]), len(levels[8][1]))
+    # End def test_buildClusters_shouldKeepAllPointsAtEachZoom
+
+    def test_pointClusters_shouldReferenceSinglePointsAndKeepOtherGeometries(self):
+        line = {"type": "Feature", "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}}
+        features = [
+            point(6.0, 49.0), point(6.0001, 49.0001), {"type": "Feature", "geometry": None}, line, point(120.0, -30.0)
+        ]
+        clusters = point_clusters(iter(features), min_zoom=5, max_zoom=10)
+        # Indices among the features having a geometry
+        self.assertEqual(clusters["always"], [2])
+        level = clusters["levels"]["10"]
+        self.assertEqual(level["points"], [3])
+        self.assertEqual(len(level["clusters"]), 1)
+        self.assertEqual(level["clusters"][0][2], 2)
+    # End def test_pointClusters_shouldReferenceSinglePointsAndKeepOtherGeometries
+
+    def test_pointClusters_shouldReturnNone_givenNoPoints(self):
+        self.assertIsNone(point_clusters([], min_zoom=5))
+    # End def test_pointClusters_shouldReturnNone_givenNoPoints
+# End class TestClustering
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `degradation` module of the `map_templates.services` package.
+"""
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from map_templates.services.degradation import Degradation, degrade_layer, next_degradation, quantize
+from map_templates.services.features import Layer, SourceType, ToolTip
+
+
+class TestDegradation(SimpleTestCase):
+    def setUp(self):
+        # The layers check that their dataset layer exists
+        patcher = mock.patch("map_templates.services.features.DatasetLayer")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.layer = Layer(name="TestLayer", dataset_layer_id=1, layer_id=1,
+                           tooltip=ToolTip(fields=["name"], aliases=["Name"]))
+
+    def test_nextDegradation_shouldClimbLadder(self):
+        self.assertEqual(next_degradation(self.layer, Degradation.NONE), Degradation.PRUNE)
+        self.assertEqual(next_degradation(self.layer, Degradation.SIMPLIFY), Degradation.TILES)
+        self.assertIsNone(next_degradation(self.layer, Degradation.TILES))
+    # End def test_nextDegradation_shouldClimbLadder
+
+    def test_nextDegradation_shouldStopBeforeTiles_givenUnsavedLayer(self):
+        layer = Layer(name="TestLayer", dataset_layer_id=1)
+        self.assertIsNone(next_degradation(layer, Degradation.SIMPLIFY))
+    # End def test_nextDegradation_shouldStopBeforeTiles_givenUnsavedLayer
+
+    def test_degradeLayer_shouldLeaveLayerUnchanged(self):
+        pruned = degrade_layer(self.layer, Degradation.PRUNE)
+        self.assertIsNone(pruned.tooltip)
+        self.assertEqual(pruned.source_type, SourceType.GEOJSON)
+        self.assertIsNotNone(self.layer.tooltip)
+        self.assertEqual(degrade_layer(self.layer, Degradation.TILES).source_type, SourceType.VECTOR_TILES)
+        self.assertEqual(self.layer.source_type, SourceType.GEOJSON)
+    # End def test_degradeLayer_shouldLeaveLayerUnchanged
+
+    def test_quantize_shouldRoundNestedCoordinates(self):
+        geometry = {"type": "GeometryCollection", "geometries": [
+            {"type": "Point", "coordinates": [6.123456789, 49.987654321]},
+            {"type": "Polygon", "coordinates": [[[0.123456, 1.0], [2.000004, 3.999996], [0.123456, 1.0]]]},
+        ]}
+        self.assertEqual(quantize(geometry, 5), {"type": "GeometryCollection", "geometries": [
+            {"type": "Point", "coordinates": [6.12346, 49.98765]},
+            {"type": "Polygon", "coordinates": [[[0.12346, 1.0], [2.0, 4.0], [0.12346, 1.0]]]},
+        ]})
+    # End def test_quantize_shouldRoundNestedCoordinates
+# End class TestDegradation
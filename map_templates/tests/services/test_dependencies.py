@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `dependencies` module of the `map_templates.services` package.
+"""
+from unittest import mock
+
+from django.test import TestCase
+
+from datasets.models import Dataset, DatasetLayer, DatasetVersion
+from datasets.signals import features_generated
+from map_templates import models
+from map_templates.services import dependencies
+from map_templates.services.dependencies import dependent_templates, schedule_dependent_renders
+
+
+class TestDependencies(TestCase):
+    def setUp(self):
+        dataset = Dataset.objects.create(name="Test Dataset")
+        # Created in bulk to skip the generation of the layers from the file of the version
+        version, = DatasetVersion.objects.bulk_create([DatasetVersion(dataset=dataset)])
+        self.first = DatasetLayer.objects.create(dataset=version, name="first")
+        self.second = DatasetLayer.objects.create(dataset=version, name="second")
+        self.unused = DatasetLayer.objects.create(dataset=version, name="unused")
+
+        # A template owning a layer of the first dataset layer
+        self.owner = models.MapTemplate.objects.create(name="Owner Template")
+        models.Layer.objects.create(name="Owned", dataset_layer=self.first, owner_map_template=self.owner)
+        # A template displaying the second dataset layer through a feature group
+        self.grouped = models.MapTemplate.objects.create(name="Grouped Template")
+        group = models.FeatureGroup.objects.create(name="Group", map_template=self.grouped)
+        models.Layer.objects.create(name="Grouped", dataset_layer=self.second, owner_feature_group=group)
+        # A template displaying both, the first one twice
+        self.both = models.MapTemplate.objects.create(name="Both Template")
+        models.Layer.objects.create(name="Owned 1", dataset_layer=self.first, owner_map_template=self.both)
+        models.Layer.objects.create(name="Owned 2", dataset_layer=self.first, owner_map_template=self.both)
+        group = models.FeatureGroup.objects.create(name="Group", map_template=self.both)
+        models.Layer.objects.create(name="Grouped", dataset_layer=self.second, owner_feature_group=group)
+    # End def setUp
+
+    def test_dependentTemplates_shouldJoinOwnedAndGroupedLayers(self):
+        self.assertEqual(dependent_templates([self.first.id]), [self.owner.id, self.both.id])
+        self.assertEqual(dependent_templates([self.second.id]), [self.grouped.id, self.both.id])
+        self.assertEqual(dependent_templates([self.first.id, self.second.id]),
+                         [self.owner.id, self.grouped.id, self.both.id])
+    # End def test_dependentTemplates_shouldJoinOwnedAndGroupedLayers
+
+    def test_dependentTemplates_shouldBeEmpty_givenUnusedLayers(self):
+        self.assertEqual(dependent_templates([self.unused.id]), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(dependent_templates([]), [])
+    # End def test_dependentTemplates_shouldBeEmpty_givenUnusedLayers
+
+    def test_scheduleDependentRenders_shouldScheduleTemplateOnce_givenSeveralChangedLayers(self):
+        with mock.patch.object(dependencies, "schedule_render") as schedule_render:
+            template_ids = schedule_dependent_renders([self.first.id, self.second.id, self.first.id])
+        self.assertEqual(template_ids, [self.owner.id, self.grouped.id, self.both.id])
+        self.assertEqual(sorted(call.args[0] for call in schedule_render.call_args_list), sorted(template_ids))
+    # End def test_scheduleDependentRenders_shouldScheduleTemplateOnce_givenSeveralChangedLayers
+
+    def test_featuresGenerated_shouldScheduleDependentRenders(self):
+        with mock.patch.object(dependencies, "schedule_render") as schedule_render:
+            features_generated.send(sender=DatasetVersion, dataset_version_id=1, dataset_layer_ids=[self.second.id])
+        self.assertEqual(sorted(call.args[0] for call in schedule_render.call_args_list),
+                         sorted([self.grouped.id, self.both.id]))
+    # End def test_featuresGenerated_shouldScheduleDependentRenders
+# End class TestDependencies
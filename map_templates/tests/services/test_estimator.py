@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `estimator` module of the `map_templates.services` package.
+"""
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from map_templates.services import estimator
+from map_templates.services.estimator import LayerEstimate, RenderEstimate
+
+
+def layer_estimate(name: str, features: int, vertices: int, bytes_: int) -> LayerEstimate:
+    estimate = LayerEstimate(name, "aggregate")
+    estimate.features, estimate.vertices, estimate.bytes = features, vertices, bytes_
+    return estimate
+# End def layer_estimate
+
+
+class TestRenderEstimate(SimpleTestCase):
+    def test_totals_shouldSumLayers(self):
+        estimate = RenderEstimate([layer_estimate("A", 10, 100, 1000), layer_estimate("B", 5, 50, 4000)])
+        self.assertEqual((estimate.features, estimate.vertices, estimate.bytes), (15, 150, 5000))
+        self.assertEqual([layer["name"] for layer in estimate.to_dict()["layers"]], ["B", "A"])
+    # End def test_totals_shouldSumLayers
+
+    def test_warnings_shouldBeEmpty_givenRenderWithinBudgets(self):
+        self.assertEqual(RenderEstimate([layer_estimate("A", 10, 100, 1000)]).warnings(), [])
+        self.assertEqual(RenderEstimate().warnings(), [])
+    # End def test_warnings_shouldBeEmpty_givenRenderWithinBudgets
+
+    def test_warnings_shouldNameHeaviestLayer_givenRenderAboveBudgets(self):
+        estimate = RenderEstimate([layer_estimate("A", 10, 100, 1000), layer_estimate("B", 5, 50, 4000)])
+        with mock.patch.multiple(estimator, RENDER_BUDGET_BYTES=2000, RENDER_BUDGET_FEATURES=10,
+                                 RENDER_BUDGET_VERTICES=1000):
+            warnings = estimate.warnings()
+        self.assertEqual(len(warnings), 2)
+        self.assertIn("'B'", warnings[0])
+        self.assertIn("15 features", warnings[1])
+    # End def test_warnings_shouldNameHeaviestLayer_givenRenderAboveBudgets
+
+    def test_warnings_shouldUseTemplateBudget_givenRenderBudget(self):
+        layers = [layer_estimate("A", 10, 100, 1000), layer_estimate("B", 5, 50, 4000), layer_estimate("C", 1, 1, 500)]
+        within = RenderEstimate(layers, render_budget=6000)
+        self.assertEqual(within.warnings(), [])
+        self.assertEqual(within.degraded_layers(), [])
+
+        above = RenderEstimate(layers, render_budget=1200)
+        self.assertEqual(above.budget, 1200)
+        self.assertEqual([layer.name for layer in above.degraded_layers()], ["B", "A"])
+        warnings = above.warnings()
+        self.assertEqual(len(warnings), 1)
+        self.assertIn("'B', 'A'", warnings[0])
+        self.assertNotIn("'C'", warnings[0])
+        self.assertEqual(above.to_dict()["degraded_layers"], ["B", "A"])
+    # End def test_warnings_shouldUseTemplateBudget_givenRenderBudget
+
+    def test_degradedLayers_shouldBeEmpty_givenNoTemplateBudget(self):
+        estimate = RenderEstimate([layer_estimate("A", 10, 100, 1000), layer_estimate("B", 5, 50, 4000)])
+        with mock.patch.object(estimator, "RENDER_BUDGET_BYTES", 2000):
+            self.assertEqual(estimate.degraded_layers(), [])
+            self.assertEqual(estimate.budget, 2000)
+    # End def test_degradedLayers_shouldBeEmpty_givenNoTemplateBudget
+# End class TestRenderEstimate
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `features` module of the `map_templates.services` package.
+"""
+from unittest import mock
+
+from django.test import TestCase
+
+from map_templates.services.features import Layer, ToolTip
+from map_templates.services.filters import Filter
+from map_templates.services.styles import PropertyStyle, Style
+
+
+class TestLayerProperties(TestCase):
+    def setUp(self):
+        # The layers check that their dataset layer exists
+        patcher = mock.patch("map_templates.services.features.DatasetLayer")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        style = Style(color="#000000")
+        style.property_styles.append(PropertyStyle(key="type", value="road", color="#ff0000"))
+        self.layer = Layer(
+            name="TestLayer",
+            dataset_layer_id=1,
+            tooltip=ToolTip(fields=["name", "type"], aliases=["Name", "Type"]),
+            style=style,
+            filters=[Filter(key="state", operator="==", value="open"), Filter(key="name", operator="!=", value="")]
+        )
+
+    def test_displayedProperties_shouldReturnTooltipAndStyleKeys(self):
+        self.assertEqual(self.layer.displayed_properties(), ["name", "type"])
+    # End def test_displayedProperties_shouldReturnTooltipAndStyleKeys
+
+    def test_requiredProperties_shouldAddFilterKeys(self):
+        self.assertEqual(self.layer.required_properties(), ["name", "type", "state"])
+    # End def test_requiredProperties_shouldAddFilterKeys
+
+    def test_displayedProperties_shouldBeEmpty_givenNoTooltipNorStyle(self):
+        self.assertEqual(Layer(name="Bare", dataset_layer_id=1).displayed_properties(), [])
+    # End def test_displayedProperties_shouldBeEmpty_givenNoTooltipNorStyle
+# End class TestLayerProperties
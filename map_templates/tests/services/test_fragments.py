@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `fragments` module of the `map_templates.services` package.
+"""
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase
+
+from map_templates.services import fragments
+from map_templates.services.features import Layer
+from map_templates.services.filters import Filter
+from map_templates.services.styles import Style
+
+
+class TestFragments(TestCase):
+    def setUp(self):
+        # The layers check that their dataset layer exists
+        patcher = mock.patch("map_templates.services.features.DatasetLayer")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.layer = Layer(name="TestLayer", dataset_layer_id=1, filters=[Filter(key="type", operator="==", value="road")])
+        self.data = {"type": "FeatureCollection", "features": []}
+        self.root = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(fragments, "FRAGMENTS_ROOT", Path(self.root.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.root.cleanup)
+
+    def test_fragmentKey_shouldReturnNone_givenUnknownChecksum(self):
+        self.assertIsNone(fragments.fragment_key(self.layer, None))
+    # End def test_fragmentKey_shouldReturnNone_givenUnknownChecksum
+
+    def test_fragmentKey_shouldIgnoreStyle(self):
+        styled = Layer(name="TestLayer", dataset_layer_id=1, filters=self.layer.filters, style=Style(color="#ff0000"))
+        self.assertEqual(fragments.fragment_key(self.layer, "abc"), fragments.fragment_key(styled, "abc"))
+    # End def test_fragmentKey_shouldIgnoreStyle
+
+    def test_fragmentKey_shouldChange_givenOtherDataOrFilters(self):
+        other = Layer(name="TestLayer", dataset_layer_id=1, filters=[Filter(key="type", operator="!=", value="road")])
+        self.assertNotEqual(fragments.fragment_key(self.layer, "abc"), fragments.fragment_key(self.layer, "abd"))
+        self.assertNotEqual(fragments.fragment_key(self.layer, "abc"), fragments.fragment_key(other, "abc"))
+    # End def test_fragmentKey_shouldChange_givenOtherDataOrFilters
+
+    def test_fragmentKey_shouldChange_givenOtherDegradation(self):
+        self.assertNotEqual(fragments.fragment_key(self.layer, "abc"), fragments.fragment_key(self.layer, "abc", 2))
+    # End def test_fragmentKey_shouldChange_givenOtherDegradation
+
+    def test_cachedFragment_shouldReturnWrittenFragment(self):
+        path = fragments.write_fragment(self.layer, "abc", self.data["features"])
+        self.assertEqual(fragments.cached_fragment(self.layer, "abc"), path)
+        self.assertEqual(list(fragments.iter_features(path)), self.data["features"])
+        self.assertIsNone(fragments.cached_fragment(self.layer, "abd"))
+    # End def test_cachedFragment_shouldReturnWrittenFragment
+
+    def test_writeFragment_shouldRemoveFragmentsOfOutdatedData(self):
+        old_path = fragments.write_fragment(self.layer, "old", self.data["features"])
+        new_path = fragments.write_fragment(self.layer, "new", self.data["features"])
+        self.assertFalse(old_path.exists())
+        self.assertTrue(new_path.exists())
+    # End def test_writeFragment_shouldRemoveFragmentsOfOutdatedData
+
+    def test_iterFeatures_shouldReadWrittenFeatures(self):
+        features = [
+            {"type": "Feature", "geometry": None, "properties": {"name": "line\nbreak, and ]}"}},
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [6.0, 49.0]}, "properties": {}},
+        ]
+        path = Path(self.root.name) / "features.json"
+        self.assertEqual(fragments.write_features(path, iter(features)), 2)
+        self.assertEqual(list(fragments.iter_features(path)), features)
+        self.assertEqual(fragments.count_features(path), 2)
+        with open(path, "r", encoding="utf-8") as file:
+            self.assertEqual(json.load(file), {"type": "FeatureCollection", "features": features})
+    # End def test_iterFeatures_shouldReadWrittenFeatures
+
+    def test_countFeatures_shouldReturnZero_givenNoFeatures(self):
+        path = Path(self.root.name) / "features.json"
+        fragments.write_features(path, [])
+        self.assertEqual(fragments.count_features(path), 0)
+        self.assertEqual(list(fragments.iter_features(path)), [])
+    # End def test_countFeatures_shouldReturnZero_givenNoFeatures
+# End class TestFragments
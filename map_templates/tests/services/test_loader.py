@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `loader` module of the `map_templates.services` package.
+"""
+from django.test import TestCase
+
+from datasets.models import Dataset, DatasetLayer, DatasetLayerField, DatasetVersion
+from map_templates import models
+from map_templates.services.loader import load_layer, load_template
+
+# Queries taken to load a template model: its tiles, its layers and their 4 prefetched relations,
+# its feature groups, their layers and their 4 prefetched relations, and the check of the dataset layers
+TEMPLATE_QUERIES = 13
+
+
+class TestLoader(TestCase):
+    def setUp(self):
+        dataset = Dataset.objects.create(name="Test Dataset")
+        # Created in bulk to skip the generation of the layers from the file of the version
+        version, = DatasetVersion.objects.bulk_create([DatasetVersion(dataset=dataset)])
+        self.dataset_layer = DatasetLayer.objects.create(dataset=version, name="test")
+        self.field = DatasetLayerField.objects.create(layer=self.dataset_layer, name="name", type="OFTString")
+
+        self.template = models.MapTemplate.objects.create(name="Test Template")
+        self.feature_group = models.FeatureGroup.objects.create(name="Test Group", map_template=self.template)
+        self.add_layer(owner_map_template=self.template)
+        self.add_layer(owner_feature_group=self.feature_group)
+
+    def add_layer(self, **owner) -> models.Layer:
+        """Create a layer with a style, a highlight, a filter and a tooltip."""
+        style = models.Style.objects.create()
+        models.PropertyStyle.objects.create(style=style, key="name", value="A")
+        highlight = models.Style.objects.create()
+        models.PropertyStyle.objects.create(style=highlight, key="name", value="B")
+        layer = models.Layer.objects.create(name=f"Layer {models.Layer.objects.count()}",
+                                            dataset_layer=self.dataset_layer, style=style, highlight=highlight,
+                                            **owner)
+        models.Filter.objects.create(layer=layer, key="name", operator="!=", value="C")
+        tooltip = models.Tooltip.objects.create(layer=layer)
+        models.TooltipField.objects.create(tooltip=tooltip, field=self.field, alias="Name")
+        return layer
+    # End def add_layer
+
+    def test_loadTemplate_shouldBuildTemplate(self):
+        template = load_template(self.template)
+        self.assertEqual(len(list(template.layers())), 2)
+        for layer in template.layers():
+            self.assertEqual(layer.tooltip.fields, ["name"])
+            self.assertEqual(len(layer.style.property_styles), 1)
+            self.assertEqual(len(layer.highlight.property_styles), 1)
+            self.assertEqual(len(layer.filters), 1)
+    # End def test_loadTemplate_shouldBuildTemplate
+
+    def test_loadTemplate_shouldTakeFixedNumberOfQueries(self):
+        with self.assertNumQueries(TEMPLATE_QUERIES):
+            load_template(models.MapTemplate.objects.get(id=self.template.id))
+    # End def test_loadTemplate_shouldTakeFixedNumberOfQueries
+
+    def test_loadTemplate_shouldTakeFixedNumberOfQueries_givenMoreLayers(self):
+        for _ in range(3):
+            self.add_layer(owner_map_template=self.template)
+            self.add_layer(owner_feature_group=self.feature_group)
+        with self.assertNumQueries(TEMPLATE_QUERIES):
+            load_template(models.MapTemplate.objects.get(id=self.template.id))
+    # End def test_loadTemplate_shouldTakeFixedNumberOfQueries_givenMoreLayers
+
+    def test_loadTemplate_shouldFetchTemplate_givenId(self):
+        with self.assertNumQueries(TEMPLATE_QUERIES + 1):
+            template = load_template(self.template.id)
+        self.assertEqual(template.name, "Test Template")
+    # End def test_loadTemplate_shouldFetchTemplate_givenId
+
+    def test_loadTemplate_shouldRaiseValueError_givenMissingDatasetLayer(self):
+        models.Layer.objects.filter(owner_map_template=self.template).update(dataset_layer=None)
+        with self.assertRaises(ValueError):
+            load_template(self.template.id)
+    # End def test_loadTemplate_shouldRaiseValueError_givenMissingDatasetLayer
+
+    def test_loadLayer_shouldTakeFixedNumberOfQueries(self):
+        layer_id = models.Layer.objects.filter(owner_map_template=self.template).values_list('id', flat=True).get()
+        # The layer and its 4 prefetched relations, and the check of its dataset layer
+        with self.assertNumQueries(6):
+            layer = load_layer(layer_id)
+        self.assertEqual(layer.dataset_layer_id, self.dataset_layer.id)
+    # End def test_loadLayer_shouldTakeFixedNumberOfQueries
+# End class TestLoader
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `mbtiles` module of the `map_templates.services` package.
+"""
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase
+
+from map_templates.services import mbtiles
+from map_templates.services.features import Layer, SourceType
+from map_templates.services.mbtiles import lonlat_to_tile, tile_children, tile_range
+from map_templates.services.vector_tiles import tile_definition_key
+
+
+class TestTileGrid(TestCase):
+
+    def test_lonlatToTile_shouldReturnTileContainingPoint(self):
+        self.assertEqual(lonlat_to_tile(6.175715, 49.119308, 10), (529, 351))
+        self.assertEqual(lonlat_to_tile(0.0, 0.0, 1), (1, 1))
+    # End def test_lonlatToTile_shouldReturnTileContainingPoint
+
+    def test_lonlatToTile_shouldClampToGrid_givenPointOutsideProjection(self):
+        self.assertEqual(lonlat_to_tile(-180.0, 89.0, 3), (0, 0))
+        self.assertEqual(lonlat_to_tile(180.0, -89.0, 3), (7, 7))
+    # End def test_lonlatToTile_shouldClampToGrid_givenPointOutsideProjection
+
+    def test_tileRange_shouldCoverBounds(self):
+        xs, ys = tile_range((4.675715, 47.619308, 7.675715, 50.619308), 10)
+        self.assertIn(529, xs)
+        self.assertIn(351, ys)
+        self.assertLess(xs.start, xs.stop)
+        self.assertLess(ys.start, ys.stop)
+    # End def test_tileRange_shouldCoverBounds
+
+    def test_tileChildren_shouldReturnChildrenWithinBounds(self):
+        bounds = (-180.0, -85.0, 180.0, 85.0)
+        self.assertEqual(sorted(tile_children([(0, 0)], bounds, 0)), [(0, 0), (0, 1), (1, 0), (1, 1)])
+
+        bounds = (1.0, 1.0, 179.0, 85.0) # North-east quarter only
+        self.assertEqual(tile_children([(0, 0)], bounds, 0), [(1, 0)])
+    # End def test_tileChildren_shouldReturnChildrenWithinBounds
+# End class TestTileGrid
+
+
+class TestPrebuiltTileUrl(TestCase):
+
+    def setUp(self):
+        self.layer = Layer("TestLayer", 1, layer_id=7, source_type=SourceType.VECTOR_TILES, check_dataset_layer=False)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "1.mbtiles"
+        db = sqlite3.connect(self.path)
+        db.executescript(mbtiles.SCHEMA)
+        db.execute("INSERT INTO layers (layer_id, name, definition) VALUES (?, ?, ?)",
+                   (7, "TestLayer", tile_definition_key(self.layer, "checksum-1")))
+        db.commit()
+        db.close()
+    # End def setUp
+
+    def prebuilt_tile_url(self, checksum):
+        with mock.patch.object(mbtiles, "mbtiles_path", return_value=self.path), \
+             mock.patch.object(mbtiles, "dataset_layer_checksum", return_value=checksum):
+            return mbtiles.prebuilt_tile_url(1, self.layer)
+    # End def prebuilt_tile_url
+
+    def test_prebuiltTileUrl_shouldReturnUrl_givenSameData(self):
+        self.assertEqual(self.prebuilt_tile_url("checksum-1"), "/tiles/templates/1/7/{z}/{x}/{y}.pbf")
+    # End def test_prebuiltTileUrl_shouldReturnUrl_givenSameData
+
+    def test_prebuiltTileUrl_shouldReturnNone_givenChangedChecksum(self):
+        self.assertIsNone(self.prebuilt_tile_url("checksum-2"))
+    # End def test_prebuiltTileUrl_shouldReturnNone_givenChangedChecksum
+# End class TestPrebuiltTileUrl
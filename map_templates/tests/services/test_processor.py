@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `processor` module of the `map_templates.services` package.
+"""
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.test import TransactionTestCase, override_settings
+
+from datasets.models import Dataset, DatasetLayer, DatasetVersion, Feature
+from map_templates import models, tasks
+from map_templates.services import processor
+from map_templates.services.processor import TemplateProcessor
+
+TemporaryDirectory = tempfile.TemporaryDirectory
+
+
+# The layers are generated by other threads, which only see the committed data
+class TestTemplateProcessor(TransactionTestCase):
+    def setUp(self):
+        # The renders scheduled once the template is created are not enqueued
+        apply_async = mock.patch.object(tasks.generate_maprender_from_maptemplate_task, "apply_async")
+        apply_async.start()
+        self.addCleanup(apply_async.stop)
+
+        dataset = Dataset.objects.create(name="Test Dataset")
+        # Created in bulk to skip the generation of the layers from the file of the version
+        version, = DatasetVersion.objects.bulk_create([DatasetVersion(dataset=dataset)])
+        self.template = models.MapTemplate.objects.create(name="Test Template")
+        for i in range(3):
+            dataset_layer = DatasetLayer.objects.create(dataset=version, name=f"layer-{i}")
+            Feature.objects.bulk_create([
+                Feature(layer=dataset_layer, geometry=Point(6.0 + j / 10, 49.0, srid=4326), fields={"index": j})
+                for j in range(i + 1)
+            ])
+            models.Layer.objects.create(name=f"Layer {i}", dataset_layer=dataset_layer,
+                                        owner_map_template=self.template)
+
+        patches = mock.patch.multiple(processor, RENDER_JOBS=3, SHARED_ASSETS=False)
+        patches.start()
+        self.addCleanup(patches.stop)
+    # End def setUp
+
+    def test_build_shouldProfileEachLayer_givenLayersGeneratedConcurrently(self):
+        template_processor = TemplateProcessor(self.template)
+        template_processor.build()
+
+        self.assertIsNotNone(template_processor.map)
+        profiler = template_processor.profiler
+        self.assertEqual({layer.name: layer.features for layer in profiler.layers},
+                         {"Layer 0": 1, "Layer 1": 2, "Layer 2": 3})
+        self.assertTrue(all(layer.source == "database" and layer.bytes > 0 for layer in profiler.layers))
+        self.assertIn("layers_data", profiler.stages)
+    # End def test_build_shouldProfileEachLayer_givenLayersGeneratedConcurrently
+
+    def test_build_shouldRemoveTemporaryDirectory_givenFailure(self):
+        directories = []
+
+        def temporary_directory(*args, **kwargs):
+            directory = TemporaryDirectory(*args, **kwargs)
+            directories.append(Path(directory.name))
+            return directory
+
+        template_processor = TemplateProcessor(self.template)
+        with mock.patch.object(processor.tempfile, "TemporaryDirectory", side_effect=temporary_directory), \
+             mock.patch.object(processor, "generate_legend", side_effect=RuntimeError("Legend failed")):
+            with self.assertRaises(RuntimeError):
+                template_processor.build()
+
+        self.assertEqual(len(directories), 1)
+        self.assertFalse(directories[0].exists())
+        self.assertIsNone(template_processor.map)
+    # End def test_build_shouldRemoveTemporaryDirectory_givenFailure
+
+    def test_save_shouldRecordProfileOfRender(self):
+        media_root = TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        template_processor = TemplateProcessor(self.template)
+        with override_settings(MEDIA_ROOT=media_root.name):
+            template_processor.build()
+            template_processor.save()
+
+        profile = models.MapTemplate.objects.get(id=self.template.id).render.profiles.get()
+        self.assertEqual(profile.duration, template_processor.profiler.duration)
+        self.assertGreater(profile.embed_size, 0)
+        self.assertGreater(profile.full_size, 0)
+        self.assertTrue({"checksums", "layers_data", "layers", "legend", "render", "write"} <= set(profile.stages))
+        self.assertEqual({layer["name"]: layer["features"] for layer in profile.layers},
+                         {"Layer 0": 1, "Layer 1": 2, "Layer 2": 3})
+    # End def test_save_shouldRecordProfileOfRender
+# End class TestTemplateProcessor
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `profiling` module of the `map_templates.services` package.
+"""
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from map_templates.services import profiling
+from map_templates.services.profiling import LayerProfile, RenderProfiler
+
+
+def clock(*times: float):
+    """Patch the clock of the profilers to return the given times, one per reading."""
+    return mock.patch.object(profiling.time, "perf_counter", side_effect=list(times))
+# End def clock
+
+
+class TestLayerProfile(SimpleTestCase):
+    def test_stage_shouldSumStagesSharingName(self):
+        profile = LayerProfile("TestLayer")
+        with clock(1.0, 1.5, 2.0, 2.25, 3.0, 4.0):
+            with profile.stage("query"):
+                pass
+            with profile.stage("query"):
+                pass
+            with profile.stage("geojson"):
+                pass
+        self.assertEqual(profile.stages, {"query": 0.75, "geojson": 1.0})
+    # End def test_stage_shouldSumStagesSharingName
+
+    def test_stage_shouldRecordStage_givenError(self):
+        profile = LayerProfile("TestLayer")
+        with clock(1.0, 3.0), self.assertRaises(ValueError):
+            with profile.stage("query"):
+                raise ValueError("Invalid layer")
+        self.assertEqual(profile.stages, {"query": 2.0})
+    # End def test_stage_shouldRecordStage_givenError
+# End class TestLayerProfile
+
+
+class TestRenderProfiler(SimpleTestCase):
+    def setUp(self):
+        with clock(0.0):
+            self.profiler = RenderProfiler()
+    # End def setUp
+
+    def test_lap_shouldRecordTimeSincePreviousLap(self):
+        with clock(1.0, 3.0, 10.0, 10.5, 11.0):
+            self.profiler.lap("checksums")
+            self.profiler.lap("layers")
+            # The time between the laps is excluded once restarted
+            self.profiler.restart()
+            self.profiler.lap("render")
+            self.profiler.lap("layers")
+        self.assertEqual(self.profiler.stages, {"checksums": 1.0, "layers": 2.5, "render": 0.5})
+        self.assertEqual(self.profiler.duration, 4.0)
+    # End def test_lap_shouldRecordTimeSincePreviousLap
+
+    def test_layer_shouldRecordLayerDuration(self):
+        with clock(1.0, 1.5, 2.0, 4.0):
+            with self.profiler.layer("TestLayer") as profile:
+                with profile.stage("query"):
+                    pass
+        self.assertEqual(self.profiler.layers, [profile])
+        self.assertEqual(profile.duration, 3.0)
+        self.assertEqual(profile.stages, {"query": 0.5})
+        # The layers are generated within the stages of the render, not part of its duration
+        self.assertEqual(self.profiler.duration, 0.0)
+    # End def test_layer_shouldRecordLayerDuration
+
+    def test_merge_shouldAddProfilesOfOtherProfiler(self):
+        with clock(0.0):
+            other = RenderProfiler()
+        with clock(1.0, 2.0, 3.0, 7.0):
+            with self.profiler.layer("Fast"):
+                pass
+            with other.layer("Slow"):
+                pass
+        self.profiler.stages["layers_data"] = 1.0
+        other.stages["layers_data"] = 2.0
+        self.profiler.sizes["assets"] = 10
+        other.sizes.update({"assets": 5, "embed_html": 3})
+
+        self.profiler.merge(other)
+        self.assertEqual(self.profiler.stages, {"layers_data": 3.0})
+        self.assertEqual(self.profiler.sizes, {"assets": 15, "embed_html": 3})
+        profile = self.profiler.to_dict()
+        self.assertEqual(profile["duration"], 3.0)
+        self.assertEqual([layer["name"] for layer in profile["layers"]], ["Slow", "Fast"])
+        self.assertEqual(profile["layers"][0]["duration"], 4.0)
+    # End def test_merge_shouldAddProfilesOfOtherProfiler
+# End class TestRenderProfiler
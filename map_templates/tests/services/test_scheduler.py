@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `scheduler` module of the `map_templates.services` package.
+"""
+import contextlib
+from unittest import mock
+
+import django.test as djangotest
+from celery.exceptions import Retry
+from django.db import connections
+
+from common.utils.tasks import TaskStatus
+from map_templates import models, tasks
+from map_templates.services import scheduler
+from map_templates.services.scheduler import RENDER_LOCK_NAMESPACE, is_latest_version, render_lock, schedule_render
+
+
+class TestScheduleRender(djangotest.TestCase):
+    def setUp(self):
+        self.template = models.MapTemplate.objects.create(name="TestMapTemplate")
+        self.version = models.MapTemplate.objects.get(id=self.template.id).render_version
+        self.apply_async = mock.patch.object(tasks.generate_maprender_from_maptemplate_task, "apply_async").start()
+        mock.patch.object(scheduler, "template_snapshot", return_value="snapshot").start()
+        self.addCleanup(mock.patch.stopall)
+    # End def setUp
+
+    def test_scheduleRender_shouldEnqueueDebouncedTask_givenCommit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            version = schedule_render(self.template.id)
+
+        self.assertEqual(version, self.version + 1)
+        self.apply_async.assert_called_once_with(
+            args=(self.template.id,),
+            kwargs={"version": version, "force": False, "snapshot": "snapshot"},
+            countdown=scheduler.RENDER_DEBOUNCE,
+        )
+        template = models.MapTemplate.objects.get(id=self.template.id)
+        self.assertEqual(template.task_status, TaskStatus.PENDING)
+    # End def test_scheduleRender_shouldEnqueueDebouncedTask_givenCommit
+
+    def test_scheduleRender_shouldSupersedePreviousRender_givenBurst(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = schedule_render(self.template.id)
+            second = schedule_render(self.template.id)
+
+        self.assertEqual(second, first + 1)
+        self.assertFalse(is_latest_version(self.template.id, first))
+        self.assertTrue(is_latest_version(self.template.id, second))
+        self.assertTrue(is_latest_version(self.template.id, None))
+        self.assertEqual(self.apply_async.call_count, 2)
+    # End def test_scheduleRender_shouldSupersedePreviousRender_givenBurst
+
+    def test_scheduleRender_shouldRaise_givenUnknownTemplate(self):
+        with self.assertRaises(ValueError):
+            schedule_render(self.template.id + 1000)
+    # End def test_scheduleRender_shouldRaise_givenUnknownTemplate
+
+    def test_save_shouldKeepScheduledVersion_givenStaleInstance(self):
+        stale = models.MapTemplate.objects.get(id=self.template.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            version = schedule_render(self.template.id)
+
+        stale.name = "RenamedMapTemplate"
+        stale.save()
+
+        template = models.MapTemplate.objects.get(id=self.template.id)
+        self.assertEqual(template.name, "RenamedMapTemplate")
+        self.assertEqual(template.render_version, version)
+        self.assertEqual(template.task_status, TaskStatus.PENDING)
+        self.assertTrue(is_latest_version(self.template.id, version))
+    # End def test_save_shouldKeepScheduledVersion_givenStaleInstance
+# End class TestScheduleRender
+
+
+class TestRenderLock(djangotest.TestCase):
+    @contextlib.contextmanager
+    def other_session_lock(self, map_template_id):
+        """Try to take the lock of the render of a template from another database session, yielding if it did."""
+        other = connections.create_connection("default")
+        try:
+            with other.cursor() as cursor:
+                cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [RENDER_LOCK_NAMESPACE, map_template_id])
+                yield cursor.fetchone()[0]
+        finally:
+            other.close()
+    # End def other_session_lock
+
+    def test_renderLock_shouldAcquireLock_givenFreeLock(self):
+        with render_lock(1) as acquired:
+            self.assertTrue(acquired)
+        # Released on exit
+        with self.other_session_lock(1) as acquired:
+            self.assertTrue(acquired)
+    # End def test_renderLock_shouldAcquireLock_givenFreeLock
+
+    def test_renderLock_shouldNotAcquireLock_givenRenderRunning(self):
+        with self.other_session_lock(1) as taken:
+            self.assertTrue(taken)
+            with render_lock(1) as acquired:
+                self.assertFalse(acquired)
+            # The locks of the other templates are distinct
+            with render_lock(2) as acquired:
+                self.assertTrue(acquired)
+    # End def test_renderLock_shouldNotAcquireLock_givenRenderRunning
+# End class TestRenderLock
+
+
+class TestGenerateMapRenderTask(djangotest.TestCase):
+    def setUp(self):
+        self.template = models.MapTemplate.objects.create(name="TestMapTemplate")
+        self.task = tasks.generate_maprender_from_maptemplate_task
+        self.processor = mock.patch.object(tasks, "TemplateProcessor").start()
+        self.addCleanup(mock.patch.stopall)
+    # End def setUp
+
+    def test_task_shouldDropRender_givenSupersededVersion(self):
+        version = models.MapTemplate.objects.get(id=self.template.id).render_version
+        self.task(self.template.id, version=version + 1)
+        self.processor.assert_not_called()
+    # End def test_task_shouldDropRender_givenSupersededVersion
+
+    def test_task_shouldRetry_givenRenderRunning(self):
+        @contextlib.contextmanager
+        def taken_lock(map_template_id):
+            yield False
+
+        mock.patch.object(tasks, "render_lock", taken_lock).start()
+        with mock.patch.object(self.task, "retry", side_effect=Retry()) as retry:
+            with self.assertRaises(Retry):
+                self.task(self.template.id)
+        retry.assert_called_once_with(countdown=scheduler.RENDER_DEBOUNCE, max_retries=None)
+        self.processor.assert_not_called()
+    # End def test_task_shouldRetry_givenRenderRunning
+
+    def test_task_shouldRender_givenLatestVersion(self):
+        version = models.MapTemplate.objects.get(id=self.template.id).render_version
+        self.processor.return_value.is_up_to_date.return_value = False
+        self.task(self.template.id, version=version, force=True)
+
+        self.processor.return_value.build.assert_called_once()
+        self.processor.return_value.save.assert_called_once()
+        self.assertEqual(models.MapTemplate.objects.get(id=self.template.id).task_status, TaskStatus.SUCCESS)
+    # End def test_task_shouldRender_givenLatestVersion
+# End class TestGenerateMapRenderTask
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `snapshot` module of the `map_templates.services` package.
+"""
+import json
+
+import django.test as djangotest
+
+from map_templates.services.features import FeatureGroup, Layer, ToolTip
+from map_templates.services.filters import Filter
+from map_templates.services.snapshot import SNAPSHOT_VERSION, dump_snapshot, load_snapshot
+from map_templates.services.styles import Style
+from map_templates.services.templates import MapTemplate
+from map_templates.services.tiles import TileLayer
+
+
+class TestSnapshot(djangotest.TestCase):
+    def setUp(self):
+        self.layer = Layer(name="TestLayer", dataset_layer_id=1, layer_id=1,
+                           style=Style(stroke=True, color="#000000"),
+                           tooltip=ToolTip(fields=["name"], aliases=["Name"], sticky=False),
+                           filters=[Filter(key="test", operator="==", value="value")],
+                           check_dataset_layer=False)
+        self.nested = Layer(name="NestedLayer", dataset_layer_id=2, layer_id=2, check_dataset_layer=False)
+        self.template = MapTemplate(
+            name="TestMapTemplate",
+            tiles=[TileLayer(name="TestTile", type="xyz", url="https://{s}.tiles/{z}/{x}/{y}.png",
+                             access_token="token", attribution="(c) Test")],
+            features=[self.layer, FeatureGroup(name="TestFeatureGroup", features=[self.nested])],
+            render_budget=1024
+        )
+
+    def test_loadSnapshot_shouldRestoreTemplate_givenFeatureGroups(self):
+        template = load_snapshot(dump_snapshot(self.template))
+        self.assertEqual(template.serialize(), self.template.serialize())
+        self.assertEqual({layer.name for layer in template.layers()}, {"TestLayer", "NestedLayer"})
+        self.assertIn("TestFeatureGroup", {feature.name for feature in template.features})
+    # End def test_loadSnapshot_shouldRestoreTemplate_givenFeatureGroups
+
+    def test_loadSnapshot_shouldNotQueryDatabase(self):
+        snapshot = dump_snapshot(self.template)
+        with self.assertNumQueries(0):
+            load_snapshot(snapshot)
+    # End def test_loadSnapshot_shouldNotQueryDatabase
+
+    def test_dumpSnapshot_shouldBeDeterministic(self):
+        other = MapTemplate.deserialize(self.template.serialize(), check_dataset_layer=False)
+        self.assertEqual(dump_snapshot(other), dump_snapshot(self.template))
+    # End def test_dumpSnapshot_shouldBeDeterministic
+
+    def test_loadSnapshot_shouldRaiseValueError_givenOtherVersion(self):
+        payload = json.loads(dump_snapshot(self.template))
+        payload["version"] = SNAPSHOT_VERSION + 1
+        with self.assertRaises(ValueError):
+            load_snapshot(json.dumps(payload))
+        with self.assertRaises(ValueError):
+            load_snapshot("not a snapshot")
+    # End def test_loadSnapshot_shouldRaiseValueError_givenOtherVersion
+# End class TestSnapshot
@@ -2,7 +2,10 @@
 """
 Tests for the `styles` module of the `map_templates.services` package.
 """
+import json
+
 from django.test import TestCase
+from folium.plugins import StripePattern
 
 from map_templates.services.styles import PropertyStyle, Style, validate_style_attributes
 
@@ -22,6 +25,42 @@ class TestStyle(TestCase):
         result = Style._from_dict(data)
         self.assertEqual(result.stroke, True)
     # End def test_deserialize_shouldReturnCorrectStyle
+
+    def test_compile_shouldReturnBaseStyleWithLeafletNames(self):
+        self.style.color = "#000000"
+        self.style.fill_opacity = 0.5
+        result = self.style.compile()
+        self.assertEqual(result, {"base": {"color": "#000000", "fillOpacity": 0.5}, "keys": [], "rules": {}})
+    # End def test_compile_shouldReturnBaseStyleWithLeafletNames
+
+    def test_compile_shouldIndexPropertyStylesByKeyAndValue(self):
+        self.style.color = "#000000"
+        self.style.property_styles = [
+            PropertyStyle("type", "road", color="#ff0000"),
+            PropertyStyle("type", "rail", color="#00ff00"),
+            PropertyStyle("state", "closed", dash_array="5 5"),
+            PropertyStyle("type", "road", weight=4),
+        ]
+        result = self.style.compile()
+        self.assertEqual(result["keys"], ["type", "state"])
+        self.assertEqual(result["rules"], {
+            "type": {
+                "road": {"color": "#ff0000", "weight": 4},
+                "rail": {"color": "#00ff00"},
+            },
+            "state": {
+                "closed": {"dashArray": "5 5"},
+            },
+        })
+    # End def test_compile_shouldIndexPropertyStylesByKeyAndValue
+
+    def test_serialize_shouldRoundTrip_givenFillPattern(self):
+        self.style.fill_pattern = StripePattern(angle=45, weight=2, color="#ff0000")
+        data = json.loads(json.dumps(self.style._to_dict()))
+        result = Style._from_dict(data)
+        self.assertIsInstance(result.fill_pattern, StripePattern)
+        self.assertEqual(result.fill_pattern.options, self.style.fill_pattern.options)
+    # End def test_serialize_shouldRoundTrip_givenFillPattern
 # End class TestStyle
 
 
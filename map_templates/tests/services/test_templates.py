@@ -29,6 +29,17 @@ class TestMapTemplateObject(djangotest.TestCase):
         self.assertIn(self.layer, self.map_template.features)
         self.assertIn(self.feature_group, self.map_template.features)
 
+    def test_layers_shouldIncludeNestedLayers(self):
+        nested = Layer(name="NestedLayer", dataset_layer_id=1)
+        self.map_template.add_feature(FeatureGroup(name="OtherFeatureGroup", features=[nested]))
+        self.assertEqual({layer.name for layer in self.map_template.layers()}, {"TestLayer", "NestedLayer"})
+    # End def test_layers_shouldIncludeNestedLayers
+
+    def test_serialize_shouldBeDeterministic(self):
+        other = MapTemplate(name="TestMapTemplate", tiles=[self.tile], features=[self.feature_group, self.layer])
+        self.assertEqual(self.map_template.serialize(), other.serialize())
+    # End def test_serialize_shouldBeDeterministic
+
     def test_addTile(self):
         new_tile = TileLayer(name="NewTile")
         self.map_template.add_tile(new_tile)
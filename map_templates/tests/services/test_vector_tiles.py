@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `vector_tiles` module of the `map_templates.services` package.
+"""
+from django.test import TestCase
+
+from map_templates.services.filters import Filter
+from map_templates.services.vector_tiles import SQL_CAST_PATTERNS, filter_to_sql, validate_tile_coordinates
+
+
+class TestFilterToSql(TestCase):
+
+    def test_shouldCastValue_givenNumberFilter(self):
+        condition, params = filter_to_sql(Filter(key="height", operator=">=", value="10", value_type="number"))
+        self.assertIn("::numeric END >= %s::numeric", condition)
+        self.assertEqual(params, ["height", "height", SQL_CAST_PATTERNS["number"].pattern, "height", "10"])
+    # End def test_shouldCastValue_givenNumberFilter
+
+    def test_shouldOnlyCastCastableValues_givenNumberFilter(self):
+        condition, _ = filter_to_sql(Filter(key="height", operator=">=", value="10", value_type="number"))
+        self.assertIn("CASE WHEN (f.fields ->> %s) ~* %s THEN (f.fields ->> %s)::numeric END", condition)
+
+        pattern = SQL_CAST_PATTERNS["number"]
+        for value in ("10", "-1.5", " 3 ", ".5", "1e-3", "2E+4"):
+            self.assertIsNotNone(pattern.match(value), value)
+        for value in ("", "n/a", "oui", ".", "1,5", "1e"):
+            self.assertIsNone(pattern.match(value), value)
+    # End def test_shouldOnlyCastCastableValues_givenNumberFilter
+
+    def test_shouldOnlyCastCastableValues_givenBooleanFilter(self):
+        condition, _ = filter_to_sql(Filter(key="open", operator="==", value="true", value_type="boolean"))
+        self.assertIn("THEN (f.fields ->> %s)::boolean END = %s::boolean", condition)
+
+        pattern = SQL_CAST_PATTERNS["boolean"]
+        for value in ("true", "False", "t", "yes", "0", "off"):
+            self.assertIsNotNone(pattern.match(value), value)
+        for value in ("", "oui", "n/a", "2"):
+            self.assertIsNone(pattern.match(value), value)
+    # End def test_shouldOnlyCastCastableValues_givenBooleanFilter
+
+    def test_shouldRaiseValueError_givenMalformedFilterValue(self):
+        with self.assertRaises(ValueError):
+            filter_to_sql(Filter(key="height", operator=">=", value="n/a", value_type="number"))
+    # End def test_shouldRaiseValueError_givenMalformedFilterValue
+
+    def test_shouldUseSqlInequality_givenNotEqualFilter(self):
+        condition, params = filter_to_sql(Filter(key="type", operator="!=", value="road"))
+        self.assertIn("::text <> %s::text", condition)
+        self.assertEqual(params, ["type", "type", "road"])
+    # End def test_shouldUseSqlInequality_givenNotEqualFilter
+
+    def test_shouldKeepFeaturesWithoutKey(self):
+        condition, _ = filter_to_sql(Filter(key="type", operator="==", value="road"))
+        self.assertTrue(condition.startswith("(NOT (f.fields ? %s) OR"))
+    # End def test_shouldKeepFeaturesWithoutKey
+# End class TestFilterToSql
+
+
+class TestValidateTileCoordinates(TestCase):
+
+    def test_shouldNotRaiseError_givenValidCoordinates(self):
+        validate_tile_coordinates(0, 0, 0)
+        validate_tile_coordinates(10, 1023, 512)
+    # End def test_shouldNotRaiseError_givenValidCoordinates
+
+    def test_shouldRaiseValueError_givenCoordinatesOutsideTheGrid(self):
+        with self.assertRaises(ValueError):
+            validate_tile_coordinates(2, 4, 0)
+        with self.assertRaises(ValueError):
+            validate_tile_coordinates(2, 0, -1)
+        with self.assertRaises(ValueError):
+            validate_tile_coordinates(25, 0, 0)
+    # End def test_shouldRaiseValueError_givenCoordinatesOutsideTheGrid
+# End class TestValidateTileCoordinates
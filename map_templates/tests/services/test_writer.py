@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the `writer` module of the `map_templates.services` package.
+"""
+import gzip
+import hashlib
+import re
+from html import escape
+
+import folium
+from django.test import SimpleTestCase
+from folium.plugins import StripePattern
+
+from map_templates.services.elements import CompiledStyle
+from map_templates.services.styles import Style
+from map_templates.services.writer import RenderWriter, embed_wrapper
+
+
+class TestRenderWriter(SimpleTestCase):
+    def setUp(self):
+        self.map = self.build_map()
+
+    @staticmethod
+    def build_map() -> folium.Map:
+        map_ = folium.Map(location=(49.119308, 6.175715))
+        folium.GeoJson({
+            "type": "FeatureCollection",
+            "features": [{
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [6.175715, 49.119308]},
+                "properties": {"name": "<Metz & 'Moselle'>"}
+            }]
+        }).add_to(map_)
+        return map_
+    # End def build_map
+
+    def rendered(self) -> str:
+        """Get the document of the map as rendered by folium, from the elements already rendered."""
+        figure = self.map.get_root()
+        return figure._template.render(this=figure, kwargs={})
+    # End def rendered
+
+    def test_write_shouldWriteFullDocument(self):
+        with RenderWriter(self.map) as writer:
+            writer.write()
+            full = writer.full.read().decode("utf-8")
+        self.assertEqual(full, self.rendered())
+        self.assertEqual(writer.full_size, len(full.encode("utf-8")))
+        self.assertEqual(writer.full_digest, hashlib.sha256(full.encode("utf-8")).hexdigest())
+    # End def test_write_shouldWriteFullDocument
+
+    def test_write_shouldDeriveEmbeddedDocument(self):
+        with RenderWriter(self.map) as writer:
+            writer.write()
+            embed = writer.embed.read().decode("utf-8")
+        prefix, suffix = embed_wrapper(self.map.get_root())
+        self.assertEqual(embed, prefix + escape(self.rendered()) + suffix)
+        self.assertEqual(writer.embed_size, len(embed.encode("utf-8")))
+    # End def test_write_shouldDeriveEmbeddedDocument
+
+    def test_write_shouldCompressDocuments(self):
+        with RenderWriter(self.map, encodings=("gzip",)) as writer:
+            writer.write()
+            full = writer.full.read()
+            embed = writer.embed.read()
+            full_gzip = writer.full_encoded["gzip"].read()
+            embed_gzip = writer.embed_encoded["gzip"].read()
+        self.assertEqual(gzip.decompress(full_gzip), full)
+        self.assertEqual(gzip.decompress(embed_gzip), embed)
+        self.assertLess(len(full_gzip), len(full))
+    # End def test_write_shouldCompressDocuments
+
+    def test_write_shouldBeReproducible(self):
+        with RenderWriter(self.map) as writer, RenderWriter(self.build_map()) as other_writer:
+            writer.write()
+            other_writer.write()
+            self.assertEqual(writer.full.read(), other_writer.full.read())
+        self.assertEqual(writer.full_digest, other_writer.full_digest)
+    # End def test_write_shouldBeReproducible
+
+    @staticmethod
+    def build_patterned_map() -> folium.Map:
+        map_ = folium.Map(location=(49.119308, 6.175715))
+        layer = folium.GeoJson({
+            "type": "FeatureCollection",
+            "features": [{
+                "type": "Feature",
+                "geometry": {"type": "Polygon", "coordinates": [[[6.1, 49.1], [6.2, 49.1], [6.2, 49.2], [6.1, 49.1]]]},
+                "properties": {}
+            }]
+        }).add_to(map_)
+        style = Style(fill_pattern=StripePattern(color="#ff0000"))
+        CompiledStyle(style, Style(fill_pattern=StripePattern(color="#00ff00"))).add_to(layer)
+        return map_
+    # End def build_patterned_map
+
+    def test_write_shouldReferenceStablePatternNames_givenPatternedStyle(self):
+        with RenderWriter(self.build_patterned_map()) as writer, \
+             RenderWriter(self.build_patterned_map()) as other_writer:
+            writer.write()
+            other_writer.write()
+            full = writer.full.read().decode("utf-8")
+            self.assertEqual(full, other_writer.full.read().decode("utf-8"))
+
+        # The compiled styles reference the patterns by the names they are defined and keyed with
+        referenced = set(re.findall(r'"fillPattern": ?"(stripe_pattern_\w+)"', full))
+        keyed = set(re.findall(r'"(stripe_pattern_\w+)": stripe_pattern_\w+,', full))
+        defined = set(re.findall(r"var (stripe_pattern_\w+) = ", full))
+        self.assertEqual(len(referenced), 2)
+        self.assertEqual(referenced, keyed)
+        self.assertEqual(referenced, defined)
+    # End def test_write_shouldReferenceStablePatternNames_givenPatternedStyle
+
+    def test_embedWrapper_shouldMatchFolium(self):
+        html = folium.Map()._repr_html_()
+        prefix, suffix = embed_wrapper(folium.Map().get_root())
+        self.assertTrue(html.startswith(prefix))
+        self.assertTrue(html.endswith(suffix))
+    # End def test_embedWrapper_shouldMatchFolium
+# End class TestRenderWriter
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the tile views of the `map_templates` application.
+"""
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from common.choices import PublicationStatus
+from datasets.models import Dataset, DatasetLayer, DatasetVersion
+from interactive_maps.models import Map, MapRender
+from map_templates import models
+from map_templates.services import mbtiles
+from map_templates.services.features import SourceType
+
+
+class TestLayerTileView(TestCase):
+    def setUp(self):
+        dataset = Dataset.objects.create(name="Test Dataset")
+        # Created in bulk to skip the generation of the layers from the file of the version
+        version, = DatasetVersion.objects.bulk_create([DatasetVersion(dataset=dataset)])
+        dataset_layer = DatasetLayer.objects.create(dataset=version, name="test")
+
+        template = models.MapTemplate.objects.create(name="Test Template")
+        self.layer = models.Layer.objects.create(name="Test Layer", dataset_layer=dataset_layer,
+                                                 owner_map_template=template,
+                                                 source_type=SourceType.VECTOR_TILES.value)
+        self.map = Map.objects.create(title="Test Map", render=MapRender.objects.create(name="Test", template=template))
+        self.url = reverse('layer-tile', kwargs={"layer_id": self.layer.id, "z": 0, "x": 0, "y": 0})
+    # End def setUp
+
+    def test_shouldNotFound_givenDraftMap(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+    # End def test_shouldNotFound_givenDraftMap
+
+    def test_shouldServeTile_givenPublishedMap(self):
+        Map.objects.filter(id=self.map.id).update(publication_status=PublicationStatus.PUBLISHED)
+        self.assertIn(self.client.get(self.url).status_code, (200, 204))
+    # End def test_shouldServeTile_givenPublishedMap
+
+    def test_shouldServeTile_givenDraftMapAndStaffMember(self):
+        staff = get_user_model().objects.create_user(username="staff", password="password", is_staff=True)
+        self.client.force_login(staff)
+        self.assertIn(self.client.get(self.url).status_code, (200, 204))
+    # End def test_shouldServeTile_givenDraftMapAndStaffMember
+# End class TestLayerTileView
+
+
+class TestPrebuiltTileView(TestCase):
+    def setUp(self):
+        template = models.MapTemplate.objects.create(name="Test Template")
+        self.map = Map.objects.create(title="Test Map", render=MapRender.objects.create(name="Test", template=template))
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = mock.patch.object(mbtiles, "MBTILES_ROOT", Path(directory.name))
+        root.start()
+        self.addCleanup(root.stop)
+        db = sqlite3.connect(mbtiles.mbtiles_path(template.id))
+        db.executescript(mbtiles.SCHEMA)
+        db.execute("INSERT INTO tiles (layer_id, zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?, ?)",
+                   (7, 0, 0, 0, sqlite3.Binary(b"tile")))
+        db.commit()
+        db.close()
+        self.url = reverse('prebuilt-layer-tile',
+                           kwargs={"template_id": template.id, "layer_id": 7, "z": 0, "x": 0, "y": 0})
+    # End def setUp
+
+    def publish(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.map.publication_status = PublicationStatus.PUBLISHED
+            self.map.save()
+    # End def publish
+
+    def test_shouldNotFound_givenDraftMap(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+    # End def test_shouldNotFound_givenDraftMap
+
+    def test_shouldServeTileWithoutQuery_givenPublishedMap(self):
+        self.publish()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"tile")
+    # End def test_shouldServeTileWithoutQuery_givenPublishedMap
+
+    def test_shouldNotFound_givenUnpublishedMap(self):
+        self.publish()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.map.publication_status = PublicationStatus.DRAFT
+            self.map.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+    # End def test_shouldNotFound_givenUnpublishedMap
+
+    def test_shouldServeTile_givenDraftMapAndStaffMember(self):
+        staff = get_user_model().objects.create_user(username="staff", password="password", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+    # End def test_shouldServeTile_givenDraftMapAndStaffMember
+# End class TestPrebuiltTileView
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""
+URLs for the `map_templates` application.
+"""
+from django.urls import path
+
+from .views import layer_tile_view, prebuilt_tile_view
+
+urlpatterns = [
+    path('tiles/<int:layer_id>/<int:z>/<int:x>/<int:y>.pbf', layer_tile_view, name='layer-tile'),
+    path('tiles/templates/<int:template_id>/<int:layer_id>/<int:z>/<int:x>/<int:y>.pbf', prebuilt_tile_view,
+         name='prebuilt-layer-tile'),
+]
@@ -2,7 +2,8 @@
 """
 Utilities for the map_templates app
 """
-from typing import Any
+import json
+from typing import Any, Iterable
 
 
 def camel_to_snake(text: str):
@@ -24,4 +25,10 @@ def repr_str(obj : Any) -> str:
             class_=obj.__class__.__name__,
             id=id(obj),
             attrs=", ".join("{}={!r}".format(k, v) for k, v in obj.__dict__.items()),
-        )
\ No newline at end of file
+        )
+# End def repr_str
+
+def sorted_dicts(dicts: Iterable[dict]) -> list[dict]:
+    """Sort serialized objects by their JSON representation, so that sets serialize to the same list each time"""
+    return sorted(dicts, key=lambda d: json.dumps(d, sort_keys=True, default=str))
+# End def sorted_dicts
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Views for the `map_templates` application.
+"""
+from __future__ import annotations
+
+from django.db.models import Exists, Q, QuerySet
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.translation import gettext as _
+from django.views.decorators.http import require_GET
+
+from common.choices import PublicationStatus
+from interactive_maps.models import MapRender
+from map_templates.services.degradation import Degradation
+from map_templates.services.features import Layer as LayerObject, SourceType
+from map_templates.services.loader import layer_queryset
+from map_templates.services.mbtiles import read_tile
+from map_templates.services.vector_tiles import TILE_CONTENT_TYPE, generate_layer_tile, validate_tile_coordinates
+
+# ======================================================================================================================
+# Vector tiles
+# ======================================================================================================================
+
+def visible_templates_filter(request, template: str = "") -> Q | None:
+    """Get the condition on the templates whose tiles can be served to a user, as the maps are displayed:
+    the templates of the published maps, or any template for the staff members, who preview the draft maps.
+
+    Args:
+        request: The request of the user.
+        template (str): The path to the template from the model queried, e.g. `owner_map_template__`.
+
+    Returns:
+        Q | None: The condition, or None if all the templates are visible.
+    """
+    if request.user.is_active and request.user.is_staff:
+        return None
+    return Q(**{f"{template}render__map__publication_status": PublicationStatus.PUBLISHED})
+# End def visible_templates_filter
+
+
+def visible_layers(request, queryset: QuerySet) -> QuerySet:
+    """Filter the layers whose tiles can be served to a user, see `visible_templates_filter`."""
+    condition = visible_templates_filter(request, "owner_map_template__")
+    if condition is None:
+        return queryset
+    return queryset.filter(condition | visible_templates_filter(request, "owner_feature_group__map_template__"))
+# End def visible_layers
+
+
+@require_GET
+def layer_tile_view(request, layer_id: int, z: int, x: int, y: int):
+    """Serve the Mapbox Vector Tile (z, x, y) of a layer."""
+    # 1. Get the layer, only the layers served as vector tiles are exposed,
+    #    including those degraded to vector tiles to meet the render budget of their template,
+    #    and only if their map is published
+    degraded = MapRender.objects.filter(
+        degradations__contains=[{"layer_id": layer_id, "level": Degradation.TILES.label}]
+    )
+    layer = get_object_or_404(
+        visible_layers(request, layer_queryset()).filter(
+            Q(source_type=SourceType.VECTOR_TILES.value) | Exists(degraded)
+        ),
+        id=layer_id
+    )
+    if layer.dataset_layer_id is None:
+        raise Http404(_("The layer '{name}' has no data.").format(name=layer.name))
+
+    # 2. Generate the tile
+    try:
+        tile = generate_layer_tile(LayerObject.from_model(layer), z, x, y)
+    except ValueError as e:
+        raise Http404(str(e)) from e
+
+    # 3. Return the tile, an empty tile is returned as 'No Content'
+    if len(tile) == 0:
+        return HttpResponse(status=204)
+    return HttpResponse(tile, content_type=TILE_CONTENT_TYPE)
+# End def layer_tile_view
+
+
+@require_GET
+def prebuilt_tile_view(request, template_id: int, layer_id: int, z: int, x: int, y: int):
+    """Serve a pre-rendered Mapbox Vector Tile (z, x, y) of a layer from the MBTiles file of its template.
+
+    The database is never queried: whether the map of the template is published is recorded in the file.
+    The user is only read for the tiles of a draft map, which the staff members preview.
+    """
+    try:
+        validate_tile_coordinates(z, x, y)
+        try:
+            tile = read_tile(template_id, layer_id, z, x, y, published_only=True)
+        except PermissionError as e:
+            if visible_templates_filter(request) is not None:
+                raise Http404(_("The map template '{id}' does not exist.").format(id=template_id)) from e
+            tile = read_tile(template_id, layer_id, z, x, y)
+    except (ValueError, FileNotFoundError) as e:
+        raise Http404(str(e)) from e
+
+    # A tile absent from the file is empty
+    if tile is None:
+        return HttpResponse(status=204)
+    return HttpResponse(tile, content_type=TILE_CONTENT_TYPE)
+# End def prebuilt_tile_view
@@ -0,0 +1,55 @@
+# Generated by Django 5.0.6 on 2024-11-05 10:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import F, Func, TextField, Value
+
+# Frozen copy of the search document of the themes (see `thematic.models.theme_search_vector`),
+# so that this migration does not depend on the current models.
+SEARCH_CONFIGS = ("french", "english")
+
+
+def strip_html(field):
+    return Func(F(field), Value("<[^>]+>"), Value(" "), Value("g"), function="regexp_replace",
+                output_field=TextField())
+
+
+def search_vector(*fields):
+    vector = None
+    for field, weight in fields:
+        for config in SEARCH_CONFIGS:
+            part = SearchVector(field, config=config, weight=weight)
+            vector = part if vector is None else vector + part
+    return vector
+
+
+def populate_search_vectors(apps, schema_editor):
+    Theme = apps.get_model('thematic', 'Theme')
+    Theme.objects.update(search_vector=search_vector(
+        ("name", "A"),
+        ("short_name", "A"),
+        ("summary", "B"),
+        (strip_html("description"), "C"),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('thematic', '0003_theme_alter_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='theme',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='The document of the theme for the full-text search, maintained on save.', null=True, verbose_name='Search vector'),
+        ),
+        migrations.AddIndex(
+            model_name='theme',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='theme_search_vector_idx'),
+        ),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
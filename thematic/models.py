@@ -3,11 +3,18 @@
 Models for the `thematic` application.
 """
 from colorfield.fields import ColorField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.urls import reverse
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
+from common.utils.listings import ARTICLES, MAPS, THEMES, invalidate_listings
+from common.utils.search import search_vector, strip_html
+
 
 # ======================================================================================================================
 # Theme
@@ -20,6 +27,20 @@ def get_theme_cover_path(instance, filename):
     return f"thematic/theme/{instance.slug}/cover.{extension}"
 # End def get_theme_cover_path
 
+def theme_search_vector(model) -> SearchVector:
+    """Build the search document of the themes: their names, summary and description.
+
+    Args:
+        model: The `Theme` model.
+    """
+    return search_vector(
+        ("name", "A"),
+        ("short_name", "A"),
+        ("summary", "B"),
+        (strip_html("description"), "C"),
+    )
+# End def theme_search_vector
+
 class Theme(models.Model):
 
     # ------------------------------------------------------------------------------------------------------------------
@@ -94,6 +115,17 @@ class Theme(models.Model):
         help_text=_("Color used to represent the theme.")
     )
 
+    # ------------------------------------------------------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------------------------------------------------------
+
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name=_("Search vector"),
+        help_text=_("The document of the theme for the full-text search, maintained on save.")
+    )
+
     # ------------------------------------------------------------------------------------------------------------------
     # Meta
     # ------------------------------------------------------------------------------------------------------------------
@@ -101,6 +133,7 @@ class Theme(models.Model):
     class Meta:
         verbose_name = _("Theme")
         verbose_name_plural = _("Themes")
+        indexes = [GinIndex(fields=["search_vector"], name="theme_search_vector_idx")]
 
     # ------------------------------------------------------------------------------------------------------------------
     # Methods
@@ -110,6 +143,13 @@ class Theme(models.Model):
         return self.name
     # End def __str__
 
+    @classmethod
+    def update_search_vectors(cls, queryset: models.QuerySet | None = None) -> int:
+        """Update the search documents of themes, all by default (see `common.utils.search`)."""
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(search_vector=theme_search_vector(cls))
+    # End def update_search_vectors
+
     def clean(self):
         super().clean()
         self.slug = slugify(self.name)
@@ -118,4 +158,19 @@ class Theme(models.Model):
     def get_absolute_url(self):
         return reverse('theme', kwargs={"theme_slug" : self.slug})
     # End def get_absolute_url
-# End class Theme
\ No newline at end of file
+# End class Theme
+
+
+@receiver([post_save, post_delete], sender=Theme)
+def invalidate_theme_listings(sender, **kwargs):
+    """Invalidate the cached listings displaying the themes: the themes, and the maps and articles filtered by them."""
+    invalidate_listings(THEMES, MAPS, ARTICLES)
+# End def invalidate_theme_listings
+
+
+@receiver(post_save, sender=Theme)
+def update_theme_search_vector(sender, instance, raw=False, **kwargs):
+    """Update the search document of a theme once saved."""
+    if not raw:
+        Theme.update_search_vectors(Theme.objects.filter(pk=instance.pk))
+# End def update_theme_search_vector
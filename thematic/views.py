@@ -2,9 +2,10 @@
 """
 Views for the `thematic` application.
 """
-from django.db.models import Q
 from django.views.generic import DetailView, ListView
 
+from common.utils.listings import THEMES, CachedListingMixin
+from common.utils.search import search_queryset
 from thematic.models import Theme
 
 
@@ -33,10 +34,12 @@ class ThemeView(DetailView):
 # Theme Index View (Thematic view)
 # ======================================================================================================================
 
-class ThemeIndexView(ListView):
+class ThemeIndexView(CachedListingMixin, ListView):
     """View for the index of the `article` application."""
     model = Theme
     template_name = "thematic/theme_index.html"
+    listing_template_name = "thematic/theme_index_listing.html"
+    listing_sections = (THEMES,)
     context_object_name = "themes"
     paginate_by = 10
 
@@ -45,11 +48,7 @@ class ThemeIndexView(ListView):
         # Filter by search query
         search = self.request.GET.get('search')
         if search:
-            themes = themes.filter(
-                Q(name__icontains=search) |
-                Q(short_name__icontains=search) |
-                Q(summary__icontains=search)
-            ).distinct()
+            themes = search_queryset(themes, search)
         return themes
     # End def get_queryset
 